@@ -0,0 +1,242 @@
+"""
+Benchmarks the management round-trips of the client API calls against a
+fake management endpoint serving synthetic domains of several sizes.
+
+For every call and domain size it reports the requests issued, the bytes
+sent and received, wall-clock latency percentiles and the peak memory of
+the client, as JSON so that runs can be compared across commits:
+
+    python benchmark/harness.py --iterations 20 --output before.json
+    git checkout <commit>
+    python benchmark/harness.py --iterations 20 --output after.json
+    python benchmark/harness.py --compare before.json after.json
+
+The endpoint runs in this process and the calls run in a forked worker
+process, so the memory of the endpoint is not counted against the client.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from wildfly.fake import DomainModel, FakeManagementServer  # noqa
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+DOMAIN_SIZES = {
+    'small': dict(hosts=1, servers=1, deployments=5, groups=1),
+    'medium': dict(hosts=10, servers=4, deployments=20, groups=4),
+    'large': dict(hosts=40, servers=8, deployments=100, groups=10),
+}
+
+CALLS = [
+    ('version', lambda client: client.version()),
+    ('deployments', lambda client: client.deployments()),
+    ('deployment_status', lambda client: client.deployment_status(
+        'app-0.war')),
+    ('servers', lambda client: client.servers()),
+    ('topology', lambda client: client.topology(refresh=True)),
+    ('application_hostnames', lambda client: client.get_application_hostnames(
+        'app-0.war')),
+]
+
+PERCENTILES = [50, 90, 99]
+
+
+def percentile(values, p):
+    """ Returns the p-th percentile of values (nearest rank). """
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1,
+                      int(round(p / 100.0 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+def latency_summary(timings):
+    summary = {'min': min(timings),
+               'max': max(timings),
+               'mean': sum(timings) / len(timings)}
+    for p in PERCENTILES:
+        summary['p{}'.format(p)] = percentile(timings, p)
+    return summary
+
+
+def _peak_rss():
+    """ Returns the peak resident set size of this process in bytes. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _worker(connection, port, call, iterations):
+    """ Runs call iterations times against the endpoint on port and sends
+    back the timings and the peak memory. """
+    from wildfly import Client
+
+    client = Client('127.0.0.1', port)
+    # authenticate and warm up the connection before measuring
+    client.version()
+    connection.send('ready')
+    connection.recv()
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+    rss = _peak_rss()
+    timings = []
+    for i in range(iterations):
+        start = time.time()
+        call(client)
+        timings.append(time.time() - start)
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        method = 'tracemalloc'
+    else:
+        peak = _peak_rss() - rss if rss is not None else None
+        method = 'maxrss'
+    client.close()
+    connection.send({'timings': timings,
+                     'peak_memory': peak,
+                     'memory_method': method})
+    connection.close()
+
+
+def measure(server, name, call, iterations):
+    """ Returns the measurements of call against server. """
+    parent, child = multiprocessing.Pipe()
+    worker = multiprocessing.Process(target=_worker,
+                                     args=(child, server.port, call,
+                                           iterations))
+    worker.start()
+    parent.recv()
+    server.stats.reset()
+    parent.send('go')
+    result = parent.recv()
+    worker.join()
+    stats = server.stats.to_dict()
+    return {'call': name,
+            'iterations': iterations,
+            'requests': stats['requests'],
+            'requests_per_call': stats['requests'] / float(iterations),
+            'bytes_sent': stats['bytes_received'],
+            'bytes_received': stats['bytes_sent'],
+            'operations': stats['operations'],
+            'latency': latency_summary(result['timings']),
+            'peak_memory': result['peak_memory'],
+            'memory_method': result['memory_method']}
+
+
+def revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, calls, iterations, latency):
+    results = []
+    for size in sizes:
+        model = DomainModel(**DOMAIN_SIZES[size])
+        with FakeManagementServer(model, latency=latency) as server:
+            for name, call in calls:
+                result = measure(server, name, call, iterations)
+                result['size'] = size
+                result['domain'] = DOMAIN_SIZES[size]
+                results.append(result)
+                sys.stderr.write(
+                    '{:<22} {:<7} {:>8.2f} req {:>10d} B {:>8.1f} ms p50 '
+                    '{:>8.1f} ms p99\n'.format(
+                        name, size, result['requests_per_call'],
+                        result['bytes_received'] // iterations,
+                        result['latency']['p50'] * 1000,
+                        result['latency']['p99'] * 1000))
+    return {'revision': revision(),
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'latency': latency,
+            'results': results}
+
+
+def compare(baseline, current):
+    """ Prints the change of every measurement of current relative to
+    baseline. """
+    before = dict(((r['call'], r['size']), r) for r in baseline['results'])
+    print('{:<22} {:<7} {:>14} {:>18} {:>18}'.format(
+        'call', 'size', 'requests', 'bytes received', 'p50 latency'))
+    for result in current['results']:
+        old = before.get((result['call'], result['size']))
+        if old is None:
+            continue
+        print('{:<22} {:<7} {:>14} {:>18} {:>18}'.format(
+            result['call'], result['size'],
+            _change(old['requests_per_call'], result['requests_per_call']),
+            _change(old['bytes_received'], result['bytes_received']),
+            _change(old['latency']['p50'], result['latency']['p50'])))
+
+
+def _change(old, new):
+    if not old:
+        return '-'
+    return '{:+.1f}%'.format((new - old) * 100.0 / old)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the management round-trips of the client.')
+    parser.add_argument('--sizes', default='small,medium,large',
+                        help='comma separated domain sizes, among '
+                             '{}'.format(', '.join(sorted(DOMAIN_SIZES))))
+    parser.add_argument('--calls', default=None,
+                        help='comma separated calls, default all')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds added by the endpoint to every '
+                             'response')
+    parser.add_argument('--output', default=None,
+                        help='write the JSON report to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'RUN'),
+                        help='compare two JSON reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as baseline, \
+                open(args.compare[1]) as current:
+            compare(json.load(baseline), json.load(current))
+        return
+
+    # keep the client's INFO logging out of the measurements
+    logging.disable(logging.INFO)
+    calls = CALLS
+    if args.calls:
+        names = args.calls.split(',')
+        calls = [(name, call) for name, call in CALLS if name in names]
+    report = run(args.sizes.split(','), calls, args.iterations, args.latency)
+    data = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(data + '\n')
+    else:
+        print(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Counts the management requests issued by the aggregate API calls against
+synthetic domains of increasing size.
+
+    python benchmark/request_count.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import wildfly  # noqa
+from wildfly.fake import DomainModel  # noqa
+
+
+DOMAIN_SIZES = [(1, 1), (4, 2), (10, 4), (40, 4)]
+
+
+class Response(object):
+
+    status_code = 200
+    reason = 'OK'
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class CountingClient(wildfly.Client):
+    """ Client answering every request from a DomainModel. """
+
+    def __init__(self, model):
+        super(CountingClient, self).__init__('localhost')
+        self.model = model
+        self.requests = 0
+
+    def _post(self, request):
+        self.requests += 1
+        return Response(self.model.execute(request))
+
+
+def count(call, model):
+    client = CountingClient(model)
+    call(client)
+    return client.requests
+
+
+def server_states(model):
+    """ Returns the (address, 'server-state') items of every server. """
+    return [([{'host': host}, {'server': server}], 'server-state')
+            for host, server, config in model._server_configs()]
+
+
+CALLS = [
+    ('deployments', lambda client: client.deployments()),
+    ('deployment_status', lambda client: client.deployment_status(
+        'app-0.war')),
+    ('servers', lambda client: client.servers()),
+    ('application_hostnames', lambda client: client.get_application_hostnames(
+        'app-0.war')),
+    ('read_attributes', lambda client: client.read_attributes(
+        server_states(client.model))),
+]
+
+
+def main():
+    print('{:<24} {:>6} {:>8} {:>9}'.format(
+        'call', 'hosts', 'servers', 'requests'))
+    for name, call in CALLS:
+        for hosts, servers in DOMAIN_SIZES:
+            model = DomainModel(hosts=hosts, servers=servers,
+                                deployments=10, groups=4)
+            print('{:<24} {:>6} {:>8} {:>9}'.format(
+                name, hosts, hosts * servers, count(call, model)))
+
+
+if __name__ == '__main__':
+    main()
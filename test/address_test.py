@@ -0,0 +1,133 @@
+import pickle
+import unittest
+from wildfly import Address, ReadCache, Snapshot
+from wildfly.address import address_list
+from wildfly.fake import DomainModel, FakeManagementServer
+from wildfly.instrumentation import address_pattern
+from wildfly.util import address_tuple
+
+SERVER = [{'host': 'host-0'}, {'server': 'host-0-0'}]
+
+
+class AddressTest(unittest.TestCase):
+
+    def test_parse(self):
+        address = Address.parse('/host=master/server=server-one')
+        self.assertEqual(address, (('host', 'master'),
+                                   ('server', 'server-one')))
+        self.assertEqual(address.to_list(),
+                         [{'host': 'master'}, {'server': 'server-one'}])
+        self.assertEqual(Address.parse('host=master/server=server-one/'),
+                         address)
+        self.assertEqual(Address.parse('/'), Address())
+        self.assertEqual(Address.parse('/path="a/b"/x=y'),
+                         (('path', 'a/b'), ('x', 'y')))
+        for path in ('/host', '/host=master/=x', '/host="a'):
+            self.assertRaises(ValueError, Address.parse, path)
+
+    def test_interned(self):
+        address = Address.parse('/host=master/server=server-one')
+        self.assertIs(Address.of([{'host': 'master'},
+                                  {'server': 'server-one'}]), address)
+        self.assertIs(Address.of(address_tuple(address.to_list())), address)
+        self.assertIs(Address().child('host', 'master')
+                      .child('server', 'server-one'), address)
+        self.assertIs(pickle.loads(pickle.dumps(address)), address)
+        self.assertEqual({address_tuple(SERVER): 1}[Address.of(SERVER)], 1)
+
+    def test_intern_table_bounded(self):
+        self.assertLessEqual(len(Address._interned), Address.interned)
+        interned = Address.interned
+        Address.interned = 10
+        try:
+            first = Address.parse('/deployment=app-0.war')
+            hot = Address.parse('/host=master')
+            for i in range(1, 100):
+                Address.parse('/deployment=app-{}.war'.format(i))
+                # an address in constant use is never dropped
+                self.assertIs(Address.parse('/host=master'), hot)
+            self.assertEqual(len(Address._interned), 10)
+            self.assertIs(Address.parse('/deployment=app-99.war'),
+                          Address.parse('/deployment=app-99.war'))
+            # a dropped address is still equal to, and hashes like, a new one
+            again = Address.parse('/deployment=app-0.war')
+            self.assertIsNot(again, first)
+            self.assertEqual({first: 1}[again], 1)
+        finally:
+            Address.interned = interned
+
+    def test_to_list_copies(self):
+        address = Address.of(SERVER)
+        address.to_list().append({'subsystem': 'logging'})
+        address.to_list()[0]['host'] = 'host-1'
+        self.assertEqual(address.to_list(), SERVER)
+        self.assertIsNot(address.to_list(), address.to_list())
+        self.assertIsNot(address.to_list()[0], address.to_list()[0])
+
+    def test_path(self):
+        address = Address.of([{'path': 'a/b'}, {'x': 'y'}])
+        self.assertEqual(address.path, '/path="a/b"/x=y')
+        self.assertIs(Address.parse(address.path), address)
+        self.assertEqual(str(Address()), '/')
+
+    def test_derivation(self):
+        address = Address.of(SERVER)
+        self.assertEqual(address.parent, Address.parse('/host=host-0'))
+        self.assertIs(Address().parent, Address())
+        self.assertEqual(address.pattern.path, '/host=*/server=*')
+        self.assertTrue(address.pattern.is_wildcard())
+        self.assertFalse(address.is_wildcard())
+
+    def test_matching(self):
+        address = Address.of(SERVER).child('subsystem', 'logging')
+        self.assertTrue(address.startswith('/host=host-0'))
+        self.assertTrue(address.startswith('/host=*/server=host-0-0'))
+        self.assertFalse(address.startswith('/host=host-1'))
+        self.assertTrue(address.matches('/host=*/server=*/subsystem=*'))
+        self.assertFalse(address.matches('/host=*/server=*'))
+
+    def test_address_list(self):
+        self.assertIs(address_list(SERVER), SERVER)
+        self.assertEqual(address_list('/host=host-0/server=host-0-0'),
+                         SERVER)
+        self.assertEqual(address_pattern('/host=a/server=b'),
+                         address_pattern([{'host': 'a'}, {'server': 'b'}]))
+
+    def test_cache_key(self):
+        request = {'operation': 'read-attribute', 'name': 'server-state'}
+        self.assertEqual(
+            ReadCache.key(dict(request, address=SERVER)),
+            ReadCache.key(dict(request,
+                               address=Address.parse(
+                                   '/host=host-0/server=host-0-0'))))
+
+    def test_snapshot_node(self):
+        snapshot = Snapshot({'host': {'master': {'name': 'master'}}})
+        self.assertIs(snapshot.node('/host=master'),
+                      snapshot.node([{'host': 'master'}]))
+
+
+class ClientAddressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeManagementServer(DomainModel(hosts=1)).start()
+        self.client = self.server.client()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_cli_path(self):
+        self.assertEqual(
+            self.client.read_attribute('server-state',
+                                       '/host=host-0/server=host-0-0'),
+            self.client.read_attribute('server-state', SERVER))
+        with self.client.batch() as batch:
+            step = batch.read_attribute('server-state',
+                                        Address.of(SERVER))
+        self.assertEqual(step.result(), self.client.read_attribute(
+            'server-state', SERVER))
+
+
+if __name__ == '__main__':
+    unittest.main()
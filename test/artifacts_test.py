@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from wildfly.artifacts import ArtifactCache
+
+
+METADATA = '<metadata><versioning><snapshot><timestamp>{}</timestamp>' \
+           '<buildNumber>1</buildNumber></snapshot></versioning></metadata>'
+
+
+class Response(object):
+
+    def __init__(self, content=None):
+        self.status_code = 200 if content is not None else 404
+        self.content = content or b''
+        self.text = self.content.decode('latin-1')
+
+    def iter_content(self, blocksize):
+        for i in range(0, len(self.content), blocksize):
+            yield self.content[i:i + blocksize]
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise IOError('Not Found')
+
+    def close(self):
+        pass
+
+
+class Repository(object):
+    """ Minimal stand-in for the session used to reach the repository. """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+
+    def publish(self, url, content):
+        self.files[url] = content
+        self.files[url + '.sha1'] = hashlib.sha1(
+            content).hexdigest().encode('ascii')
+
+    def get(self, url, stream=False):
+        self.requests.append(url)
+        return Response(self.files.get(url))
+
+
+class ArtifactCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ArtifactCache(self.directory, max_bytes=2500)
+        self.repository = Repository()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def resolve(self, version, metadata_url=None):
+        url = 'http://repo/app-{}.war'.format(version)
+        return self.cache.resolve(
+            self.repository, url,
+            ArtifactCache.key('org.example', 'app', version, 'war'),
+            metadata_url)
+
+    def test_release_cached(self):
+        self.repository.publish('http://repo/app-1.0.war', b'x' * 1000)
+        path, byte_value = self.resolve('1.0')
+        with open(path, 'rb') as artifact:
+            self.assertEqual(artifact.read(), b'x' * 1000)
+        requests = len(self.repository.requests)
+        self.assertEqual(self.resolve('1.0'), (path, byte_value))
+        self.assertEqual(len(self.repository.requests), requests)
+
+    def test_checksum_mismatch(self):
+        self.repository.publish('http://repo/app-1.0.war', b'x' * 1000)
+        self.repository.files['http://repo/app-1.0.war.sha1'] = b'0' * 40
+        with self.assertRaises(IOError):
+            self.resolve('1.0')
+        self.assertIsNone(self.cache.get(
+            ArtifactCache.key('org.example', 'app', '1.0', 'war')))
+
+    def test_snapshot_revalidated(self):
+        metadata = 'http://repo/maven-metadata.xml'
+        self.repository.publish('http://repo/app-1.0-SNAPSHOT.war', b'a')
+        self.repository.files[metadata] = METADATA.format('1').encode()
+        self.resolve('1.0-SNAPSHOT', metadata)
+        self.resolve('1.0-SNAPSHOT', metadata)
+        downloads = self.repository.requests.count(
+            'http://repo/app-1.0-SNAPSHOT.war')
+        self.assertEqual(downloads, 1)
+
+        self.repository.publish('http://repo/app-1.0-SNAPSHOT.war', b'b')
+        self.repository.files[metadata] = METADATA.format('2').encode()
+        path, byte_value = self.resolve('1.0-SNAPSHOT', metadata)
+        with open(path, 'rb') as artifact:
+            self.assertEqual(artifact.read(), b'b')
+
+    def test_lru_eviction(self):
+        for version in ('1', '2', '3'):
+            self.repository.publish('http://repo/app-{}.war'.format(version),
+                                    b'x' * 1000)
+        self.resolve('1')
+        time.sleep(0.01)
+        self.resolve('2')
+        time.sleep(0.01)
+        # using version 1 makes version 2 the least recently used
+        self.resolve('1')
+        time.sleep(0.01)
+        self.resolve('3')
+        cached = [version for version in ('1', '2', '3')
+                  if self.cache.get(ArtifactCache.key(
+                      'org.example', 'app', version, 'war'))]
+        self.assertEqual(cached, ['1', '3'])
@@ -0,0 +1,31 @@
+import concurrent.futures
+import unittest
+import wildfly
+import wildfly.util
+from wildfly.api.deployment import DEFAULT_SERVER_GROUP
+from . import base
+
+
+class AsyncClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = wildfly.AsyncClient(base.WILDFLY_CONTAINER_NAME,
+                                          max_workers=4)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_read_attribute(self):
+        future = self.client.read_attribute('process-type')
+        self.assertIsInstance(future, concurrent.futures.Future)
+        self.assertEqual(future.result(), 'Domain Controller')
+
+    def test_concurrent_operations(self):
+        futures = [self.client.execute('read-resource') for i in range(20)]
+        for future in concurrent.futures.as_completed(futures):
+            self.assertTrue(wildfly.util.is_success(future.result()))
+
+    def test_servers(self):
+        servers = self.client.servers(server_group=DEFAULT_SERVER_GROUP)
+        for key, server in servers.result().items():
+            self.assertEqual(server['group'], DEFAULT_SERVER_GROUP)
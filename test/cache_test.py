@@ -0,0 +1,85 @@
+import time
+import unittest
+from wildfly.cache import ReadCache, is_read_only
+
+
+def read(operation, address, **parameters):
+    request = {'operation': operation, 'address': address}
+    request.update(parameters)
+    return request
+
+
+SERVER = [{'host': 'master'}, {'server': 'server-one'}]
+SERVER_STATE = read('read-attribute', SERVER, name='server-state')
+SERVERS = read('read-children-resources', [{'host': 'master'}],
+               **{'child-type': 'server'})
+ALL_DEPLOYMENTS = read('read-attribute',
+                       [{'host': '*'}, {'server': '*'}, {'deployment': '*'}],
+                       name='status')
+VERSION = read('read-attribute', [], name='release-version')
+
+
+class ReadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ReadCache(maxsize=3, ttl=60)
+
+    def test_hit_and_miss(self):
+        self.assertIsNone(self.cache.get(SERVER_STATE))
+        self.cache.put(SERVER_STATE, 'running')
+        self.assertEqual(self.cache.get(dict(SERVER_STATE)), 'running')
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_parameters_are_part_of_key(self):
+        self.cache.put(SERVER_STATE, 'running')
+        other = read('read-attribute', SERVER, name='name')
+        self.assertIsNone(self.cache.get(other))
+
+    def test_ttl(self):
+        cache = ReadCache(ttl=0.01)
+        cache.put(SERVER_STATE, 'running')
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(SERVER_STATE))
+
+    def test_lru_eviction(self):
+        self.cache.put(SERVER_STATE, 1)
+        self.cache.put(SERVERS, 2)
+        self.cache.put(ALL_DEPLOYMENTS, 3)
+        self.cache.get(SERVER_STATE)
+        self.cache.put(VERSION, 4)
+        self.assertIsNone(self.cache.get(SERVERS))
+        self.assertEqual(self.cache.get(SERVER_STATE), 1)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_invalidate_prefix(self):
+        self.cache.maxsize = 10
+        self.cache.put(SERVER_STATE, 1)
+        self.cache.put(SERVERS, 2)
+        self.cache.put(ALL_DEPLOYMENTS, 3)
+        self.cache.put(VERSION, 4)
+        self.cache.invalidate(SERVER)
+        # the server itself, the children read of its host and the wildcard
+        # read below it are dropped; the root attribute is not affected
+        self.assertIsNone(self.cache.get(SERVER_STATE))
+        self.assertIsNone(self.cache.get(SERVERS))
+        self.assertIsNone(self.cache.get(ALL_DEPLOYMENTS))
+        self.assertEqual(self.cache.get(VERSION), 4)
+        self.assertEqual(self.cache.stats()['invalidations'], 3)
+
+    def test_invalidate_composite(self):
+        composite = {'operation': 'composite', 'address': [],
+                     'steps': [SERVER_STATE, VERSION]}
+        self.assertTrue(is_read_only(composite))
+        self.cache.put(composite, 1)
+        self.cache.invalidate_request(
+            read('write-attribute', SERVER, name='x', value='y'))
+        self.assertIsNone(self.cache.get(composite))
+
+    def test_is_read_only(self):
+        self.assertTrue(is_read_only(SERVER_STATE))
+        self.assertFalse(is_read_only(read('add', SERVER)))
+        self.assertFalse(is_read_only(
+            {'operation': 'composite', 'address': [],
+             'steps': [SERVER_STATE, read('remove', SERVER)]}))
@@ -32,6 +32,23 @@ class ConnectionTimeoutTest(unittest.TestCase):
         self.assertTrue(end - start < 2 * self.timeout)
 
 
+class ConnectionPoolTest(base.BaseTestCase):
+
+    def test_digest_nonce_reused(self):
+        self.client.read_resource()
+        self.client.read_resource()
+        # only the first request answers a 401 challenge, the second one
+        # authenticates up front with the same nonce
+        self.assertEqual(self.client._auth._thread_local.nonce_count, 2)
+
+    def test_keep_alive_disabled(self):
+        client = wildfly.Client(base.WILDFLY_CONTAINER_NAME, keep_alive=False)
+        response = client.read_resource()
+        self.assertTrue(wildfly.util.is_success(response))
+        self.assertEqual(client.headers['Connection'], 'close')
+        client.close()
+
+
 class VersionTest(base.BaseTestCase):
 
     def test_version(self):
@@ -130,6 +147,40 @@ class RemoveTest(base.BaseTestCase):
         pass
 
 
+class BatchTest(base.BaseTestCase):
+
+    def test_batch(self):
+        with self.client.batch() as batch:
+            process_type = batch.read_attribute('process-type')
+            server_groups = batch.read_children_names('server-group')
+        self.assertTrue(process_type.is_success())
+        self.assertEqual(process_type.result(), 'Domain Controller')
+        self.assertIn(DEFAULT_SERVER_GROUP, server_groups.result())
+
+    def test_batch_chunks(self):
+        batch = self.client.batch(chunk_size=2)
+        steps = [batch.read_attribute('process-type') for i in range(5)]
+        self.assertEqual(batch.run(), steps)
+        for step in steps:
+            self.assertEqual(step.result(), 'Domain Controller')
+
+    def test_batch_concurrent_chunks(self):
+        client = wildfly.Client(base.WILDFLY_CONTAINER_NAME, max_workers=4)
+        batch = client.batch(chunk_size=1)
+        steps = [batch.read_attribute('process-type') for i in range(8)]
+        batch.run()
+        client.close()
+        for step in steps:
+            self.assertEqual(step.result(), 'Domain Controller')
+
+    def test_batch_failed_step(self):
+        with self.client.batch() as batch:
+            step = batch.read_attribute('no-such-attribute')
+        self.assertFalse(step.is_success())
+        self.assertIsNone(step.result())
+        self.assertIsNotNone(step.failure_description)
+
+
 class ReadResourceTest(base.BaseTestCase):
 
     def test_read_resource_default(self):
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import unittest
+from wildfly import codec
+from wildfly.fake import DomainModel, FakeManagementServer
+
+
+DOCUMENT = {'operation': 'read-resource',
+            'address': [{'host': 'host-0'}, {'server': u'caf\xe9'}],
+            'recursive': True,
+            'steps': [1, 2.5, None, False]}
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for name in codec.available():
+            json_codec = codec.get_codec(name)
+            data = json_codec.dumps(DOCUMENT)
+            self.assertTrue(isinstance(data, bytes))
+            self.assertEqual(json_codec.loads(data), DOCUMENT)
+
+    def test_decodes_utf8(self):
+        json_codec = codec.get_codec('json')
+        self.assertEqual(json_codec.loads(u'["caf\xe9"]'.encode('utf-8')),
+                         [u'caf\xe9'])
+
+    def test_default(self):
+        self.assertEqual(codec.get_codec().name, codec.available()[0])
+        self.assertEqual(codec.available()[-1], 'json')
+
+    def test_instance(self):
+        json_codec = codec.JsonCodec()
+        self.assertTrue(codec.get_codec(json_codec) is json_codec)
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, codec.get_codec, 'yaml')
+
+    def test_client_codec(self):
+        with FakeManagementServer(DomainModel(hosts=2)) as server:
+            client = server.client(codec='json')
+            self.assertEqual(client.codec.name, 'json')
+            response = client.execute('read-children-names',
+                                      {'child-type': 'host'})
+            self.assertTrue(response.codec is client.codec)
+            self.assertEqual(response.result, ['host-0', 'host-1'])
@@ -0,0 +1,189 @@
+import os
+import tempfile
+import time
+import unittest
+import requests
+import wildfly
+import wildfly.util
+from wildfly.fake import DomainModel, FakeManagementServer
+
+
+class FakeServerTestCase(unittest.TestCase):
+    """ Runs a client against an in-process fake domain controller. """
+
+    model = dict(hosts=3, servers=2, deployments=4, groups=2)
+
+    def setUp(self):
+        self.server = FakeManagementServer(DomainModel(**self.model)).start()
+        self.client = self.server.client()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+
+class FakeServerTest(FakeServerTestCase):
+
+    def test_digest_challenge_once(self):
+        for i in range(5):
+            self.assertEqual(self.client.version(), '8.2.0.Final')
+        self.assertEqual(self.server.stats.challenges, 1)
+        self.assertEqual(self.server.stats.requests, 6)
+
+    def test_wrong_password(self):
+        client = self.server.client(password='wrong')
+        self.assertRaises(requests.HTTPError, client.execute,
+                          'read-resource')
+        client.close()
+
+    def test_failed_operation(self):
+        response = self.client.execute('read-resource',
+                                       address=[{'host': 'no-such-host'}])
+        self.assertFalse(wildfly.util.is_success(response))
+
+    def test_read_children(self):
+        self.assertEqual(self.client.hosts(), ['host-0', 'host-1', 'host-2'])
+        groups = self.client.read_children_resources('server-group')
+        self.assertEqual(sorted(groups), ['group-0', 'group-1'])
+
+    def test_latency(self):
+        self.client.version()
+        self.server.latency = lambda operation: 0.2 \
+            if operation == 'read-attribute' else 0
+        start = time.time()
+        self.client.hosts()
+        self.assertTrue(time.time() - start < 0.2)
+        self.client.version()
+        self.assertTrue(time.time() - start >= 0.2)
+
+
+class FakeDomainTest(FakeServerTestCase):
+
+    def test_servers(self):
+        servers = self.client.servers()
+        self.assertEqual(len(servers), 6)
+        self.assertEqual(servers['host-1-0'], {'group': 'group-0',
+                                               'host': 'host-1',
+                                               'status': 'running',
+                                               'uptime': 1000})
+        self.assertEqual(self.server.stats.operations['composite'], 1)
+
+    def test_stopped_servers(self):
+        self.client.stop_servers('group-1', blocking=True)
+        servers = self.client.servers(server_group='group-1')
+        for server in servers.values():
+            self.assertEqual(server['status'], 'STOPPED')
+            self.assertIsNone(server['uptime'])
+
+    def test_deployments(self):
+        deployments = self.client.deployments()
+        self.assertEqual(len(deployments), 4)
+        self.assertEqual(deployments['app-1.war']['server-groups'],
+                         ['group-1'])
+        self.assertEqual(deployments['app-1.war']['status'], 'RUNNING')
+        self.assertEqual(sorted(deployments['app-1.war']['hosts']),
+                         ['host-0', 'host-1', 'host-2'])
+
+    def test_disable(self):
+        self.client.disable('app-1.war', 'group-1')
+        self.assertFalse(self.client.is_deployment_enabled('app-1.war'))
+        self.assertEqual(self.client.deployment_status('app-1.war'),
+                         'STOPPED')
+
+    def test_topology(self):
+        topology = self.client.topology()
+        self.assertEqual(len(topology.servers_on_host('host-2')), 2)
+        self.assertEqual(
+            sorted(self.client.get_server_group_host('group-1')),
+            ['host-0-1.example.com', 'host-1-1.example.com',
+             'host-2-1.example.com'])
+
+
+class FakeNonceTest(FakeServerTestCase):
+
+    def test_nonces_are_bounded(self):
+        self.server.max_nonces = 5
+        for i in range(20):
+            client = self.server.client()
+            client.version()
+            client.close()
+        self.assertEqual(len(self.server.nonces), 5)
+
+    def test_expired_nonce_is_stale(self):
+        self.server.nonce_ttl = 0.05
+        self.assertEqual(self.client.version(), '8.2.0.Final')
+        time.sleep(0.1)
+        # the client answers the stale challenge with the new nonce
+        self.assertEqual(self.client.version(), '8.2.0.Final')
+        self.assertEqual(self.server.stats.challenges, 2)
+        self.assertEqual(len(self.server.nonces), 1)
+
+    def test_stale_challenge(self):
+        self.client.version()
+        self.server.expire_nonces()
+        response = self.client.post(
+            self.client.endpoint,
+            data='{"operation": "read-attribute", "name": "name"}',
+            headers={'Content-Type': 'application/json'},
+            auth=self.client._auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stale=true',
+                      response.history[0].headers['WWW-Authenticate'])
+
+
+class FakeDeployTest(FakeServerTestCase):
+
+    def setUp(self):
+        super(FakeDeployTest, self).setUp()
+        fd, self.path = tempfile.mkstemp(suffix='.war')
+        with os.fdopen(fd, 'wb') as artifact:
+            artifact.write(os.urandom(300000))
+
+    def tearDown(self):
+        os.remove(self.path)
+        super(FakeDeployTest, self).tearDown()
+
+    def test_deploy_file(self):
+        progress = []
+        self.client.deploy('org.example', 'demo', '1.0', path=self.path,
+                           server_groups='group-0',
+                           progress=lambda sent, total: progress.append(
+                               sent))
+        deployment = self.client.deployments()['demo.war']
+        self.assertEqual(deployment['content'][0]['hash']['BYTES_VALUE'],
+                         wildfly.util.content_hash(self.path))
+        self.assertEqual(deployment['status'], 'RUNNING')
+        self.assertEqual(self.server.stats.operations['add-content'], 1)
+        self.assertTrue(len(progress) > 1)
+
+    def test_deploy_file_chunked(self):
+        self.client.deploy('org.example', 'demo', '1.0', path=self.path,
+                           chunked=True)
+        deployment = self.client.deployments()['demo.war']
+        self.assertEqual(deployment['content'][0]['hash']['BYTES_VALUE'],
+                         wildfly.util.content_hash(self.path))
+
+    def test_add_content_drops_cached_reads(self):
+        client = self.server.client(cache=wildfly.ReadCache())
+        before = client.read_children_names('deployment')
+        byte_value = client.upload_content(self.path).result['BYTES_VALUE']
+        client._add_content('demo.war', 'demo-1.0.war', byte_value)
+        self.assertEqual(client.read_children_names('deployment'),
+                         sorted(before + ['demo.war']))
+        client.close()
+
+    def test_upload_after_stale_nonce(self):
+        for chunked in (False, True):
+            self.client.version()
+            self.server.expire_nonces()
+            response = self.client.upload_content(self.path, chunked=chunked)
+            self.assertEqual(response.result['BYTES_VALUE'],
+                             wildfly.util.content_hash(self.path))
+            self.assertEqual(len(response.history), 1)
+
+    def test_deploy_same_content_once(self):
+        self.client.deploy('org.example', 'demo', '1.0', path=self.path,
+                           server_groups='group-0')
+        self.client.deploy('org.example', 'demo-copy', '1.0',
+                           path=self.path, server_groups='group-1')
+        self.assertEqual(self.server.stats.operations['add-content'], 1)
@@ -12,3 +12,20 @@ class HostTest(base.BaseTestCase):
     def test_list_hosts_in_group(self):
         hosts = self.client.hosts(server_group=DEFAULT_SERVER_GROUP)
         self.assertIn(socket.gethostbyname(base.WILDFLY_CONTAINER_NAME), hosts)
+
+
+class TopologyTest(base.BaseTestCase):
+
+    def test_topology(self):
+        host = socket.gethostbyname(base.WILDFLY_CONTAINER_NAME)
+        topology = self.client.topology()
+        self.assertIn(host, topology.hosts)
+        self.assertIn(DEFAULT_SERVER_GROUP, topology.groups())
+        server = topology.server(host, '{}-0'.format(host))
+        self.assertEqual(server.group, DEFAULT_SERVER_GROUP)
+        self.assertIn(server, topology.servers_in_group(DEFAULT_SERVER_GROUP))
+        self.assertIs(topology, self.client.topology())
+
+    def test_server_group_host(self):
+        hostnames = self.client.get_server_group_host(DEFAULT_SERVER_GROUP)
+        self.assertTrue(len(hostnames) > 0)
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+from wildfly import LatencyHistogram, ReadCache
+from wildfly.fake import DomainModel, FakeManagementServer
+from wildfly.instrumentation import Event, StepEvent, address_pattern
+
+
+def event(operation='read-resource', address='/', latency=0.01,
+          outcome='success'):
+    return Event(operation, address, 1, latency, 200, outcome, 10, 100, 1,
+                 False, (StepEvent(operation, address, outcome),))
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_address_pattern(self):
+        self.assertEqual(address_pattern([]), '/')
+        self.assertEqual(address_pattern([{'host': 'a'}, {'server': '*'}]),
+                         '/host=*/server=*')
+
+    def test_percentile(self):
+        histogram = LatencyHistogram()
+        for i in range(99):
+            histogram(event(latency=0.001))
+        histogram(event(latency=1.5))
+        self.assertEqual(histogram.percentile(50), 0.001)
+        self.assertEqual(histogram.percentile(100), 1.5)
+        self.assertIsNone(histogram.percentile(50, 'composite'))
+
+    def test_stats(self):
+        histogram = LatencyHistogram()
+        histogram(event())
+        histogram(event(outcome='failed'))
+        histogram(event(operation='composite'))
+        stats = histogram.stats()
+        self.assertEqual(sorted(stats), ['composite /', 'read-resource /'])
+        self.assertEqual(stats['read-resource /']['count'], 2)
+        self.assertEqual(stats['read-resource /']['failed'], 1)
+        self.assertEqual(stats['read-resource /']['bytes_received'], 200)
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeManagementServer(
+            DomainModel(hosts=2, servers=2, deployments=3)).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_scope(self):
+        client = self.server.client()
+        with client.instrument() as scope:
+            client.deployments()
+        client.version()
+        self.assertEqual(len(scope.events), 1)
+        # the first request answers the digest challenge
+        self.assertEqual(scope.requests, 2)
+        self.assertEqual(scope.events[0].operation, 'composite')
+        self.assertEqual(scope.events[0].steps, 3)
+        self.assertTrue(scope.bytes_received > 0)
+
+    def test_composite_breakdown(self):
+        client = self.server.client()
+        with client.instrument() as scope:
+            client.deployments()
+        self.assertEqual(scope.events[0].breakdown, (
+            StepEvent('read-children-resources', '/', 'success'),
+            StepEvent('read-attribute', '/server-group=*/deployment=*',
+                      'success'),
+            StepEvent('read-attribute', '/host=*/server=*/deployment=*',
+                      'success')))
+        with client.instrument() as scope:
+            with client.batch() as batch:
+                batch.read_attribute('name', [{'host': 'host-0'}])
+                batch.read_attribute('name', [{'host': 'missing'}])
+        self.assertEqual(
+            [step.outcome for step in scope.events[0].breakdown],
+            ['success', 'failed'])
+        self.assertEqual(scope.breakdown(), {
+            'read-attribute /host=*': {'count': 2, 'failed': 1}})
+
+    def test_upload(self):
+        fd, path = tempfile.mkstemp(suffix='.war')
+        with os.fdopen(fd, 'wb') as artifact:
+            artifact.write(os.urandom(10000))
+        client = self.server.client()
+        client.version()
+        try:
+            with client.instrument() as scope:
+                client.upload_content(path)
+        finally:
+            os.remove(path)
+        self.assertEqual([e.operation for e in scope.events],
+                         ['add-content'])
+        self.assertEqual(scope.events[0].outcome, 'success')
+        self.assertTrue(scope.bytes_sent > 10000)
+
+    def test_scope_follows_fan_out(self):
+        client = self.server.client(max_workers=4)
+        client.version()
+        with client.instrument() as scope:
+            batch = client.batch(chunk_size=1)
+            for i in range(4):
+                batch.read_attribute('name', [{'host': 'host-0'}])
+            batch.run()
+        client.close()
+        self.assertEqual(len(scope.events), 4)
+        self.assertEqual(sum(e.steps for e in scope.events), 4)
+
+    def test_observer(self):
+        histogram = LatencyHistogram()
+        client = self.server.client(observers=[histogram])
+        client.hosts()
+        client.read_resource([{'host': 'missing'}])
+        stats = histogram.stats()
+        self.assertEqual(stats['read-children-names /']['count'], 1)
+        self.assertEqual(stats['read-resource /host=*']['failed'], 1)
+
+    def test_failing_observer(self):
+        def fail(event):
+            raise RuntimeError('observer failure')
+        client = self.server.client(observers=[fail])
+        self.assertEqual(client.hosts(), ['host-0', 'host-1'])
+
+    def test_cached_reads(self):
+        client = self.server.client(cache=ReadCache())
+        with client.instrument() as scope:
+            client.hosts()
+            client.hosts()
+        self.assertEqual([e.cached for e in scope.events], [False, True])
+        self.assertEqual(scope.requests, 2)
@@ -0,0 +1,166 @@
+import unittest
+from wildfly.fake import DomainModel, FakeManagementServer
+from wildfly.logs import LogFollower, LogLine, LogStream
+
+
+ADDRESS = [{'host': 'host-0'}, {'server': 'host-0-1'},
+           {'subsystem': 'logging'}]
+
+
+class LogFollowerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DomainModel(hosts=1, servers=2)
+        self.server = FakeManagementServer(self.model).start()
+        self.client = self.server.client()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def log(self, count, start=0):
+        return [self.model.log('host-0', 'host-0-1', 'line {}'.format(i))
+                for i in range(start, start + count)]
+
+    def test_read_log_file(self):
+        lines = self.log(5)
+        self.assertEqual(self.client.read_log_file(server='host-0-1',
+                                                   lines=2), lines[-2:])
+        self.assertEqual(self.client.read_log_file(
+            server='host-0-1', lines=2, skip=1, tail=False), lines[:2])
+
+    def test_line_count(self):
+        for count in (0, 1, 2, 5, 33, 1000, 54321):
+            self.model.logs[('host-0', 'host-0-1', 'server.log')] = \
+                ['{}'.format(i) for i in range(count)]
+            for chunk_lines in (1, 10):
+                follower = LogFollower(self.client, ADDRESS,
+                                       chunk_lines=chunk_lines)
+                self.assertEqual(follower.line_count(),
+                                 (count, str(count - 1) if count else None))
+
+    def test_line_count_requests(self):
+        self.model.logs[('host-0', 'host-0-1', 'server.log')] = \
+            ['{}'.format(i) for i in range(10 ** 6)]
+        follower = LogFollower(self.client, ADDRESS)
+        self.client.version()
+        self.server.stats.reset()
+        self.assertEqual(follower.line_count(), (10 ** 6, '999999'))
+        self.assertLessEqual(self.server.stats.requests, 7)
+
+    def test_poll(self):
+        self.log(20)
+        follower = LogFollower(self.client, ADDRESS, lines=3,
+                               chunk_lines=4)
+        self.assertEqual([line[-7:] for line in follower.poll()],
+                         ['line 17', 'line 18', 'line 19'])
+        self.assertEqual(follower.poll(), [])
+        lines = self.log(10, 20)
+        received = self.server.stats.bytes_sent
+        self.assertEqual(follower.poll(), lines)
+        # only the new lines and the last one read before are transferred
+        self.assertLess(self.server.stats.bytes_sent - received,
+                        sum(len(line) + 6 for line in lines[-11:]) + 2000)
+
+    def test_rotation(self):
+        self.log(5)
+        follower = LogFollower(self.client, ADDRESS)
+        follower.poll()
+        self.model.rotate_log('host-0', 'host-0-1')
+        lines = self.log(8, 5)
+        self.assertEqual(follower.poll(), lines)
+        self.assertEqual(follower.rotations, 1)
+        # a rotated file that is still empty reads as no new lines
+        self.model.rotate_log('host-0', 'host-0-1')
+        self.assertEqual(follower.poll(), [])
+        lines = self.log(2, 13)
+        self.assertEqual(follower.poll(), lines)
+
+    def test_follow(self):
+        self.log(3)
+        lines = list(self.client.follow_log_file(server='host-0-1', lines=2,
+                                                 interval=0, timeout=0))
+        self.assertEqual([line[-6:] for line in lines], ['line 1', 'line 2'])
+
+    def test_missing_file(self):
+        follower = LogFollower(self.client, ADDRESS, name='missing.log')
+        self.assertRaises(RuntimeError, follower.poll)
+
+
+class LogStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DomainModel(hosts=2, servers=2, groups=2)
+        self.server = FakeManagementServer(self.model).start()
+        self.client = self.server.client()
+        # interleave the servers' lines on the model clock
+        for i in range(10):
+            for host, server in self.servers():
+                level = 'ERROR' if i % 5 == 4 else 'INFO'
+                self.model.log(host, server, 'message {}'.format(i), level)
+        self.model.log('host-1', 'host-1-0', 'failure', 'ERROR')
+        self.model.logs[('host-1', 'host-1-0', 'server.log')].append(
+            '\tat org.example.Failing.run(Failing.java:1)')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    @staticmethod
+    def servers():
+        return [('host-0', 'host-0-0'), ('host-0', 'host-0-1'),
+                ('host-1', 'host-1-0'), ('host-1', 'host-1-1')]
+
+    def test_merged_in_timestamp_order(self):
+        lines = list(LogStream(self.client, self.servers(), lines=-1,
+                               page_lines=3))
+        self.assertEqual(len(lines), 4 * 11 + 2)
+        self.assertEqual(lines, sorted(lines))
+        self.assertEqual([line.timestamp for line in lines],
+                         sorted(line.timestamp for line in lines))
+
+    def test_last_lines(self):
+        for page_lines in (2, 100):
+            lines = list(LogStream(self.client, self.servers(), lines=3,
+                                   page_lines=page_lines))
+            self.assertEqual(len(lines), 4 * 3)
+            self.assertEqual(lines[-1].line,
+                             '\tat org.example.Failing.run(Failing.java:1)')
+
+    def test_filters(self):
+        errors = list(LogStream(self.client, self.servers(), lines=-1,
+                                level='warn'))
+        self.assertEqual(set(line.level for line in errors), set(['ERROR']))
+        self.assertEqual(len(errors), 4 * 2 + 2)
+        # the continuation lines of a record share its timestamp
+        self.assertEqual(errors[-1].timestamp, errors[-2].timestamp)
+        matches = list(LogStream(self.client, self.servers(), lines=-1,
+                                 pattern='Failing'))
+        self.assertEqual([line.line.split()[-1] for line in matches],
+                         ['failure',
+                          'org.example.Failing.run(Failing.java:1)'])
+        self.assertRaises(ValueError, LogStream, self.client, [],
+                          level='LOUD')
+
+    def test_read_logs(self):
+        self.client.stop_servers('group-1', blocking=True)
+        lines = list(self.client.read_logs(level='ERROR'))
+        self.assertEqual(set((line.host, line.server) for line in lines),
+                         set([('host-0', 'host-0-0'),
+                              ('host-1', 'host-1-0')]))
+        lines = list(self.client.read_logs(host='host-1', lines=1))
+        self.assertEqual(len(lines), 1)
+        self.assertIsInstance(lines[0], LogLine)
+
+    def test_read_logs_reload_required(self):
+        server = self.model.root.children['host']['host-1'].children[
+            'server']['host-1-0']
+        server.attributes['server-state'] = 'reload-required'
+        lines = list(self.client.read_logs(host='host-1', level='ERROR'))
+        self.assertEqual(set((line.host, line.server) for line in lines),
+                         set([('host-1', 'host-1-0'),
+                              ('host-1', 'host-1-1')]))
+
+
+if __name__ == '__main__':
+    unittest.main()
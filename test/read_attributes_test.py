@@ -0,0 +1,57 @@
+import unittest
+from wildfly.fake import DomainModel, FakeManagementServer
+
+
+class ReadAttributesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DomainModel(hosts=10, servers=50)
+        self.server = FakeManagementServer(self.model).start()
+        self.client = self.server.client(max_workers=4)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def items(self):
+        return [([{'host': 'host-{}'.format(h)},
+                  {'server': 'host-{}-{}'.format(h, s)}], 'server-state')
+                for h in range(10) for s in range(50)]
+
+    def test_aligned_results(self):
+        items = self.items()
+        items.insert(3, ([{'host': 'host-0'}, {'server': 'missing'}],
+                         'server-state'))
+        items.insert(7, ([{'host': 'host-0'}], 'no-such-attribute'))
+        steps = self.client.read_attributes(items)
+        self.assertEqual(len(steps), 502)
+        self.assertEqual([step.result() for step in steps],
+                         ['running'] * 3 + [None] + ['running'] * 3 +
+                         [None] + ['running'] * 494)
+        self.assertIn('not found',
+                      str(steps[3].failure_description))
+        self.assertEqual(steps[1].request['address'],
+                         [{'host': 'host-0'}, {'server': 'host-0-1'}])
+        # 500 servers in composites of 100 steps
+        self.assertEqual(self.server.stats.operations['composite'], 6)
+
+    def test_cancelled_steps_are_retried(self):
+        self.model.cancel_after_failure = True
+        items = self.items()[:150]
+        items.insert(1, ([{'host': 'host-0'}], 'no-such-attribute'))
+        steps = self.client.read_attributes(items)
+        self.assertFalse(steps[1].is_success())
+        self.assertFalse(steps[1].cancelled())
+        self.assertEqual(
+            [step.result() for step in steps[:1] + steps[2:]],
+            ['running'] * 150)
+        # the chunk holding the failure is read again without it
+        self.assertEqual(self.server.stats.operations['composite'], 3)
+
+        steps = self.client.read_attributes(items, retries=0)
+        self.assertTrue(steps[2].cancelled())
+        self.assertIsNone(steps[2].result())
+
+
+if __name__ == '__main__':
+    unittest.main()
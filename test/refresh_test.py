@@ -0,0 +1,107 @@
+import unittest
+from wildfly.fake import DomainModel, FakeManagementServer
+from wildfly.refresh import default_watches
+from wildfly.snapshot import Snapshot
+
+
+class DiffTest(unittest.TestCase):
+
+    def test_diff(self):
+        old = Snapshot({'name': 'a', 'host': {'one': {'state': 'up'},
+                                              'two': {'state': 'up'}}})
+        new = Snapshot({'name': 'a', 'host': {'one': {'state': 'down'},
+                                              'three': {'state': 'up'}}})
+        diff = old.diff(new)
+        self.assertEqual(diff.added, [(('host', 'three'),)])
+        self.assertEqual(diff.removed, [(('host', 'two'),)])
+        self.assertEqual(diff.changed,
+                         {(('host', 'one'),): {'state': ('up', 'down')}})
+        self.assertEqual(diff.paths(), [('changed', '/host=one'),
+                                        ('added', '/host=three'),
+                                        ('removed', '/host=two')])
+        self.assertFalse(new.diff(new))
+
+
+class DefaultWatchesTest(unittest.TestCase):
+
+    def test_host(self):
+        self.assertEqual(default_watches([{'host': 'master'}]), [
+            [{'host': 'master'}],
+            [{'host': 'master'}, {'server-config': '*'}],
+            [{'host': 'master'}, {'server': '*'}],
+            ([{'host': 'master'}, {'server': '*'}, {'deployment': '*'}],
+             'status')])
+
+    def test_unwatched(self):
+        address = [{'profile': 'full'}, {'subsystem': 'logging'}]
+        self.assertEqual(default_watches(address), [address])
+
+
+class RefresherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeManagementServer(
+            DomainModel(hosts=2, servers=2, deployments=3, groups=2)).start()
+        self.client = self.server.client()
+        self.refresher = self.client.refresher()
+        self.initial = self.refresher.refresh()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def assertFresh(self):
+        """ The refreshed snapshot matches a full read. """
+        self.assertEqual(
+            self.refresher.snapshot.read_resource(recursive=True),
+            self.client.snapshot().read_resource(recursive=True))
+
+    def test_initial(self):
+        self.assertEqual(len(self.initial.added),
+                         len(self.refresher.snapshot))
+        self.assertFalse(self.initial.removed)
+
+    def test_unchanged(self):
+        self.server.stats.reset()
+        diff = self.refresher.refresh()
+        self.assertFalse(diff)
+        self.assertEqual(self.server.stats.requests, 1)
+        self.assertEqual(self.server.stats.operations, {'composite': 1})
+
+    def test_stopped_servers(self):
+        self.client.stop_servers('group-1', blocking=True)
+        diff = self.refresher.refresh()
+        self.assertEqual(
+            diff.changed[(('host', 'host-0'), ('server', 'host-0-1'))][
+                'server-state'], ('running', 'STOPPED'))
+        self.assertTrue((('host', 'host-0'), ('server', 'host-0-1'),
+                         ('deployment', 'app-1.war')) in diff.removed)
+        self.assertFalse(diff.added)
+        self.assertFresh()
+
+    def test_started_servers(self):
+        self.client.stop_servers('group-1', blocking=True)
+        self.refresher.refresh()
+        self.client.start_servers('group-1', blocking=True)
+        diff = self.refresher.refresh()
+        self.assertTrue((('host', 'host-1'), ('server', 'host-1-1'),
+                         ('core-service', 'platform-mbean'),
+                         ('type', 'runtime')) in diff.added)
+        self.assertFresh()
+
+    def test_marked(self):
+        address = [{'host': 'host-0'}, {'server': 'host-0-0'},
+                   {'core-service': 'platform-mbean'}, {'type': 'runtime'}]
+        self.server.model.execute({'operation': 'write-attribute',
+                                   'address': address,
+                                   'name': 'uptime', 'value': 2000})
+        self.assertFalse(self.refresher.refresh())
+        self.refresher.mark(address[:2])
+        diff = self.refresher.refresh()
+        self.assertEqual(list(diff.changed), [tuple(
+            (k, v) for element in address for k, v in element.items())])
+        self.assertFresh()
+
+    def test_full(self):
+        self.client.disable('app-0.war', 'group-0')
+        self.assertTrue(self.refresher.refresh(full=True))
+        self.assertFresh()
@@ -0,0 +1,70 @@
+import copy
+import json
+import unittest
+import requests
+from wildfly import ManagementResponse, ReadCache
+from wildfly.codec import JsonCodec
+from wildfly.fake import DomainModel, FakeManagementServer
+
+
+def http_response(body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode('utf-8')
+    return response
+
+
+class CountingCodec(JsonCodec):
+
+    decoded = 0
+
+    def loads(self, data):
+        self.decoded += 1
+        return super(CountingCodec, self).loads(data)
+
+
+class ManagementResponseTest(unittest.TestCase):
+
+    def test_accessors(self):
+        response = ManagementResponse(http_response(
+            {'outcome': 'success', 'result': {'name': 'a'}}))
+        self.assertTrue(response.is_success())
+        self.assertEqual(response.result, {'name': 'a'})
+        self.assertIsNone(response.failure)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response)
+
+    def test_failure(self):
+        response = ManagementResponse(http_response(
+            {'outcome': 'failed', 'failure-description': 'WFLYCTL0216'},
+            500))
+        self.assertFalse(response.is_success())
+        self.assertEqual(response.failure, 'WFLYCTL0216')
+        self.assertIsNone(response.result)
+        self.assertFalse(response)
+
+    def test_decodes_once(self):
+        codec = CountingCodec()
+        response = ManagementResponse(
+            http_response({'outcome': 'success', 'result': 1}), codec)
+        response.json()
+        response.outcome
+        response.result
+        self.assertEqual(codec.decoded, 1)
+        self.assertTrue(response.json() is response.json())
+
+    def test_copy(self):
+        response = ManagementResponse(http_response({'outcome': 'success'}))
+        self.assertEqual(copy.copy(response).outcome, 'success')
+
+
+class CachedResponseTest(unittest.TestCase):
+
+    def test_cached_result_is_not_shared(self):
+        with FakeManagementServer(DomainModel(deployments=2)) as server:
+            client = server.client(cache=ReadCache())
+            deployments = client.deployments()
+            deployments['app-0.war']['status'] = 'changed'
+            self.assertEqual(client.deployments()['app-0.war']['status'],
+                             'RUNNING')
+            self.assertEqual(client.cache.hits, 1)
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from wildfly.fake import DomainModel, FakeManagementServer
+from wildfly.rollout import rollout_plan
+
+GROUPS = ['group-0', 'group-1', 'group-2', 'group-3']
+
+
+class RolloutPlanTest(unittest.TestCase):
+
+    def test_plan(self):
+        self.assertEqual(rollout_plan(['A']), {'rollout-plan': {
+            'in-series': [{'server-group': {
+                'A': {'max-failed-servers': 0}}}],
+            'rollback-across-groups': True}})
+        plan = rollout_plan(['A', 'B'], 1)['rollout-plan']
+        self.assertEqual(plan['in-series'], [{'concurrent-groups': {
+            'A': {'max-failed-servers': 1},
+            'B': {'max-failed-servers': 1}}}])
+
+
+class RolloutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DomainModel(hosts=2, servers=4, deployments=0,
+                                 groups=4)
+        self.server = FakeManagementServer(self.model).start()
+        self.client = self.server.client()
+        self.paths = []
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        for path in self.paths:
+            os.remove(path)
+
+    def artifact(self):
+        fd, path = tempfile.mkstemp(suffix='.war')
+        with os.fdopen(fd, 'wb') as artifact:
+            artifact.write(os.urandom(1000))
+        self.paths.append(path)
+        return path
+
+    def enabled(self):
+        """ Returns the enabled deployments by server group. """
+        groups = dict((group, []) for group in GROUPS)
+        for group, deployment in sorted(
+                (address[0]['server-group'], address[1]['deployment'])
+                for address, enabled in self.enabled_items() if enabled):
+            groups[group].append(deployment)
+        return groups
+
+    def enabled_items(self):
+        result = self.client.execute(
+            'read-attribute', {'name': 'enabled'},
+            [{'server-group': '*'}, {'deployment': '*'}]).json()['result']
+        return [(item['address'], item['result']) for item in result]
+
+    def test_waves(self):
+        rollout = self.client.rollout('org.example', 'app', '1.0', GROUPS,
+                                      path=self.artifact(), wave_size=3)
+        self.assertIsNone(rollout.failed)
+        self.assertEqual(rollout.waves, [GROUPS[:3], GROUPS[3:]])
+        self.assertEqual(rollout.deployed, GROUPS)
+        self.assertEqual(self.enabled(),
+                         dict((group, ['app.war']) for group in GROUPS))
+        self.assertEqual(self.server.stats.operations['add-content'], 1)
+        # one composite deploying every wave and one health checking it
+        self.assertEqual(self.server.stats.operations['composite'], 2 * 2)
+        deployment = self.client.deployments()['app.war']
+        self.assertEqual(deployment['status'], 'RUNNING')
+
+    def test_single_server_group(self):
+        rollout = self.client.rollout('org.example', 'app', '1.0',
+                                      u'group-0', path=self.artifact())
+        self.assertIsNone(rollout.failed)
+        self.assertEqual(rollout.waves, [[u'group-0']])
+        self.assertEqual(self.enabled()['group-0'], ['app.war'])
+
+    def test_replaces_previous_version(self):
+        self.client.rollout('org.example', 'app', '1.0', GROUPS,
+                            path=self.artifact(), wave_size=2)
+        rollout = self.client.rollout('org.example', 'app', '2.0',
+                                      GROUPS[:2], path=self.artifact())
+        self.assertIsNone(rollout.failed)
+        self.assertEqual(rollout.name, 'app-2.0.war')
+        self.assertEqual(rollout.replaces, ['app.war'])
+        self.assertEqual(self.enabled(), {'group-0': ['app-2.0.war'],
+                                          'group-1': ['app-2.0.war'],
+                                          'group-2': ['app.war'],
+                                          'group-3': ['app.war']})
+        servers = self.model.root.children['host']['host-0'].children[
+            'server']
+        self.assertEqual(sorted(servers['host-0-0'].children['deployment']),
+                         ['app-2.0.war'])
+
+    def test_rollout_plan_failure(self):
+        self.model.failing.add('app.war')
+        rollout = self.client.rollout('org.example', 'app', '1.0', GROUPS,
+                                      path=self.artifact(), wave_size=2)
+        self.assertIn('Wave 1', rollout.failed)
+        self.assertTrue(rollout.rolled_back)
+        self.assertEqual(rollout.deployed, [])
+        self.assertEqual(self.enabled(),
+                         dict((group, []) for group in GROUPS))
+        # the content added by the rollout is removed as well
+        self.assertNotIn('app.war', self.client.deployments())
+
+    def test_health_gate_rolls_back_earlier_waves(self):
+        self.client.rollout('org.example', 'app', '1.0', GROUPS,
+                            path=self.artifact(), wave_size=4)
+        checked = []
+
+        def health_check(client, name, server_groups):
+            checked.append(server_groups)
+            return 'group-2' not in server_groups
+
+        rollout = self.client.rollout('org.example', 'app', '2.0', GROUPS,
+                                      path=self.artifact(), wave_size=2,
+                                      health_check=health_check)
+        self.assertEqual(checked, [GROUPS[:2], GROUPS[2:]])
+        self.assertIn('Wave 2', rollout.failed)
+        self.assertTrue(rollout.rolled_back)
+        self.assertEqual(self.enabled(),
+                         dict((group, ['app.war']) for group in GROUPS))
+        self.assertNotIn('app-2.0.war', self.client.deployments())
+
+    def test_tolerated_failures(self):
+        self.model.failing.add('app.war')
+        rollout = self.client.rollout(
+            'org.example', 'app', '1.0', ['group-0'],
+            path=self.artifact(), max_failed_servers=2,
+            health_check=lambda client, name, server_groups: True)
+        self.assertIsNone(rollout.failed)
+        self.assertEqual(self.enabled()['group-0'], ['app.war'])
+
+
+if __name__ == '__main__':
+    unittest.main()
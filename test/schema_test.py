@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from wildfly import SchemaCache
+from wildfly.fake import DomainModel, FakeManagementServer
+
+SERVER = [{'host': 'host-0'}, {'server': 'host-0-0'}]
+LOGGING = SERVER + [{'subsystem': 'logging'}]
+
+
+class SchemaCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = FakeManagementServer(
+            DomainModel(hosts=2, servers=2)).start()
+        self.client = self.server.client()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def cached_client(self):
+        return self.server.client(schema_cache=SchemaCache(self.directory))
+
+    def test_key(self):
+        cache = SchemaCache(self.directory)
+        self.assertEqual(cache.key(LOGGING),
+                         '/host=*/server=*/subsystem=logging')
+        self.assertEqual(cache.key([]), '/')
+
+    def test_reads_without_cache(self):
+        self.assertEqual(self.client.read_children_types(SERVER),
+                         ['core-service', 'deployment', 'subsystem'])
+        self.assertIn('read-log-file',
+                      self.client.read_operation_names(LOGGING))
+
+    def test_same_results(self):
+        client = self.cached_client()
+        self.assertEqual(client.read_children_types(SERVER),
+                         self.client.read_children_types(SERVER))
+        self.assertEqual(client.read_operation_names(LOGGING),
+                         self.client.read_operation_names(LOGGING))
+        self.assertEqual(
+            client.read_operation_description('read-log-file', LOGGING),
+            self.client.read_operation_description('read-log-file',
+                                                   LOGGING))
+        self.assertIsNone(client.read_operation_description('missing'))
+        client.close()
+
+    def test_no_requests_once_cached(self):
+        client = self.cached_client()
+        client.read_operation_names(LOGGING)
+        # the digest challenge, release-version and the description
+        self.assertEqual(self.server.stats.requests, 3)
+        client.read_children_types(LOGGING)
+        client.read_operation_description('read-log-file',
+                                          [{'host': 'host-1'},
+                                           {'server': 'host-1-1'},
+                                           {'subsystem': 'logging'}])
+        self.assertEqual(self.server.stats.requests, 3)
+        client.close()
+
+        # another client loads the descriptions from disk
+        self.server.stats.reset()
+        client = self.cached_client()
+        self.assertIn('read-log-file', client.read_operation_names(LOGGING))
+        self.assertEqual(self.server.stats.operations,
+                         {'read-attribute': 1})
+        self.assertEqual(client.schema_cache.hits, 1)
+        client.close()
+
+    def test_keyed_by_release_version(self):
+        client = self.cached_client()
+        client.read_children_types(SERVER)
+        versions = os.listdir(self.directory)
+        self.assertEqual(versions, ['8.2.0.Final'])
+        self.server.model.root.attributes['release-version'] = '10.1.0.Final'
+        client.close()
+        client = self.cached_client()
+        client.read_children_types(SERVER)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['10.1.0.Final', '8.2.0.Final'])
+        client.close()
+
+    def test_unknown_release_version(self):
+        del self.server.model.root.attributes['release-version']
+        client = self.cached_client()
+        self.assertEqual(client.read_children_types(SERVER),
+                         ['core-service', 'deployment', 'subsystem'])
+        self.assertIn('read-log-file', client.read_operation_names(LOGGING))
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual((client.schema_cache.hits,
+                          client.schema_cache.misses), (0, 0))
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from wildfly import Snapshot
+from wildfly.fake import DomainModel, FakeManagementServer
+
+
+RESULT = {
+    'name': 'domain',
+    'release-version': '8.2.0.Final',
+    'properties': {'a': 'b'},
+    'deployment': {
+        'app.war': {'name': 'app.war',
+                    'content': [{'hash': {'BYTES_VALUE': 'abc='}}]}},
+    'host': {
+        'master': {
+            'name': 'master',
+            'server': {
+                'one': {'server-state': 'running',
+                        'core-service': {'platform-mbean': None}},
+                'two': {'server-state': 'STOPPED'}}},
+        'slave': {
+            'name': 'slave',
+            'server': {'three': {'server-state': 'running'}}}}}
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = Snapshot(RESULT)
+
+    def test_index(self):
+        self.assertEqual(len(self.snapshot), 7)
+        node = self.snapshot.node([{'host': 'master'}, {'server': 'one'}])
+        self.assertEqual(node.path, '/host=master/server=one')
+        self.assertEqual(node.attribute('server-state'), 'running')
+        self.assertTrue((('host', 'slave'),) in self.snapshot)
+        self.assertIsNone(self.snapshot.node([{'host': 'missing'}]))
+
+    def test_attributes_and_children(self):
+        root = self.snapshot.node([])
+        self.assertEqual(root.attribute('properties'), {'a': 'b'})
+        self.assertEqual(root.child_types(), ['deployment', 'host'])
+        self.assertEqual(
+            self.snapshot.read_attribute('content',
+                                         [{'deployment': 'app.war'}]),
+            [{'hash': {'BYTES_VALUE': 'abc='}}])
+
+    def test_immutable(self):
+        address = [{'deployment': 'app.war'}]
+        self.snapshot.read_attribute('content', address).append(None)
+        self.assertEqual(
+            len(self.snapshot.read_attribute('content', address)), 1)
+
+    def test_find(self):
+        nodes = self.snapshot.find([{'host': '*'}, {'server': '*'}])
+        self.assertEqual([node.path for node in nodes],
+                         ['/host=master/server=one',
+                          '/host=master/server=two',
+                          '/host=slave/server=three'])
+        self.assertEqual(
+            len(self.snapshot.find([{'host': 'slave'}, {'server': '*'}])), 1)
+
+    def test_wildcard_read(self):
+        result = self.snapshot.read_attribute(
+            'server-state', [{'host': '*'}, {'server': '*'}])
+        self.assertEqual(result[2], {
+            'address': [{'host': 'slave'}, {'server': 'three'}],
+            'outcome': 'success',
+            'result': 'running'})
+
+    def test_read_children(self):
+        self.assertEqual(self.snapshot.read_children_names('host'),
+                         ['master', 'slave'])
+        self.assertEqual(
+            self.snapshot.read_children_types([{'host': 'master'}]),
+            ['server'])
+        self.assertEqual(
+            self.snapshot.read_children_resources('server',
+                                                  [{'host': 'slave'}]),
+            {'three': {'server-state': 'running'}})
+        self.assertIsNone(self.snapshot.read_children_names(
+            'server', [{'host': 'missing'}]))
+
+    def test_read_resource(self):
+        self.assertEqual(self.snapshot.read_resource(recursive=True), RESULT)
+        self.assertEqual(
+            self.snapshot.read_resource([{'host': 'slave'}]),
+            {'name': 'slave', 'server': {'three': None}})
+
+
+class ClientSnapshotTest(unittest.TestCase):
+
+    def test_snapshot(self):
+        with FakeManagementServer(DomainModel(hosts=2, servers=2)) as server:
+            client = server.client()
+            snapshot = client.snapshot()
+            self.assertEqual(server.stats.operations['read-resource'], 1)
+            self.assertEqual(
+                snapshot.read_children_names('host'),
+                client.read_children_names('host'))
+            self.assertEqual(
+                snapshot.read_attribute(
+                    'uptime', [{'host': 'host-1'}, {'server': 'host-1-0'},
+                               {'core-service': 'platform-mbean'},
+                               {'type': 'runtime'}]),
+                1000)
+            host = client.snapshot([{'host': 'host-0'}])
+            self.assertEqual(host.address, (('host', 'host-0'),))
+            self.assertEqual(len(host.find([{'host': 'host-0'},
+                                            {'server': '*'}])), 2)
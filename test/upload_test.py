@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from wildfly.upload import ChunkedBody, MultipartFile
+
+
+class MultipartFileTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.war')
+        self.content = os.urandom(100000)
+        with os.fdopen(fd, 'wb') as artifact:
+            artifact.write(self.content)
+        self.artifact = open(self.path, 'rb')
+
+    def tearDown(self):
+        self.artifact.close()
+        os.remove(self.path)
+
+    def test_body(self):
+        body = MultipartFile(self.artifact, self.path, blocksize=4096)
+        data = b''.join(body)
+        self.assertEqual(len(data), len(body))
+        boundary = body.content_type.split('boundary=')[1].encode('ascii')
+        self.assertTrue(data.startswith(b'--' + boundary + b'\r\n'))
+        self.assertTrue(data.endswith(b'\r\n--' + boundary + b'--\r\n'))
+        self.assertIn(self.content, data)
+        self.assertIn(
+            'filename="{}"'.format(os.path.basename(self.path)).encode(
+                'utf-8'), data)
+
+    def test_blocksize(self):
+        body = MultipartFile(self.artifact, self.path, blocksize=1000)
+        for block in body:
+            self.assertTrue(0 < len(block) <= 1000)
+
+    def test_read_all(self):
+        body = MultipartFile(self.artifact, self.path, blocksize=4096)
+        data = body.read()
+        self.assertEqual(len(data), len(body))
+        self.assertIn(self.content, data)
+        self.assertEqual(body.read(), b'')
+        body.seek(0)
+        self.assertEqual(body.read(None), data)
+
+    def test_rewind(self):
+        body = MultipartFile(self.artifact, self.path, blocksize=4096)
+        first = body.read(-1) + b''.join(body)
+        self.assertEqual(body.tell(), len(body))
+        body.seek(0)
+        self.assertEqual(b''.join(body), first)
+
+    def test_chunked_rewind(self):
+        body = ChunkedBody(MultipartFile(self.artifact, self.path,
+                                         blocksize=4096))
+        self.assertFalse(hasattr(body, '__len__'))
+        first = b''.join(body)
+        self.assertEqual(body.seek(0), 0)
+        self.assertEqual(b''.join(body), first)
+        self.assertRaises(IOError, body.seek, 0, os.SEEK_END)
+
+    def test_progress(self):
+        progress = []
+        body = MultipartFile(self.artifact, self.path, blocksize=8192,
+                             callback=lambda sent, total: progress.append(
+                                 (sent, total)))
+        b''.join(body)
+        self.assertEqual(progress[-1], (len(body), len(body)))
+        sent = [p[0] for p in progress]
+        self.assertEqual(sent, sorted(sent))
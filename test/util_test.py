@@ -0,0 +1,58 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+from wildfly import util
+
+
+class ContentHashTest(unittest.TestCase):
+
+    def test_content_hash(self):
+        fd, path = tempfile.mkstemp()
+        content = os.urandom(200000)
+        with os.fdopen(fd, 'wb') as artifact:
+            artifact.write(content)
+        try:
+            expected = base64.b64encode(
+                hashlib.sha1(content).digest()).decode('ascii')
+            self.assertEqual(util.content_hash(path, blocksize=4096),
+                             expected)
+        finally:
+            os.remove(path)
+
+    def test_hex_to_bytes_value(self):
+        digest = hashlib.sha1(b'content')
+        self.assertEqual(
+            util.hex_to_bytes_value(digest.hexdigest()),
+            base64.b64encode(digest.digest()).decode('ascii'))
+        with self.assertRaises(ValueError):
+            util.hex_to_bytes_value('abc')
+
+
+class WildcardResultsTest(unittest.TestCase):
+
+    def test_wildcard_results(self):
+        result = [
+            {'address': [{'host': 'master'}, {'server': 'one'}],
+             'outcome': 'success', 'result': 'running'},
+            {'address': [{'host': 'master'}, {'server': 'two'}],
+             'outcome': 'failed', 'failure-description': 'not running'}]
+        self.assertEqual(list(util.wildcard_results(result)),
+                         [({'host': 'master', 'server': 'one'}, 'running')])
+        self.assertEqual(list(util.wildcard_results(None)), [])
+
+
+class AddressTest(unittest.TestCase):
+
+    def test_address_startswith(self):
+        server = util.address_tuple([{'host': 'master'}, {'server': 'one'}])
+        self.assertTrue(util.address_startswith(
+            server, util.address_tuple([{'host': 'master'}])))
+        self.assertTrue(util.address_startswith(
+            server, util.address_tuple([{'host': '*'}, {'server': 'one'}])))
+        self.assertTrue(util.address_startswith(server, ()))
+        self.assertFalse(util.address_startswith(
+            server, util.address_tuple([{'host': 'slave'}])))
+        self.assertFalse(util.address_startswith(
+            util.address_tuple([{'host': 'master'}]), server))
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+from wildfly.fake import DomainModel, FakeManagementServer
+from wildfly.watch import (DeploymentEnabledChanged, DeploymentStatusChanged,
+                           ServerStateChanged, watch_specs)
+
+
+class WatchSpecsTest(unittest.TestCase):
+
+    def test_narrowest(self):
+        self.assertEqual(
+            watch_specs(deployments=False, host='master'),
+            [('server-state', (('host', 'master'), ('server', '*')))])
+        self.assertEqual(
+            watch_specs(servers=False, deployment='app.war'),
+            [('enabled', (('server-group', '*'),
+                          ('deployment', 'app.war'))),
+             ('status', (('host', '*'), ('server', '*'),
+                         ('deployment', 'app.war')))])
+
+
+class WatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeManagementServer(
+            DomainModel(hosts=2, servers=2, deployments=2, groups=2)).start()
+        self.client = self.server.client()
+        self.client.poller.min_interval = 0.05
+        self.client.poller.max_interval = 0.2
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def wait_for_poll(self):
+        polls = self.client.poller.polls
+        while self.client.poller.polls == polls:
+            time.sleep(0.01)
+
+    def test_server_state(self):
+        watch = self.client.watch(deployments=False, timeout=5)
+        self.wait_for_poll()
+        self.client.stop_servers('group-1', blocking=True)
+        events = sorted([next(watch), next(watch)])
+        watch.close()
+        self.assertEqual(events, [
+            ServerStateChanged('host-0', 'host-0-1', 'running', 'STOPPED'),
+            ServerStateChanged('host-1', 'host-1-1', 'running', 'STOPPED')])
+
+    def test_server_group(self):
+        watch = self.client.watch(server_group='group-0', timeout=1)
+        self.wait_for_poll()
+        self.client.stop_servers('group-1', blocking=True)
+        self.assertEqual(list(watch), [])
+
+    def test_deployments(self):
+        with self.client.watch(servers=False,
+                               deployment='app-0.war', timeout=5) as watch:
+            self.wait_for_poll()
+            self.client.disable('app-0.war', 'group-0')
+            events = set(next(watch) for i in range(3))
+        self.assertEqual(events, set([
+            DeploymentEnabledChanged('group-0', 'app-0.war', True, False),
+            DeploymentStatusChanged('host-0', 'host-0-0', 'app-0.war',
+                                    'OK', None),
+            DeploymentStatusChanged('host-1', 'host-1-0', 'app-0.war',
+                                    'OK', None)]))
+
+    def test_coalesce(self):
+        watch = self.client.watch(deployments=False, host='host-0',
+                                  server='host-0-0', timeout=5)
+        self.wait_for_poll()
+        self.client.stop_servers('group-0', blocking=True)
+        self.wait_for_poll()
+        self.client.start_servers('group-0', blocking=True)
+        self.wait_for_poll()
+        self.client.stop_servers('group-0', blocking=True)
+        # the three unconsumed changes collapse into one
+        self.assertEqual(next(watch), ServerStateChanged(
+            'host-0', 'host-0-0', 'running', 'STOPPED'))
+        watch.close()
+
+    def test_shared_poller(self):
+        watches = [self.client.watch(timeout=5) for i in range(20)]
+        self.wait_for_poll()
+        self.server.stats.reset()
+        self.wait_for_poll()
+        self.assertEqual(self.server.stats.operations, {'composite': 1})
+        received = []
+
+        def consume(watch):
+            received.append(next(watch))
+            watch.close()
+        threads = [threading.Thread(target=consume, args=(watch,))
+                   for watch in watches]
+        for thread in threads:
+            thread.start()
+        self.client.stop_servers('group-0', blocking=True)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(received), 20)
+
+    def test_backoff(self):
+        watch = self.client.watch(timeout=0.5)
+        self.assertEqual(list(watch), [])
+        self.assertEqual(self.client.poller.interval,
+                         self.client.poller.max_interval)
@@ -1,5 +1,13 @@
 import logging
 from .client import Client  # flake8: noqa
+from .async_client import AsyncClient  # flake8: noqa
+from .cache import ReadCache  # flake8: noqa
+from .artifacts import ArtifactCache  # flake8: noqa
+from .instrumentation import LatencyHistogram  # flake8: noqa
+from .response import ManagementResponse  # flake8: noqa
+from .snapshot import Snapshot  # flake8: noqa
+from .schema import SchemaCache  # flake8: noqa
+from .address import Address  # flake8: noqa
 
 # setup log stream handler
 ch = logging.StreamHandler()
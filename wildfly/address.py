@@ -0,0 +1,159 @@
+import re
+import threading
+from collections import OrderedDict
+
+from . import util
+
+
+# one element of a CLI path: /type=name, the name possibly quoted
+_ELEMENT = re.compile(r'/([^/=\s"]+)=(?:"([^"]*)"|([^/"]+))')
+
+# number of addresses kept interned
+DEFAULT_INTERNED = 4096
+
+
+class Address(tuple):
+    """
+    Management address as an immutable tuple of (type, name) pairs, which
+    can be parsed from a CLI path:
+
+        address = Address.parse('/host=master/server=server-one')
+        address.child('subsystem', 'logging').path
+        # '/host=master/server=server-one/subsystem=logging'
+        client.read_attribute('server-state', address)
+
+    Addresses are interned: building the same address twice returns the
+    same instance, whose path and pattern are computed once and cached.
+    The intern table holds the `interned` most recently used addresses;
+    the least recently used are dropped from it, so addresses of churning
+    resources (deployments, servers, ...) are not kept forever while the
+    addresses in constant use stay interned. An Address equals,
+    and hashes like, the tuple of its pairs (see util.address_tuple), so
+    addresses and such tuples are the same dict keys, interned or not. A
+    name of '*' is a wildcard.
+
+    Every management call of the client accepts an Address or a CLI path
+    wherever it takes an address list.
+    """
+
+    interned = DEFAULT_INTERNED
+    _interned = OrderedDict()
+    _lock = threading.Lock()
+
+    def __new__(cls, pairs=()):
+        pairs = tuple(pairs)
+        with cls._lock:
+            # moved to the most recently used end
+            address = cls._interned.pop(pairs, None)
+            if address is None:
+                address = tuple.__new__(cls, pairs)
+            cls._interned[pairs] = address
+            while len(cls._interned) > cls.interned:
+                cls._interned.popitem(last=False)
+        return address
+
+    def __reduce__(self):
+        # unpickled addresses are interned too
+        return Address, (tuple(self),)
+
+    @classmethod
+    def parse(cls, path):
+        """ Returns the Address of a CLI path such as
+        /host=master/server="server one". """
+
+        path = path.strip().rstrip('/')
+        if not path:
+            return cls()
+        if not path.startswith('/'):
+            path = '/' + path
+        pairs = []
+        position = 0
+        while position < len(path):
+            match = _ELEMENT.match(path, position)
+            if match is None:
+                raise ValueError('Invalid address {!r} at {}'.format(
+                    path, position))
+            child_type, quoted, name = match.groups()
+            pairs.append((child_type,
+                          quoted if quoted is not None else name.strip()))
+            position = match.end()
+        return cls(pairs)
+
+    @classmethod
+    def of(cls, address):
+        """ Returns address, given as an Address, a CLI path, a tuple of
+        (type, name) pairs or a list of {type: name} dicts, as an
+        Address. """
+
+        if isinstance(address, cls):
+            return address
+        if isinstance(address, tuple):
+            return cls(address)
+        if isinstance(address, list):
+            return cls(util.address_tuple(address))
+        return cls.parse(address)
+
+    def to_list(self):
+        """ Returns the address as a new list of {type: name} dicts. """
+        return [{child_type: name} for child_type, name in self]
+
+    @property
+    def path(self):
+        """ The CLI path of the address. """
+        try:
+            return self._path
+        except AttributeError:
+            self._path = '/' + '/'.join(
+                '{}={}'.format(child_type, '"{}"'.format(name)
+                               if '/' in name else name)
+                for child_type, name in self)
+            return self._path
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return 'Address({!r})'.format(self.path)
+
+    @property
+    def parent(self):
+        """ The address of the parent resource; the root is its own
+        parent. """
+        return Address(self[:-1])
+
+    def child(self, child_type, name):
+        """ Returns the address of a child resource. """
+        return Address(tuple(self) + ((child_type, name),))
+
+    @property
+    def pattern(self):
+        """ The address with every name replaced by a wildcard. """
+        try:
+            return self._pattern
+        except AttributeError:
+            self._pattern = Address((child_type, '*')
+                                    for child_type, name in self)
+            return self._pattern
+
+    def is_wildcard(self):
+        return any(name == '*' for child_type, name in self)
+
+    def startswith(self, prefix):
+        """ Returns True if the address lies at or below prefix. A '*' in
+        either address matches any name. """
+        return util.address_startswith(self, Address.of(prefix))
+
+    def matches(self, other):
+        """ Returns True if the addresses are the same, a '*' in either
+        matching any name. """
+        other = Address.of(other)
+        return len(self) == len(other) and \
+            util.address_startswith(self, other)
+
+
+def address_list(address):
+    """ Returns an address of a management request, which may be an Address
+    or a CLI path, as a list of {type: name} dicts. """
+    if isinstance(address, list):
+        return address
+    return Address.of(address).to_list()
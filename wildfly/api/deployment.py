@@ -1,8 +1,11 @@
 import os
 import errno
 import logging
-import requests
+import re
 from .. import util
+from ..rollout import (DEFAULT_HEALTH_TIMEOUT, DEFAULT_MAX_FAILED_SERVERS,
+                       DEFAULT_WAVE_SIZE, Rollout)
+from ..upload import ChunkedBody, MultipartFile
 
 
 DEFAULT_CONTENT_HOST = 'http://repo.maven.apache.org'
@@ -20,42 +23,44 @@ class DeploymentApiMixin(object):
     def deployments(self, server_group=None, host=None):
         """ Returns information about deployments. """
 
+        # The content repository, the server-group assignments and the
+        # deployments on every running server are read with wildcard
+        # addresses in a single composite operation, so the number of
+        # requests does not grow with the size of the domain.
+        with self.batch() as batch:
+            content = batch.read_children_resources('deployment')
+            in_groups = batch.read_attribute(
+                'enabled', [{'server-group': '*'}, {'deployment': '*'}])
+            on_servers = batch.read_attribute(
+                'status',
+                [{'host': '*'}, {'server': '*'}, {'deployment': '*'}])
+
         # status['RUNNING', 'STOPPED', 'FAILED']
-        deployments = self.read_children_resources('deployment')
+        deployments = content.result() or {}
         for key in deployments:
             deployments[key]['server-groups'] = []
             deployments[key]['enabled'] = False
             deployments[key]['status'] = 'STOPPED'
             deployments[key]['hosts'] = []
 
-        server_groups = self.server_groups()
-        for _server_group in server_groups:
-            deployments_in_group = self.read_children_resources(
-                'deployment', [{'server-group': _server_group}], runtime=True)
-            for key in deployments_in_group:
-                deployments[key]['enabled'] = deployments_in_group[
-                    key]['enabled']
-                if 'server-groups' in deployments[key]:
-                    deployments[key]['server-groups'].append(_server_group)
-                else:
-                    deployments[key]['server-groups'] = [_server_group]
-
-        servers = self.servers()
-
-        for server in servers:
-            if servers[server]['status'] != 'STOPPED':
-                deployments_on_server = self.read_children_resources(
-                    'deployment',
-                    [{'host': servers[server]['host']}, {'server': server}],
-                    runtime=True)
-                logger.debug(
-                    'DEPLOYMENTS_ON_SERVER({}): {}'.format(
-                        server, deployments_on_server))
-
-                for key in deployments_on_server:
-                    if deployments_on_server[key]['status'] == 'OK':
-                        deployments[key]['status'] = 'RUNNING'
-                    deployments[key]['hosts'].append(servers[server]['host'])
+        for address, enabled in util.wildcard_results(in_groups.result()):
+            key = address['deployment']
+            if key not in deployments:
+                continue
+            deployments[key]['enabled'] = enabled
+            deployments[key]['server-groups'].append(address['server-group'])
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for address, status in util.wildcard_results(on_servers.result()):
+            key = address['deployment']
+            if debug:
+                logger.debug('DEPLOYMENT_ON_SERVER({}): {}: {}'.format(
+                    address['server'], key, status))
+            if key not in deployments:
+                continue
+            if status == 'OK':
+                deployments[key]['status'] = 'RUNNING'
+            deployments[key]['hosts'].append(address['host'])
 
         if server_group:
             for key in deployments.keys():
@@ -113,9 +118,105 @@ class DeploymentApiMixin(object):
             content_host=DEFAULT_CONTENT_HOST,
             content_host_ep=DEFAULT_CONTENT_HOST_EP,
             content_host_port=DEFAULT_CONTENT_HOST_PORT,
-            scheme="http"):
+            scheme="http",
+            progress=None,
+            chunked=False,
+            deduplicate=True):
 
         """ Deploy artifact to WildFly. """
+        byte_value = self._upload_artifact(
+            groupId, artifactId, version, type, path, content_host,
+            content_host_ep, content_host_port, scheme, progress, chunked,
+            deduplicate)
+
+        # TODO support new deploy and redeploy
+        # TODO if deploy fails then rollback to previous
+        # if force:
+        # if isDeploymentInRepository("{}.{}".format(artifactId, type)):
+        # replaceDeployment(ctx, f, deploymentUrl, name, runtimeName, disabled)
+        # return
+
+        # add artifact to content repository
+        name, runtime_name = self._deployment_names(artifactId, version, type)
+        self._add_content(name, runtime_name, byte_value)
+
+        # add artifact to server-group(s)
+        address = [{'server-group': server_groups},
+                   {'deployment': '{}'.format(name)}]
+        response = self.add(address, {'enabled': enabled})
+        self._invalidate_deployment(name)
+
+    def rollout(
+            self,
+            groupId,
+            artifactId,
+            version,
+            server_groups,
+            type=DEFAULT_ARTIFACT_TYPE,
+            path=None,
+            wave_size=DEFAULT_WAVE_SIZE,
+            max_failed_servers=DEFAULT_MAX_FAILED_SERVERS,
+            health_check=None,
+            timeout=DEFAULT_HEALTH_TIMEOUT,
+            content_host=DEFAULT_CONTENT_HOST,
+            content_host_ep=DEFAULT_CONTENT_HOST_EP,
+            content_host_port=DEFAULT_CONTENT_HOST_PORT,
+            scheme="http",
+            progress=None,
+            chunked=False,
+            deduplicate=True):
+
+        """ Uploads an artifact once and rolls it out to server_groups in
+        waves of wave_size groups, replacing the version of the artifact
+        they run. Every wave is deployed with a rollout plan and health
+        gated, and all the changes are rolled back when a wave fails.
+        Returns the wildfly.rollout.Rollout. """
+
+        if isinstance(server_groups, util.string_types):
+            server_groups = [server_groups]
+        byte_value = self._upload_artifact(
+            groupId, artifactId, version, type, path, content_host,
+            content_host_ep, content_host_port, scheme, progress, chunked,
+            deduplicate)
+        name, runtime_name = self._deployment_names(artifactId, version, type)
+        content = self.read_children_resources('deployment') or {}
+
+        def content_of(deployment):
+            return [item.get('hash', {}).get('BYTES_VALUE')
+                    for item in content[deployment].get('content') or []]
+
+        if name in content and byte_value not in content_of(name):
+            # another version of the artifact: versions are deployed side by
+            # side, so that each server group can be moved separately
+            name = '{}-{}.{}'.format(artifactId, version, type)
+            if name in content and byte_value not in content_of(name):
+                raise ValueError('Deployment {} already exists with other '
+                                 'content'.format(name))
+        added = name not in content
+        if added:
+            self._add_content(name, runtime_name, byte_value)
+        # the other versions of the artifact
+        versions = re.compile(r'{}(-\d.*)?\.{}$'.format(re.escape(artifactId),
+                                                       re.escape(type)))
+        replaces = sorted(
+            deployment for deployment in content
+            if deployment != name and (
+                versions.match(deployment) or
+                content[deployment].get('runtime-name') == runtime_name))
+
+        rollout = Rollout(self, name, server_groups, wave_size,
+                          max_failed_servers, health_check, timeout,
+                          replaces=replaces, remove_content=added)
+        return rollout.run()
+
+    def _upload_artifact(self, groupId, artifactId, version, type, path,
+                         content_host, content_host_ep, content_host_port,
+                         scheme, progress, chunked, deduplicate):
+        """ Uploads an artifact, from path or from the artifact repository,
+        unless the content repository holds it already, and returns the
+        hash of its content. """
+
+        byte_value = None
         if path is None:
             if content_host_ep == 'nexus':
                 if 'SNAPSHOT' not in version:
@@ -132,6 +233,7 @@ class DeploymentApiMixin(object):
                         version,
                         type
                     )
+                    metadata_url = None
                 else:
                     BASE_URL = '{}://{}:{}/{}/service/local/artifact' \
                            '/maven/content?r=public'.format(scheme,
@@ -145,6 +247,15 @@ class DeploymentApiMixin(object):
                         version,
                         type
                     )
+                    metadata_url = '{}://{}:{}/{}/service/local/repo_groups' \
+                        '/public/content/{}/{}/{}/maven-metadata.xml'.format(
+                            scheme,
+                            content_host,
+                            content_host_port,
+                            content_host_ep,
+                            groupId.replace('.', '/'),
+                            artifactId,
+                            version)
 
             elif content_host_ep == 'maven2':
                 BASE_URL = '{}://{}:{}/{}'.format(scheme,
@@ -157,75 +268,148 @@ class DeploymentApiMixin(object):
                     artifactId,
                     version,
                     type)
+                metadata_url = '{0}/{1}/{2}/{3}/maven-metadata.xml'.format(
+                    BASE_URL,
+                    groupId.replace('.', '/'),
+                    artifactId,
+                    version)
 
             else:
                 # Not supported
                 raise Exception("Content host type {} not supported"
                                 .format(content_host_ep))
 
-            # check if url exists
-            response = requests.head(url)
-            if response.status_code is not 200:
-                response.raise_for_status()
-
-            # upload artifact from url to content repository
-            response = self.execute('upload-deployment-url', {'url': url})
-        else:
-
-            # check if file exists
-            if not os.path.isfile(path):
-                raise IOError(errno.ENOENT, os.strerror(errno.ENOENT), path)
-
-            # upload artifact from local file path to content repository
-            files = {'file': open(path, 'rb')}
-            response = requests.post(
-                self.endpoint + '/add-content',
-                files=files,
-                auth=requests.auth.HTTPDigestAuth(
-                    self.username,
-                    self.password))
-            logger.debug(
-                'Response Status Code: {}: {}'.format(
-                    response.status_code,
-                    response.reason))
-            logger.debug('Response: {}'.format(response.json()))
-
-        # TODO support new deploy and redeploy
-        # TODO if deploy fails then rollback to previous
-        # if force:
-        # if isDeploymentInRepository("{}.{}".format(artifactId, type)):
-        # replaceDeployment(ctx, f, deploymentUrl, name, runtimeName, disabled)
-        # return
-
-        # add artifact to content repository
-        byte_value = response.json()['result']['BYTES_VALUE']
+            if self.artifact_cache is not None:
+                # resolve the artifact through the local cache and upload it
+                # from there, instead of having the controller download it
+                path, byte_value = self.artifact_cache.resolve(
+                    self, url,
+                    self.artifact_cache.key(groupId, artifactId, version,
+                                            type),
+                    metadata_url)
+            else:
+                # check if url exists
+                response = self.head(url)
+                if response.status_code is not 200:
+                    response.raise_for_status()
+
+                # skip the transfer if the content repository already holds
+                # the artifact
+                byte_value = self._remote_content_hash(url) \
+                    if deduplicate else None
+                if byte_value is None or \
+                        not self._in_repository(byte_value):
+                    # upload artifact from url to content repository
+                    response = self.execute('upload-deployment-url',
+                                            {'url': url})
+                    byte_value = response.json()['result']['BYTES_VALUE']
+
+        if path is not None:
+            if byte_value is None and deduplicate and os.path.isfile(path):
+                byte_value = util.content_hash(path)
+            if not deduplicate or byte_value is None or \
+                    not self._in_repository(byte_value):
+                # upload artifact from local file path to content repository
+                response = self.upload_content(path, progress, chunked)
+                byte_value = response.json()['result']['BYTES_VALUE']
+        return byte_value
+
+    @staticmethod
+    def _deployment_names(artifactId, version, type):
+        """ Returns the deployment name and runtime name of an artifact. """
 
         # https://github.com/cenx-cf/wildfly-py/issues/5
         if type == 'war':
             runtime_name = artifactId + '-' + version + '.' + type
+            # TODO: Test 'name' option besides 'runtime-name' option
+            name = artifactId + '.' + type
         elif type == 'jar':
             runtime_name = artifactId.split(
                 '-')[-2] + '-resources' + '.' + type
-
-        # TODO: Test 'name' option besides 'runtime-name' option
-        if type == 'war':
-            name = artifactId + '.' + type
-            request = {"content": [{"hash": {"BYTES_VALUE": byte_value}}],
-                   "address": [{"deployment": "{}".format(name)}],
-                   "operation": "add",
-                   "runtime-name": runtime_name}
-        elif type == 'jar':
             name = runtime_name
-            request = {"content": [{"hash": {"BYTES_VALUE": byte_value}}],
-                   "address": [{"deployment": "{}".format(runtime_name)}],
-                   "operation": "add"}
+        return name, runtime_name
 
-        response = self._post(request)
+    def _add_content(self, name, runtime_name, byte_value):
+        """ Adds a deployment of uploaded content to the content
+        repository. """
 
-        # add artifact to server-group(s)
-        address = [{'server-group': server_groups},
-                   {'deployment': '{}'.format(name)}]
-        response = self.add(address, {'enabled': enabled})
+        parameters = {"content": [{"hash": {"BYTES_VALUE": byte_value}}]}
+        if runtime_name != name:
+            parameters["runtime-name"] = runtime_name
+        # through execute, so the cached reads of the content repository
+        # are dropped
+        return self.execute('add', parameters,
+                            [{"deployment": "{}".format(name)}])
+
+    def _invalidate_deployment(self, name):
+        """ Drops the cached reads of a deployment, both in the content
+        repository and at runtime on the servers. """
+        self._invalidate([{'deployment': name}],
+                         [{'host': '*'}, {'server': '*'},
+                          {'deployment': name}])
+
+    def _in_repository(self, byte_value):
+        """ Returns True if a deployment in the content repository has
+        content with the given hash. """
+
+        response = self.execute('read-attribute', {'name': 'content'},
+                                [{'deployment': '*'}])
+        if not util.is_success(response):
+            return False
+        found = any(item.get('hash', {}).get('BYTES_VALUE') == byte_value
+                    for address, content in util.wildcard_results(
+                        response.json()['result'])
+                    for item in content or [])
+        if found:
+            logger.info('Content {} is already in the content repository, '
+                        'skipping upload'.format(byte_value))
+        return found
+
+    def _remote_content_hash(self, url):
+        """ Returns the content hash published next to a repository
+        artifact (its .sha1 file), or None when it is not available. """
+
+        if '?' in url:
+            # artifacts resolved through a query have no checksum path
+            return None
+        response = self.get(url + '.sha1')
+        if response.status_code != 200:
+            return None
+        try:
+            return util.hex_to_bytes_value(response.text.split()[0])
+        except (IndexError, TypeError, ValueError):
+            logger.debug('Invalid checksum for {}: {}'.format(
+                url, response.text))
+            return None
+
+    def upload_content(self, path, progress=None, chunked=False):
+        """ Uploads a local file to the content repository. The file is
+        streamed from disk, so memory use does not depend on its size.
+        progress(bytes_sent, total_bytes) is called as the upload advances,
+        and chunked sends the body with chunked transfer encoding. """
+
+        # check if file exists
+        if not os.path.isfile(path):
+            raise IOError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+        # answer the digest challenge first, so the artifact is not sent
+        # only to be rejected with a 401
+        self._authenticate()
+        with open(path, 'rb') as artifact:
+            body = MultipartFile(artifact, path, callback=progress)
+            response = self._send(
+                self.endpoint + '/add-content',
+                {'operation': 'add-content', 'address': []},
+                ChunkedBody(body) if chunked else body,
+                {'Content-Type': body.content_type},
+                len(body))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'Response Status Code: {}: {}'.format(
+                    response.status_code,
+                    response.reason))
+            logger.debug('Response: {}'.format(response.json()))
+        return response
 
     def disable(self, name, server_groups=DEFAULT_SERVER_GROUP):
         """ Disable artifact in given server_groups, but keep artifact in
@@ -234,6 +418,7 @@ class DeploymentApiMixin(object):
                    {'deployment': name}]
 
         response = self.execute('undeploy', address=address)
+        self._invalidate_deployment(name)
         if not util.is_success(response):
             logging.debug("Failed to disable artifact: {}".format(name))
 
@@ -243,6 +428,7 @@ class DeploymentApiMixin(object):
                    {'deployment': name}]
 
         response = self.execute('deploy', address=address)
+        self._invalidate_deployment(name)
         if not util.is_success(response):
             logging.debug("Failed to enable artifact: {}".format(name))
 
@@ -257,6 +443,7 @@ class DeploymentApiMixin(object):
             # remove deployment from content repository
             address = [{"deployment": name}]
             response = self.remove(address)
+        self._invalidate_deployment(name)
         return response
 
     def _download_from_bamboo(self):
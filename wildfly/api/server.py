@@ -1,4 +1,7 @@
 import logging
+from .. import util
+from ..logs import (DEFAULT_FOLLOW_INTERVAL, DEFAULT_LOG_FILE,
+                    LogFollower, LogStream)
 
 
 logger = logging.getLogger(__name__)
@@ -8,32 +11,45 @@ logger.setLevel(logging.INFO)
 class ServerApiMixin(object):
 
     def servers(self, server_group=None, host=None):
-        hosts = self.hosts()
-        servers_merged = {}
-        for host in hosts:
-            address = [{'host': host}]
-            servers_config = self.read_children_resources(
-                'server-config', address, True)
+        # The server configs, server states and uptimes of every host are
+        # read with wildcard addresses in a single composite operation.
+        # Servers that are not running have no platform-mbean resource and
+        # simply do not show up in the uptime results.
+        host = host or '*'
+        with self.batch() as batch:
+            groups = batch.read_attribute(
+                'group', [{'host': host}, {'server-config': '*'}])
+            states = batch.read_attribute(
+                'server-state', [{'host': host}, {'server': '*'}])
+            uptimes = batch.read_attribute(
+                'uptime', [{'host': host}, {'server': '*'},
+                           {'core-service': 'platform-mbean'},
+                           {'type': 'runtime'}])
+
+        servers_config = dict(
+            ((address['host'], address['server-config']), group)
+            for address, group in util.wildcard_results(groups.result()))
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
             logger.debug('SERVERS_CONFIG: {}'.format(servers_config))
-            servers = self.read_children_resources('server', address, True)
-            logger.debug('SERVERS: {}'.format(servers))
-            for key, value in servers.items():
-                if value['server-state'] != 'STOPPED':
-                    address = [{'host': host}, {'server': key}, {
-                        'core-service': 'platform-mbean'}, {'type': 'runtime'}]
-                    uptime = self.read_attribute(
-                        address=address, name='uptime')
-                else:
-                    uptime = None
-                if server_group is None or servers_config[
-                        key]['group'] == server_group:
-                    # STARTING, RUNNING, STOPPED or RESTART_REQUIRED
-                    servers_merged[key] = {
-                        'group': servers_config[key]['group'],
-                        'host': host,
-                        'status': value['server-state'],
-                        'uptime': uptime}
-        logger.debug('SERVERS_MERGED: {}'.format(servers_merged))
+        servers_uptime = dict(
+            ((address['host'], address['server']), uptime)
+            for address, uptime in util.wildcard_results(uptimes.result()))
+
+        servers_merged = {}
+        for address, state in util.wildcard_results(states.result()):
+            key = (address['host'], address['server'])
+            group = servers_config.get(key)
+            if server_group is None or group == server_group:
+                # STARTING, RUNNING, STOPPED or RESTART_REQUIRED
+                servers_merged[address['server']] = {
+                    'group': group,
+                    'host': address['host'],
+                    'status': state,
+                    'uptime': servers_uptime.get(key)
+                    if state != 'STOPPED' else None}
+        if debug:
+            logger.debug('SERVERS_MERGED: {}'.format(servers_merged))
         return servers_merged
 
     def server_groups(self):
@@ -45,7 +61,11 @@ class ServerApiMixin(object):
             address = [{'server-group': server_group}]
         else:
             address = []
-        return self.execute(operation, {'blocking': blocking}, address)
+        response = self.execute(operation, {'blocking': blocking}, address)
+        # server states change on every host
+        self._invalidate([{'host': '*'}, {'server-config': '*'}],
+                         [{'host': '*'}, {'server': '*'}])
+        return response
 
     def start_servers(self, server_group=None, blocking=False):
         """ Starts all configured servers in domain or
@@ -67,18 +87,45 @@ class ServerApiMixin(object):
         return self._server_operation(
             'restart-servers', server_group, blocking)
 
-    def read_log_file(self, host=None):
-        """ Reads the contents of a log file. The file must be in the
-        jboss.server.log.dir and must be defined as a file-handler,
-        periodic-rotating-file-handler or size-rotating-file-handler. """
-
+    def _log_address(self, host=None, server=None):
         if host is None:
             hosts = self.hosts()
             host = hosts[0]
+        if server is None:
+            server = '{}-0'.format(host)
+        return [{'host': host}, {'server': server}, {'subsystem': 'logging'}]
 
-        address = [{'host': host},
-                   {'server': '{}-0'.format(host)},
-                   {'subsystem': 'logging'}]
-        parameters = {'name': 'server.log', 'tail': 'true', 'lines': '100'}
+    def read_log_file(self, host=None, server=None, name=DEFAULT_LOG_FILE,
+                      lines=100, skip=0, tail=True):
+        """ Reads the contents of a log file. The file must be in the
+        jboss.server.log.dir and must be defined as a file-handler,
+        periodic-rotating-file-handler or size-rotating-file-handler. """
+
+        address = self._log_address(host, server)
+        parameters = {'name': name, 'tail': tail, 'lines': lines,
+                      'skip': skip}
         response = self.execute('read-log-file', parameters, address)
         return response.json()['result']
+
+    def follow_log_file(self, host=None, server=None, name=DEFAULT_LOG_FILE,
+                        lines=10, interval=DEFAULT_FOLLOW_INTERVAL,
+                        timeout=None):
+        """ Yields the last lines of a log file, then every line appended
+        to it, reading each line once (see wildfly.logs.LogFollower). """
+
+        follower = LogFollower(self, self._log_address(host, server), name,
+                               lines)
+        return follower.follow(interval, timeout)
+
+    def read_logs(self, server_group=None, host=None, server=None,
+                  name=DEFAULT_LOG_FILE, lines=100, level=None, pattern=None):
+        """ Yields the last lines of a log file of every running server of
+        the domain, server_group or host as LogLines merged in timestamp
+        order, keeping the records of at least level matching pattern
+        (see wildfly.logs.LogStream). """
+
+        servers = sorted(
+            (details['host'], key)
+            for key, details in self.servers(server_group, host).items()
+            if details['status'] != 'STOPPED' and server in (None, key))
+        return iter(LogStream(self, servers, name, lines, level, pattern))
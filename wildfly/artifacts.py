@@ -0,0 +1,190 @@
+import base64
+import errno
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ElementTree
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_BLOCKSIZE = 64 * 1024
+METADATA_SUFFIX = '.json'
+
+
+class ArtifactCache(object):
+    """
+    Size-bounded on-disk cache of repository artifacts, keyed by
+    groupId:artifactId:version:type. Downloads are verified against the
+    repository's .sha1 checksum, and the least recently used artifacts are
+    evicted once the cache grows beyond max_bytes. Release artifacts never
+    change, so a cached copy is used as is; SNAPSHOT artifacts are
+    revalidated against the snapshot version published in
+    maven-metadata.xml.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    @staticmethod
+    def key(groupId, artifactId, version, type):
+        return ':'.join([groupId, artifactId, version, type])
+
+    def path(self, key):
+        """ Returns the path of the cached artifact for key. """
+        groupId, artifactId, version, type = key.split(':')
+        return os.path.join(self.directory, groupId, artifactId, version,
+                            '{}-{}.{}'.format(artifactId, version, type))
+
+    def get(self, key):
+        """ Returns the metadata of a cached artifact, or None if it is not
+        cached or its file does not match the recorded size. """
+        path = self.path(key)
+        try:
+            with open(path + METADATA_SUFFIX) as metadata:
+                entry = json.load(metadata)
+            if os.path.getsize(path) != entry['size']:
+                return None
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        # record the use for the LRU eviction
+        os.utime(path + METADATA_SUFFIX, None)
+        return entry
+
+    def resolve(self, session, url, key, metadata_url=None):
+        """
+        Returns (path, BYTES_VALUE) of the artifact for key, downloading it
+        from url with session unless a valid copy is cached.
+        metadata_url locates the maven-metadata.xml of the artifact version
+        and is used to revalidate SNAPSHOT artifacts.
+        """
+
+        entry = self.get(key)
+        snapshot = None
+        if 'SNAPSHOT' in key.split(':')[2]:
+            snapshot = self._snapshot_version(session, metadata_url)
+            if entry is not None and (snapshot is None or
+                                      entry.get('snapshot') != snapshot):
+                logger.info('Cached artifact {} is outdated'.format(key))
+                entry = None
+
+        if entry is None:
+            entry = self._download(session, url, key, snapshot)
+            self._evict(keep=key)
+        else:
+            logger.info('Using cached artifact {}'.format(key))
+        return self.path(key), entry['hash']
+
+    def _snapshot_version(self, session, metadata_url):
+        """ Returns the version of the latest snapshot build, or None if it
+        cannot be determined. """
+        if metadata_url is None:
+            return None
+        response = session.get(metadata_url)
+        if response.status_code != 200:
+            return None
+        try:
+            versioning = ElementTree.fromstring(
+                response.content).find('versioning')
+        except ElementTree.ParseError:
+            return None
+        if versioning is None:
+            return None
+        timestamp = versioning.findtext('snapshot/timestamp')
+        build_number = versioning.findtext('snapshot/buildNumber')
+        if timestamp:
+            return '{}-{}'.format(timestamp, build_number)
+        return versioning.findtext('lastUpdated')
+
+    def _download(self, session, url, key, snapshot):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        response = session.get(url, stream=True)
+        response.raise_for_status()
+        digest = hashlib.sha1()
+        size = 0
+        fd, partial = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as artifact:
+                for block in response.iter_content(DEFAULT_BLOCKSIZE):
+                    artifact.write(block)
+                    digest.update(block)
+                    size += len(block)
+            self._verify(session, url, digest.hexdigest())
+            os.rename(partial, path)
+        except Exception:
+            os.remove(partial)
+            raise
+        finally:
+            response.close()
+
+        entry = {'key': key,
+                 'url': url,
+                 'size': size,
+                 'sha1': digest.hexdigest(),
+                 'hash': base64.b64encode(digest.digest()).decode('ascii'),
+                 'snapshot': snapshot}
+        with open(path + METADATA_SUFFIX, 'w') as metadata:
+            json.dump(entry, metadata)
+        logger.info('Cached artifact {} ({} bytes)'.format(key, size))
+        return entry
+
+    def _verify(self, session, url, sha1):
+        """ Checks a download against the checksum published next to it,
+        when the repository provides one. """
+        if '?' in url:
+            return
+        response = session.get(url + '.sha1')
+        if response.status_code != 200:
+            logger.debug('No checksum published for {}'.format(url))
+            return
+        expected = (response.text.split() or [''])[0].lower()
+        if expected != sha1:
+            raise IOError('Checksum mismatch for {}: expected {}, got '
+                          '{}'.format(url, expected, sha1))
+
+    def _entries(self):
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(METADATA_SUFFIX):
+                    metadata = os.path.join(root, name)
+                    yield (os.path.getmtime(metadata),
+                           metadata[:-len(METADATA_SUFFIX)])
+
+    def _evict(self, keep):
+        """ Removes the least recently used artifacts until the cache fits
+        in max_bytes. The artifact for keep is never removed. """
+        keep = self.path(keep)
+        with self._lock:
+            entries = sorted(self._entries())
+            sizes = dict((path, os.path.getsize(path))
+                         for used, path in entries if os.path.exists(path))
+            total = sum(sizes.values())
+            for used, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                logger.info('Evicting cached artifact {}'.format(path))
+                total -= sizes.get(path, 0)
+                for stale in (path, path + METADATA_SUFFIX):
+                    if os.path.exists(stale):
+                        os.remove(stale)
@@ -0,0 +1,107 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import Client
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _future_operation(name):
+    """ Returns a method that runs Client.<name> on the executor. """
+
+    def operation(self, *args, **kwargs):
+        return self.executor.submit(getattr(self.client, name),
+                                    *args, **kwargs)
+    operation.__name__ = name
+    operation.__doc__ = getattr(Client, name).__doc__
+    return operation
+
+
+class AsyncClient(object):
+    """
+    Futures counterpart of Client, backed by a thread pool: it is not an
+    asyncio client and has no coroutines. Every operation is submitted to
+    a pool of max_workers threads running the blocking Client, which
+    share one pooled, digest-authenticated session, and returns a
+    concurrent.futures.Future. Any number of operations can be queued from
+    a single thread, but at most max_workers run at once, and a digest
+    challenge blocks the worker thread answering it:
+
+        with AsyncClient('controller') as client:
+            futures = [client.read_attribute('server-state', address)
+                       for address in addresses]
+            states = [future.result() for future in futures]
+
+    The package runs on Python 2, which has no asyncio. On Python 3 the
+    futures could be awaited from an event loop with
+    asyncio.wrap_future(), each still holding a worker thread.
+    """
+
+    DEFAULT_MAX_WORKERS = 16
+
+    def __init__(self, host, max_workers=DEFAULT_MAX_WORKERS, **kwargs):
+        # one pooled connection per worker, and never more than that
+        kwargs.setdefault('pool_maxsize', max_workers)
+        kwargs.setdefault('pool_block', True)
+        self.client = Client(host, **kwargs)
+        self.executor = ThreadPoolExecutor(max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ Waits for pending operations and releases the connections. """
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+    def submit(self, fn, *args, **kwargs):
+        """ Runs fn(client, *args, **kwargs) on the executor. """
+        return self.executor.submit(fn, self.client, *args, **kwargs)
+
+    execute = _future_operation('execute')
+    add = _future_operation('add')
+    remove = _future_operation('remove')
+    read_resource = _future_operation('read_resource')
+    read_attribute = _future_operation('read_attribute')
+    read_attributes = _future_operation('read_attributes')
+    write_attribute = _future_operation('write_attribute')
+    unset_attribute = _future_operation('unset_attribute')
+    read_children_names = _future_operation('read_children_names')
+    read_children_resources = _future_operation('read_children_resources')
+    read_children_types = _future_operation('read_children_types')
+    read_operation_names = _future_operation('read_operation_names')
+    read_operation_description = _future_operation(
+        'read_operation_description')
+    version = _future_operation('version')
+
+    hosts = _future_operation('hosts')
+    topology = _future_operation('topology')
+
+    servers = _future_operation('servers')
+    server_groups = _future_operation('server_groups')
+    start_servers = _future_operation('start_servers')
+    stop_servers = _future_operation('stop_servers')
+    reload_servers = _future_operation('reload_servers')
+    restart_servers = _future_operation('restart_servers')
+    read_log_file = _future_operation('read_log_file')
+
+    deployments = _future_operation('deployments')
+    is_deployment_in_repository = _future_operation(
+        'is_deployment_in_repository')
+    is_deployment_enabled = _future_operation('is_deployment_enabled')
+    deployment_status = _future_operation('deployment_status')
+    pull = _future_operation('pull')
+    deploy = _future_operation('deploy')
+    rollout = _future_operation('rollout')
+    undeploy = _future_operation('undeploy')
+    enable = _future_operation('enable')
+    disable = _future_operation('disable')
+
+    get_server_group_host = _future_operation('get_server_group_host')
+    get_application_hostnames = _future_operation(
+        'get_application_hostnames')
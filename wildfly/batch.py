@@ -0,0 +1,195 @@
+import logging
+
+from .address import address_list
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_CHUNK_SIZE = 100
+
+
+class Step(object):
+    """ Placeholder for an operation queued in a Batch. It is resolved with
+    the step's response once the batch has been run. """
+
+    def __init__(self, request):
+        self.request = request
+        self.response = None
+
+    def done(self):
+        """ Returns True once the step has been executed. """
+        return self.response is not None
+
+    @property
+    def outcome(self):
+        return self.response.get('outcome') if self.done() else None
+
+    @property
+    def failure_description(self):
+        return self.response.get('failure-description') \
+            if self.done() else None
+
+    def is_success(self):
+        return self.outcome == 'success'
+
+    def cancelled(self):
+        """ Returns True if the step did not fail on its own but because
+        the composite it was part of failed: it was cancelled (never run),
+        or rolled back without a failure description. """
+        if self.outcome == 'cancelled':
+            return True
+        return self.outcome == 'failed' and \
+            bool(self.response.get('rolled-back')) and \
+            not self.response.get('failure-description')
+
+    def result(self):
+        """ Returns the step result, or None if the step failed. """
+        if not self.done():
+            raise RuntimeError('Batch step has not been executed yet.')
+        return self.response.get('result') if self.is_success() else None
+
+    def __repr__(self):
+        return '<Step {} {} {}>'.format(self.request.get('operation'),
+                                         self.request.get('address'),
+                                         self.outcome)
+
+
+class Batch(object):
+    """
+    Queues management operations and sends them as WildFly `composite`
+    operations, `chunk_size` steps per request.
+
+        with client.batch() as batch:
+            group = batch.read_attribute('group', address)
+            state = batch.read_attribute('server-state', address)
+        group.result(), state.result()
+
+    Every queueing method mirrors the Client method of the same name but
+    returns a Step instead of a result.
+    """
+
+    def __init__(self, client, chunk_size=DEFAULT_CHUNK_SIZE, headers=None):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be a positive integer')
+        self.client = client
+        self.chunk_size = chunk_size
+        self.headers = headers
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _chunks(self, steps):
+        return [steps[i:i + self.chunk_size]
+                for i in range(0, len(steps), self.chunk_size)]
+
+    def _run_chunk(self, steps):
+        parameters = {'steps': [step.request for step in steps]}
+        if self.headers:
+            parameters['operation-headers'] = self.headers
+        response = self.client.execute('composite', parameters).json()
+        results = response.get('result') or {}
+        for index, step in enumerate(steps, 1):
+            step_response = results.get('step-{}'.format(index))
+            if step_response is None:
+                # the controller did not report on this step (e.g. it was
+                # never run because an earlier step failed)
+                step_response = {
+                    'outcome': response.get('outcome')
+                    if response.get('outcome') == 'success' else 'cancelled',
+                    'failure-description': response.get(
+                        'failure-description')}
+            step.response = step_response
+        logger.debug('Composite of {} steps: {}'.format(
+            len(steps), response.get('outcome')))
+
+    def run(self, retries=0):
+        """ Sends all queued operations and returns their steps. Steps
+        cancelled because another step of their composite failed are sent
+        again, without the failed steps, up to retries times. """
+
+        steps, self._pending = self._pending, []
+        pending = steps
+        for attempt in range(retries + 1):
+            self.client._map(self._run_chunk, self._chunks(pending))
+            pending = [step for step in pending if step.cancelled()]
+            if not pending:
+                break
+            logger.debug('{} steps were cancelled'.format(len(pending)))
+        return steps
+
+    def execute(self, operation, parameters=None, address=[]):
+        """ Queue operation on resource. """
+
+        request = {'address': address_list(address), 'operation': operation}
+        if parameters:
+            request.update(parameters)
+        step = Step(request)
+        self._pending.append(step)
+        return step
+
+    def add(self, address, parameters=None):
+        return self.execute('add', parameters, address)
+
+    def remove(self, address):
+        return self.execute('remove', address=address)
+
+    def read_resource(
+            self,
+            address=[],
+            recursive=False,
+            recursive_depth=10,
+            runtime=False,
+            include_defaults=True,
+            attributes_only=False):
+        return self.execute('read-resource',
+                            {'recursive': recursive,
+                             'recursive_depth': recursive_depth,
+                             'runtime': runtime,
+                             'include_defaults': include_defaults,
+                             'attributes_only': attributes_only},
+                            address)
+
+    def read_attribute(self, name, address=[], include_defaults=True):
+        return self.execute('read-attribute',
+                            {'name': name,
+                             'include-defaults': include_defaults},
+                            address)
+
+    def write_attribute(self, name, value, address=[]):
+        return self.execute('write-attribute',
+                            {'name': name, 'value': value},
+                            address)
+
+    def unset_attribute(self, name, address=[]):
+        return self.execute('unset-attribute', {'name': name}, address)
+
+    def read_children_names(self, child_type, address=[]):
+        return self.execute('read-children-names',
+                            {'child-type': child_type},
+                            address)
+
+    def read_children_resources(self, child_type, address=[], runtime=False):
+        return self.execute('read-children-resources',
+                            {'child-type': child_type,
+                             'include-runtime': runtime},
+                            address)
+
+    def read_children_types(self, address=[]):
+        return self.execute('read-children-types', address=address)
+
+    def read_operation_names(self, address=[]):
+        return self.execute('read-operation-names', address=address)
+
+    def read_operation_description(self, name, address=[]):
+        return self.execute('read-operation-description',
+                            {'name': name},
+                            address)
@@ -0,0 +1,162 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from . import util
+from .address import Address
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 10
+
+# clock of the time to live, unaffected by wall clock adjustments where
+# the interpreter has one (Python 3)
+_clock = getattr(time, 'monotonic', time.time)
+
+# idempotent operations whose responses may be cached
+READ_OPERATIONS = frozenset([
+    'read-resource',
+    'read-attribute',
+    'read-children-names',
+    'read-children-types',
+    'read-children-resources',
+    'read-operation-names',
+    'read-operation-description',
+    'read-resource-description'])
+
+# read operations whose result also describes the children of the resource
+CHILDREN_OPERATIONS = frozenset([
+    'read-resource',
+    'read-children-names',
+    'read-children-resources'])
+
+
+def is_read_only(request):
+    """ Returns True if a request (or every step of a composite) only
+    reads the management model. """
+    if request.get('operation') == 'composite':
+        return all(is_read_only(step) for step in request.get('steps', []))
+    return request.get('operation') in READ_OPERATIONS
+
+
+def _targets(request):
+    """ Returns the (address, reads children) pairs a request reads. """
+    if request.get('operation') == 'composite':
+        return [target
+                for step in request.get('steps', [])
+                for target in _targets(step)]
+    return [(Address.of(request.get('address', [])),
+             request.get('operation') in CHILDREN_OPERATIONS)]
+
+
+class ReadCache(object):
+    """
+    Bounded LRU cache, with a time to live, for the responses of idempotent
+    management reads. Entries are keyed on operation, address and
+    parameters. A write to an address drops the cached reads of that
+    address, of the resources below it, and the children reads of the
+    resources above it. The cache is thread safe and may be shared by
+    several clients of the same domain.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(request):
+        if request.get('operation') == 'composite':
+            return json.dumps(request, sort_keys=True)
+        parameters = dict((name, value) for name, value in request.items()
+                          if name not in ('operation', 'address'))
+        return (request.get('operation'),
+                Address.of(request.get('address', [])),
+                json.dumps(parameters, sort_keys=True) if parameters else '')
+
+    def get(self, request):
+        """ Returns the cached response of a request, or None. """
+        key = self.key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < _clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # move to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry[2]
+
+    def put(self, request, response):
+        """ Caches the response of a read-only request. """
+        key = self.key(request)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (_clock() + self.ttl,
+                                  _targets(request),
+                                  response)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, address):
+        """ Drops the cached reads affected by a write to address, which may
+        contain wildcards. """
+        written = Address.of(address)
+        with self._lock:
+            stale = [key
+                     for key, (expires, targets, response)
+                     in self._entries.items()
+                     if any(self._affected(written, target, children)
+                            for target, children in targets)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug('Invalidated {} cached reads under {}'.format(
+                len(stale), address))
+
+    def invalidate_request(self, request):
+        """ Drops the cached reads affected by a write request. """
+        if request.get('operation') == 'composite':
+            for step in request.get('steps', []):
+                self.invalidate_request(step)
+        else:
+            self.invalidate(request.get('address', []))
+
+    @staticmethod
+    def _affected(written, target, children):
+        if util.address_startswith(target, written):
+            return True
+        return children and util.address_startswith(written, target)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'invalidations': self.invalidations,
+                    'size': len(self._entries),
+                    'maxsize': self.maxsize,
+                    'ttl': self.ttl}
@@ -1,10 +1,21 @@
 # python binding for wildlfy management http/json api
 import logging
-import json
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from . import util
 from . import api
+from .address import address_list
+from .batch import Batch
+from .cache import is_read_only
+from .codec import get_codec
+from .instrumentation import Event, Scope, address_pattern, breakdown
+from .refresh import Refresher
+from .response import ManagementResponse
+from .snapshot import Snapshot
+from .watch import Poller, watch_specs
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -23,6 +34,9 @@ class Client(requests.Session,
     DEFAULT_MANAGEMENT_USER = 'admin'
     DEFAULT_MANAGEMENT_PWD = 'admin'
     DEFAULT_TIMEOUT = 5000
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 10
+    DEFAULT_BATCH_SIZE = 100
 
     def __init__(
             self,
@@ -30,7 +44,19 @@ class Client(requests.Session,
             port=DEFAULT_MANAGEMENT_PORT,
             username=DEFAULT_MANAGEMENT_USER,
             password=DEFAULT_MANAGEMENT_PWD,
-            timeout=DEFAULT_TIMEOUT):
+            timeout=DEFAULT_TIMEOUT,
+            pool_connections=DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE,
+            pool_block=False,
+            keep_alive=True,
+            max_retries=0,
+            batch_size=DEFAULT_BATCH_SIZE,
+            max_workers=None,
+            cache=None,
+            artifact_cache=None,
+            schema_cache=None,
+            observers=None,
+            codec=None):
 
         super(Client, self).__init__()
         self.username = username
@@ -38,40 +64,240 @@ class Client(requests.Session,
         self.host = host
         self.port = port
         self.timeout = timeout
+        self.batch_size = batch_size
+        self.cache = cache
+        self.artifact_cache = artifact_cache
+        self.schema_cache = schema_cache
+        self._release_version = None
+        # JSON codec of the management requests and responses; the
+        # fastest installed backend unless one is named
+        self.codec = get_codec(codec)
+        # callables receiving an instrumentation Event per request
+        self.observers = list(observers or [])
         self.endpoint = 'http://{}:{}/management'.format(self.host, self.port)
 
+        # A single digest auth instance is shared by every management
+        # request, so the nonce (and nonce count) negotiated on the first
+        # 401 challenge is reused and later requests authenticate up front.
+        # It is passed per request rather than set on the session so the
+        # credentials are never offered to artifact repositories.
+        self._auth = requests.auth.HTTPDigestAuth(username, password)
+
+        # Opt-in concurrent fan-out: independent sub-requests (such as the
+        # chunks of a large batch) run on max_workers threads.
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers) \
+            if max_workers else None
+        self._worker = threading.local()
+        self._poller = None
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=max(pool_maxsize, max_workers or 0),
+            pool_block=pool_block,
+            max_retries=max_retries)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+
+    def close(self):
+        if self._poller is not None:
+            self._poller.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        super(Client, self).close()
+
+    def _authenticate(self):
+        """ Performs the digest challenge round-trip unless the calling
+        thread already holds a nonce. """
+
+        # requests keeps the digest state per thread since 2.8
+        state = getattr(self._auth, '_thread_local', self._auth)
+        if not getattr(state, 'last_nonce', None):
+            self._post({'address': [],
+                        'operation': 'read-attribute',
+                        'name': 'release-version'})
+
+    def _map(self, fn, items):
+        """ Returns [fn(item) for item in items]. When max_workers is set
+        the calls run concurrently on the client's thread pool; the results
+        are always in the order of items. """
+
+        items = list(items)
+        # Calls made from a worker thread run inline, so nested fan-outs
+        # cannot exhaust the pool and deadlock.
+        if self._executor is None or len(items) < 2 or \
+                getattr(self._worker, 'active', False):
+            return [fn(item) for item in items]
+
+        # the workers report to the instrumentation scopes of the caller
+        scopes = self._scopes()
+
+        def run(item):
+            self._worker.active = True
+            self._worker.scopes = scopes
+            try:
+                return fn(item)
+            finally:
+                self._worker.active = False
+                self._worker.scopes = []
+        return list(self._executor.map(run, items))
+
+    def add_observer(self, observer):
+        """ Registers a callable receiving an instrumentation Event for
+        every management request. """
+
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def instrument(self, *observers):
+        """ Returns a Scope collecting the events of the requests issued
+        by the current thread while it is entered. """
+
+        return Scope(self, observers)
+
+    def _scopes(self):
+        return list(getattr(self._worker, 'scopes', []))
+
+    def _enter_scope(self, scope):
+        self._worker.scopes = self._scopes() + [scope]
+
+    def _exit_scope(self, scope):
+        self._worker.scopes = [s for s in self._scopes() if s is not scope]
+
+    def _emit(self, request, response, latency, bytes_sent, cached=False):
+        observers = self.observers + self._scopes()
+        if not observers:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        outcome = body.get('outcome') if isinstance(body, dict) else None
+        event = Event(operation=request.get('operation'),
+                      address=address_pattern(request.get('address', [])),
+                      steps=len(request.get('steps', [])) or 1,
+                      latency=latency,
+                      status_code=response.status_code,
+                      outcome=outcome,
+                      bytes_sent=0 if cached else bytes_sent,
+                      bytes_received=0 if cached else len(response.content),
+                      round_trips=0 if cached else 1 + len(response.history),
+                      cached=cached,
+                      breakdown=breakdown(request, body))
+        for observer in observers:
+            try:
+                observer(event)
+            except Exception:
+                logger.warning('Instrumentation observer {} failed'.format(
+                    observer), exc_info=True)
+
+    def _send(self, url, request, data, headers, bytes_sent):
+        """ Posts data, the body of request, to url and reports the
+        Event of the request. """
+
+        start = time.time()
+        response = ManagementResponse(self.post(
+            url,
+            headers=headers,
+            auth=self._auth,
+            data=data), self.codec)
+        self._emit(request, response, time.time() - start, bytes_sent)
+        return response
+
     def _post(self, request):
 
-        logger.debug('Request: {}'.format(request))
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug('Request: {}'.format(request))
         headers = {'content-type': 'application/json'}
-        response = requests.post(
-            self.endpoint,
-            headers=headers,
-            auth=requests.auth.HTTPDigestAuth(
-                self.username,
-                self.password),
-            data=json.dumps(request))
-        if response.status_code in [200, 204]:
+        data = self.codec.dumps(request)
+        response = self._send(self.endpoint, request, data, headers,
+                              len(data))
+        if response.status_code not in [200, 204, 500]:
+            response.raise_for_status()
+        if debug:
             logger.debug(
                 'Response Status Code: {}: {}'.format(
                     response.status_code,
                     response.reason))
-        elif response.status_code == 500:
-            logger.debug(
-                'Response Status Code: {}: {}'.format(
-                    response.status_code,
-                    response.json()))
-        else:
-            response.raise_for_status()
-        logger.debug('Response: {}'.format(response.json()))
+            logger.debug('Response: {}'.format(response.json()))
         return response
 
     def execute(self, operation, parameters={}, address=[]):
         """ Execute operation on resource. """
 
-        request = {'address': address, 'operation': operation}
-        request.update(parameters)
-        return self._post(request)
+        request = {'address': address_list(address), 'operation': operation}
+        if parameters:
+            request.update(parameters)
+        if self.cache is None:
+            return self._post(request)
+
+        if is_read_only(request):
+            response = self.cache.get(request)
+            if response is None:
+                response = self._post(request)
+                if util.is_success(response):
+                    # cache the undecoded response, so that every hit gets
+                    # its own copy of the body
+                    self.cache.put(request, response.http_response)
+            else:
+                response = ManagementResponse(response, self.codec)
+                self._emit(request, response, 0.0, 0, cached=True)
+            return response
+
+        response = self._post(request)
+        self.cache.invalidate_request(request)
+        return response
+
+    def _invalidate(self, *addresses):
+        """ Drops the cached reads affected by changes to addresses, and
+        has the watches poll again soon. """
+
+        if self._poller is not None:
+            self._poller.poke()
+        if self.cache is not None:
+            for address in addresses:
+                self.cache.invalidate(address)
+
+    def batch(self, chunk_size=None, headers=None):
+        """ Returns a Batch that queues operations and sends them as
+        composite operations of at most chunk_size steps. """
+
+        return Batch(self, chunk_size or self.batch_size, headers)
+
+    def snapshot(self, address=[], recursive=True, runtime=True):
+        """ Reads the subtree at address with a single read-resource and
+        returns it as an indexed Snapshot answering read_* locally. """
+
+        return Snapshot.load(self, address, recursive, runtime)
+
+    def refresher(self, address=[], watches=None, runtime=True):
+        """ Returns a Refresher keeping a snapshot of the subtree at
+        address up to date by re-reading only the watched resources. """
+
+        return Refresher(self, address, watches, runtime)
+
+    @property
+    def poller(self):
+        """ The Poller shared by the watches of this client. """
+
+        if self._poller is None:
+            self._poller = Poller(self)
+        return self._poller
+
+    def watch(self, servers=True, deployments=True, host=None, server=None,
+              server_group=None, deployment=None, timeout=None):
+        """ Returns a Watch iterating over the server state and deployment
+        changes of the selected servers and deployments, for at most
+        timeout seconds. """
+
+        specs = watch_specs(servers, deployments, host, server,
+                            server_group, deployment)
+        return self.poller.subscribe(specs, server_group, timeout)
 
     def add(self, address, parameters=None):
         """ Creates a new management resource. """
@@ -114,6 +340,21 @@ class Client(requests.Session,
                                 address)
         return response.json()['result'] if util.is_success(response) else None
 
+    def read_attributes(self, items, include_defaults=True, retries=1):
+        """ Reads the attribute of every (address, name) pair of items in
+        composite operations of batch_size steps, run concurrently when
+        max_workers is set. Returns the batch Steps in the order of items:
+        step.result() is the value read, or None for an attribute that
+        could not be read, step.failure_description telling why. Steps
+        cancelled because another step of their composite failed are read
+        again, up to retries times. """
+
+        batch = self.batch()
+        steps = [batch.read_attribute(name, address, include_defaults)
+                 for address, name in items]
+        batch.run(retries)
+        return steps
+
     def write_attribute(self, name, value, address=[]):
         """ Write value of attribute of resource. """
 
@@ -150,15 +391,16 @@ class Client(requests.Session,
                                 {'child-type': child_type,
                                  'include-runtime': runtime},
                                 address)
-        logger.debug(response.json())
         return response.json()['result'] if util.is_success(response) else None
 
     def read_operation_names(self, address=[]):
         """ Returns a list of the names of all the operations the resource
         supports. """
 
-        response = self.execute('read-operation-names',
-                                address)
+        description = self._description(address)
+        if description is not None:
+            return sorted(description.get('operations') or {})
+        response = self.execute('read-operation-names', address=address)
         return response.json()['result'] if util.is_success(response) else None
 
     def read_operation_description(self, name, address=[]):
@@ -166,6 +408,9 @@ class Client(requests.Session,
         its parameter types and its return value.
         """
 
+        description = self._description(address)
+        if description is not None:
+            return (description.get('operations') or {}).get(name)
         response = self.execute('read-operation-description',
                                 {'name': name},
                                 address)
@@ -175,16 +420,44 @@ class Client(requests.Session,
         """ Returns a list of the types of child resources the resource
         supports. """
 
-        response = self.execute('read-children-types',
-                                address)
+        description = self._description(address)
+        if description is not None:
+            return sorted(description.get('children') or {})
+        response = self.execute('read-children-types', address=address)
+        return response.json()['result'] if util.is_success(response) else None
+
+    def read_resource_description(self, address=[]):
+        """ Returns the description of a resource: its attributes,
+        operations and child types. """
+
+        description = self._description(address)
+        if description is not None:
+            return description
+        response = self.execute('read-resource-description',
+                                {'operations': True}, address)
         return response.json()['result'] if util.is_success(response) else None
 
+    def _description(self, address):
+        """ Returns the description of address from the schema cache, or
+        None without a schema cache. """
+        if self.schema_cache is None:
+            return None
+        return self.schema_cache.describe(self, address)
+
     def version(self):
         """ Prints version of WildFly. """
 
         result = self.read_attribute('release-version')
         return result
 
+    def release_version(self):
+        """ Returns the release-version of the domain controller, read once
+        per client. """
+
+        if self._release_version is None:
+            self._release_version = self.version()
+        return self._release_version
+
     def get_raw_server_groups_info(self):
         """
         Run the equivalent WildFly CLI command   /server-group=*:read-resource
@@ -275,20 +548,9 @@ class Client(requests.Session,
         :param server_group  The server group
         :return hostname associated with a server group
         """
-        if "_hostname_map" not in self.__dict__ or \
-                        self._hostname_map is None or \
-                        len(self._hostname_map) == 0:
-            # Initialize the hostname map if self._hostname_map is not defined
-            # in the class object, or is None, or is an empty dictionary
-            self._hostname_map = self._get_hostname_map()
-
         logger.info("Getting server group {sg} hostname.".format(
             sg=server_group))
-        hostnames = [hostname
-                     for wf_host in self._hostname_map
-                     for wf_server in self._hostname_map[wf_host]
-                     for sg, hostname in self._hostname_map[wf_host][wf_server].items()
-                     if server_group == sg]
+        hostnames = self.topology().group_hostnames(server_group)
         logger.info("Server Group {sg} is running on hostnames "
                     "{hostnames}".format(sg=server_group,
                                          hostnames=", ".join(hostnames)))
@@ -309,12 +571,12 @@ class Client(requests.Session,
 
         logger.info("Getting hostnames where application {app} is running."
                     .format(app=application))
-        # Get a list of deployed all
-        sg_info = self.get_deployed_apps()
-        server_groups = [sg
-                         for sg in sg_info
-                         for app in sg_info[sg]
-                         if application in app]
+        # Get the server groups of all deployments
+        deployments = self.deployments()
+        server_groups = sorted(set(sg
+                                   for app in deployments
+                                   for sg in deployments[app]['server-groups']
+                                   if application in app))
         logger.info("Application {app} is deployed in server-groups: "
                     "{sg}".format(app=application,
                                   sg=", ".join(server_groups)))
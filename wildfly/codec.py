@@ -0,0 +1,116 @@
+"""
+JSON codecs encoding management requests and decoding responses. The
+fastest installed backend is used by default; every codec decodes straight
+from the raw response bytes, without an intermediate text copy.
+"""
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class JsonCodec(object):
+    """ Stdlib json codec, always available. """
+
+    name = 'json'
+
+    def dumps(self, obj):
+        """ Returns obj encoded as UTF-8 JSON bytes. """
+        data = json.dumps(obj)
+        return data if isinstance(data, bytes) else data.encode('utf-8')
+
+    def loads(self, data):
+        """ Returns the object decoded from UTF-8 JSON bytes. """
+        try:
+            return json.loads(data)
+        except TypeError:
+            # json.loads only accepts bytes since Python 3.6
+            return json.loads(data.decode('utf-8'))
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.name)
+
+
+class OrjsonCodec(JsonCodec):
+
+    name = 'orjson'
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+
+    name = 'ujson'
+
+    def dumps(self, obj):
+        return ujson.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+class SimplejsonCodec(JsonCodec):
+
+    name = 'simplejson'
+
+    def dumps(self, obj):
+        data = simplejson.dumps(obj)
+        return data if isinstance(data, bytes) else data.encode('utf-8')
+
+    def loads(self, data):
+        return simplejson.loads(data)
+
+
+# codecs by name, fastest first, with whether their backend is installed
+CODECS = [
+    (OrjsonCodec, orjson is not None),
+    (UjsonCodec, ujson is not None),
+    (SimplejsonCodec, simplejson is not None),
+    (JsonCodec, True),
+]
+
+
+def available():
+    """ Returns the names of the codecs whose backend is installed, fastest
+    first. """
+    return [cls.name for cls, installed in CODECS if installed]
+
+
+def get_codec(codec=None):
+    """ Returns a codec instance: codec itself if it is one, the codec
+    named codec, or the fastest installed codec if codec is None. """
+
+    if isinstance(codec, JsonCodec):
+        return codec
+    for cls, installed in CODECS:
+        if codec is None and installed:
+            return cls()
+        if codec == cls.name:
+            if not installed:
+                raise ValueError('JSON codec {} is not installed'.format(
+                    codec))
+            return cls()
+    raise ValueError('Unknown JSON codec {}, expected one of {}'.format(
+        codec, ', '.join(cls.name for cls, installed in CODECS)))
+
+
+DEFAULT_CODEC = get_codec()
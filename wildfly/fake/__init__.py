@@ -0,0 +1,3 @@
+# flake8: noqa
+from .model import DomainModel
+from .server import FakeManagementServer
@@ -0,0 +1,38 @@
+""" Runs a fake WildFly management endpoint:
+
+    python -m wildfly.fake --hosts 10 --servers 4 --deployments 20
+"""
+import argparse
+import time
+
+from . import DomainModel, FakeManagementServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fake WildFly domain controller management endpoint.')
+    parser.add_argument('--port', type=int, default=9990)
+    parser.add_argument('--hosts', type=int, default=1)
+    parser.add_argument('--servers', type=int, default=1,
+                        help='servers per host')
+    parser.add_argument('--deployments', type=int, default=1)
+    parser.add_argument('--groups', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds added to every response')
+    args = parser.parse_args()
+
+    model = DomainModel(hosts=args.hosts, servers=args.servers,
+                        deployments=args.deployments, groups=args.groups)
+    server = FakeManagementServer(model, host='0.0.0.0', port=args.port,
+                                  latency=args.latency)
+    server.start()
+    print('Listening on port {}'.format(server.port))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
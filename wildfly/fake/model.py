@@ -0,0 +1,507 @@
+"""
+Synthetic WildFly domain model that answers management operations the way
+a domain controller does, including wildcard addresses and composites.
+"""
+import base64
+import copy
+import datetime
+import hashlib
+import threading
+
+
+RELEASE_VERSION = '8.2.0.Final'
+LOG_FORMAT = '{:%Y-%m-%d %H:%M:%S},{:03d} {:<5} [{}] ({}) {}'
+LOG_EPOCH = datetime.datetime(2016, 1, 1)
+
+
+def bytes_value(digest):
+    """ Returns a SHA-1 digest in the BYTES_VALUE form. """
+    return base64.b64encode(digest).decode('ascii')
+
+
+class Resource(object):
+
+    def __init__(self, attributes=None):
+        self.attributes = attributes or {}
+        self.children = {}
+
+    def child(self, child_type, name, attributes=None):
+        resource = Resource(attributes)
+        self.children.setdefault(child_type, {})[name] = resource
+        return resource
+
+    def to_dict(self, recursive=False):
+        result = copy.deepcopy(self.attributes)
+        for child_type, children in self.children.items():
+            if recursive:
+                result[child_type] = dict(
+                    (name, child.to_dict(True))
+                    for name, child in children.items())
+            else:
+                result[child_type] = dict(
+                    (name, None) for name in children)
+        return result
+
+
+class OperationFailed(Exception):
+    pass
+
+
+class DomainModel(object):
+    """
+    A domain of `hosts` hosts running `servers` servers each, with
+    `deployments` deployments spread over `groups` server groups. Hosts are
+    named host-<i>, servers host-<i>-<j>, server groups group-<k> and
+    deployments app-<n>.war. Servers of a group run the deployments enabled
+    in that group.
+    """
+
+    def __init__(self, hosts=1, servers=1, deployments=1, groups=1):
+        self._lock = threading.RLock()
+        self.root = Resource({'release-version': RELEASE_VERSION,
+                              'process-type': 'Domain Controller',
+                              'name': 'fake-domain'})
+        self.contents = set()
+        # log file lines by (host, server, file name), written on a clock
+        # advancing by one millisecond per line
+        self.logs = {}
+        self.clock = LOG_EPOCH
+        # names of the deployments that fail to start on the servers
+        self.failing = set()
+        # stop composites at their first failed step, reporting the
+        # following steps as cancelled
+        self.cancel_after_failure = False
+        group_names = ['group-{}'.format(g) for g in range(groups)]
+
+        for name in group_names:
+            self.root.child('server-group', name, {
+                'profile': 'full-ha',
+                'socket-binding-group': 'full-ha-sockets'})
+
+        for d in range(deployments):
+            name = 'app-{}.war'.format(d)
+            self._add_content(name, hashlib.sha1(
+                name.encode('utf-8')).digest())
+            self.root.children['server-group'][
+                group_names[d % groups]].child('deployment', name, {
+                    'enabled': True, 'runtime-name': name})
+
+        for h in range(hosts):
+            host_name = 'host-{}'.format(h)
+            host = self.root.child('host', host_name, {'name': host_name})
+            for s in range(servers):
+                server_name = '{}-{}'.format(host_name, s)
+                host.child('server-config', server_name, {
+                    'group': group_names[(h * servers + s) % groups],
+                    'auto-start': True,
+                    'status': 'STARTED'})
+                self._start_server(host_name, server_name)
+
+    def _add_content(self, name, digest):
+        self.contents.add(bytes_value(digest))
+        self.root.child('deployment', name, {
+            'name': name,
+            'runtime-name': name,
+            'content': [{'hash': {'BYTES_VALUE': bytes_value(digest)}}],
+            'persistent': True})
+
+    # servers
+
+    def _server_configs(self, server_group=None):
+        for host_name, host in sorted(
+                self.root.children.get('host', {}).items()):
+            for server_name, config in sorted(
+                    host.children.get('server-config', {}).items()):
+                if server_group in (None, config.attributes['group']):
+                    yield host_name, server_name, config
+
+    def _start_server(self, host_name, server_name):
+        host = self.root.children['host'][host_name]
+        config = host.children['server-config'][server_name]
+        group_name = config.attributes['group']
+        config.attributes['status'] = 'STARTED'
+        server = host.child('server', server_name, {
+            'name': server_name,
+            'server-group': group_name,
+            'server-state': 'running',
+            'host': host_name})
+        mbean = server.child('core-service', 'platform-mbean')
+        mbean.child('type', 'runtime', {'uptime': 1000})
+        server.child('core-service', 'server-environment', {
+            'qualified-host-name': '{}.example.com'.format(server_name)})
+        server.child('subsystem', 'logging')
+        group = self.root.children['server-group'][group_name]
+        for name, deployment in group.children.get('deployment', {}).items():
+            self._deploy_on_server(server, name, deployment)
+        self.log(host_name, server_name, 'WFLYSRV0025: WildFly started',
+                 thread='Controller Boot Thread')
+
+    def _stop_server(self, host_name, server_name):
+        host = self.root.children['host'][host_name]
+        host.children['server-config'][server_name].attributes[
+            'status'] = 'STOPPED'
+        # a stopped server keeps a placeholder without runtime resources
+        host.child('server', server_name, {
+            'name': server_name,
+            'server-state': 'STOPPED',
+            'host': host_name})
+
+    # logs
+
+    def log(self, host_name, server_name, message, level='INFO',
+            category='org.jboss.as', thread='ServerService Thread Pool -- 1',
+            name='server.log'):
+        """ Appends a line in the default pattern of WildFly's file
+        handlers to a log file of a server and returns it. """
+        with self._lock:
+            self.clock += datetime.timedelta(milliseconds=1)
+            line = LOG_FORMAT.format(self.clock,
+                                     self.clock.microsecond // 1000,
+                                     level, category, thread, message)
+            self.logs.setdefault((host_name, server_name, name),
+                                 []).append(line)
+        return line
+
+    def rotate_log(self, host_name, server_name, name='server.log'):
+        """ Moves a log file to <name>.1 and starts it afresh. """
+        with self._lock:
+            key = (host_name, server_name, name)
+            self.logs[(host_name, server_name, name + '.1')] = \
+                self.logs.pop(key, [])
+            self.logs[key] = []
+
+    def _op_read_log_file(self, request, resource):
+        address = request['address']
+        if [list(element)[0] for element in address] != \
+                ['host', 'server', 'subsystem']:
+            raise OperationFailed('read-log-file is only supported on the '
+                                  'logging subsystem of a server')
+        key = (address[0]['host'], address[1]['server'], request.get('name'))
+        if key not in self.logs:
+            raise OperationFailed('File {} was not found'.format(key[2]))
+        lines = self.logs[key]
+        count = int(request.get('lines', 10))
+        skip = int(request.get('skip', 0))
+        if str(request.get('tail', True)).lower() == 'true':
+            end = max(len(lines) - skip, 0)
+            return lines[max(end - count, 0) if count >= 0 else 0:end]
+        return lines[skip:skip + count] if count >= 0 else lines[skip:]
+
+    def _group_servers(self, group_name):
+        for host_name, server_name, config in self._server_configs(
+                group_name):
+            server = self.root.children['host'][host_name].children[
+                'server'][server_name]
+            if server.attributes['server-state'] != 'STOPPED':
+                yield server
+
+    def _deploy_on_server(self, server, name, deployment):
+        if deployment.attributes.get('enabled'):
+            server.child('deployment', name, {
+                'enabled': True,
+                'runtime-name': deployment.attributes.get(
+                    'runtime-name', name),
+                'status': 'FAILED' if name in self.failing else 'OK'})
+
+    # addressing
+
+    def _resolve(self, address):
+        """ Returns a list of (address, resource) pairs matching address,
+        which may contain wildcards. """
+        matches = [([], self.root)]
+        for element in address:
+            (child_type, name), = element.items()
+            resolved = []
+            for path, resource in matches:
+                children = resource.children.get(child_type, {})
+                names = sorted(children) if name == '*' else [name]
+                for child_name in names:
+                    if child_name in children:
+                        resolved.append((path + [{child_type: child_name}],
+                                         children[child_name]))
+            matches = resolved
+        return matches
+
+    def _resource(self, address):
+        matches = self._resolve(address)
+        if not matches:
+            raise OperationFailed(
+                'Management resource {} not found'.format(address))
+        return matches[0][1]
+
+    # operations
+
+    def execute(self, request):
+        """ Executes a management request and returns the response dict. """
+        with self._lock:
+            return self._execute(request)
+
+    def _execute(self, request):
+        operation = request.get('operation')
+        address = request.get('address', [])
+        if operation == 'composite':
+            return self._composite(request)
+        try:
+            if any('*' in element.values() for element in address):
+                return {'outcome': 'success',
+                        'result': self._wildcard(operation, request,
+                                                 address)}
+            handler = self._handler(operation)
+            # add is the only operation whose target does not exist yet
+            resource = None if operation == 'add' \
+                else self._resource(address)
+            return {'outcome': 'success',
+                    'result': handler(request, resource)}
+        except OperationFailed as e:
+            return {'outcome': 'failed',
+                    'failure-description': {
+                        'domain-failure-description': str(e)},
+                    'rolled-back': True}
+
+    def _handler(self, operation):
+        handler = getattr(self, '_op_' + str(operation).replace('-', '_'),
+                          None)
+        if handler is None:
+            raise OperationFailed(
+                'No operation named {} exists'.format(operation))
+        return handler
+
+    def _wildcard(self, operation, request, address):
+        if operation not in ('read-resource', 'read-attribute'):
+            raise OperationFailed(
+                'Wildcard address not supported by {}'.format(operation))
+        handler = self._handler(operation)
+        items = []
+        for path, resource in self._resolve(address):
+            try:
+                items.append({'address': path,
+                              'outcome': 'success',
+                              'result': handler(request, resource)})
+            except OperationFailed as e:
+                items.append({'address': path,
+                              'outcome': 'failed',
+                              'failure-description': str(e)})
+        return items
+
+    def _composite(self, request):
+        steps = request.get('steps', [])
+        # a composite that writes is rolled back as a whole when it fails
+        writes = any(not str(step.get('operation')).startswith('read-')
+                     for step in steps)
+        saved = (copy.deepcopy(self.root), set(self.contents)) \
+            if writes else None
+        results = {}
+        outcome = 'success'
+        failure = 'Composite operation failed'
+        for index, step in enumerate(steps, 1):
+            if outcome != 'success' and self.cancel_after_failure:
+                response = {'outcome': 'cancelled'}
+            else:
+                response = self._execute(step)
+            results['step-{}'.format(index)] = response
+            if response['outcome'] != 'success':
+                outcome = 'failed'
+        plan = request.get('operation-headers', {}).get('rollout-plan')
+        if outcome == 'success' and plan is not None:
+            failed = self._failed_groups(plan, steps)
+            if failed:
+                outcome = 'failed'
+                failure = 'Operation rolled back: too many failed servers ' \
+                    'in server groups {}'.format(', '.join(failed))
+        response = {'outcome': outcome, 'result': results}
+        if outcome != 'success':
+            response['failure-description'] = {
+                'domain-failure-description': failure}
+            if saved is not None:
+                self.root, self.contents = saved
+                response['rolled-back'] = True
+        return response
+
+    def _failed_groups(self, plan, steps):
+        """ Returns the server groups of a rollout plan with more servers
+        failing the deployments of steps than their max-failed-servers. """
+
+        policies = {}
+        for item in plan.get('in-series', []):
+            for groups in item.values():
+                policies.update(groups)
+        names = set(step['address'][1]['deployment']
+                    for step in steps
+                    if self._is_group_deployment(step.get('address', [])))
+        names.update(step['name'] for step in steps
+                     if step.get('operation') == 'replace-deployment')
+        failed = []
+        for group_name, policy in sorted(policies.items()):
+            servers = sum(
+                1 for server in self._group_servers(group_name)
+                if any(server.children.get('deployment', {}).get(
+                    name, Resource()).attributes.get('status') == 'FAILED'
+                    for name in names))
+            if servers > int((policy or {}).get('max-failed-servers', 0)):
+                failed.append(group_name)
+        return failed
+
+    def _op_read_resource(self, request, resource):
+        return resource.to_dict(request.get('recursive', False))
+
+    def _op_read_attribute(self, request, resource):
+        name = request.get('name')
+        if name not in resource.attributes:
+            raise OperationFailed('No known attribute {}'.format(name))
+        return copy.deepcopy(resource.attributes[name])
+
+    def _op_write_attribute(self, request, resource):
+        resource.attributes[request['name']] = request.get('value')
+
+    def _op_unset_attribute(self, request, resource):
+        resource.attributes.pop(request['name'], None)
+
+    def _op_read_children_names(self, request, resource):
+        return sorted(resource.children.get(request['child-type'], {}))
+
+    def _op_read_children_types(self, request, resource):
+        return sorted(resource.children)
+
+    def _op_read_children_resources(self, request, resource):
+        children = resource.children.get(request['child-type'], {})
+        return dict((name, child.to_dict())
+                    for name, child in children.items())
+
+    def _op_read_operation_names(self, request, resource):
+        return sorted(name[4:].replace('_', '-')
+                      for name in dir(self) if name.startswith('_op_'))
+
+    def _op_read_operation_description(self, request, resource):
+        name = request.get('name')
+        if name not in self._op_read_operation_names(request, resource):
+            raise OperationFailed('No operation named {}'.format(name))
+        return {'operation-name': name,
+                'description': 'The {} operation'.format(name),
+                'request-properties': {},
+                'reply-properties': {}}
+
+    def _op_read_resource_description(self, request, resource):
+        description = {
+            'description': 'A fake resource',
+            'attributes': dict(
+                (name, {'type': {'TYPE_MODEL_VALUE': type(value).__name__},
+                        'description': name})
+                for name, value in resource.attributes.items()),
+            'children': dict(
+                (child_type, {'description': child_type,
+                              'model-description': None})
+                for child_type in resource.children)}
+        if request.get('operations'):
+            description['operations'] = dict(
+                (name, self._op_read_operation_description(
+                    {'name': name}, resource))
+                for name in self._op_read_operation_names(request, resource))
+        return description
+
+    def _op_add(self, request, resource):
+        address = request['address']
+        parent = self._resource(address[:-1])
+        (child_type, name), = address[-1].items()
+        if name in parent.children.get(child_type, {}):
+            raise OperationFailed('Duplicate resource {}'.format(address))
+        attributes = dict((key, value) for key, value in request.items()
+                          if key not in ('operation', 'address'))
+        if len(address) == 1 and child_type == 'deployment':
+            for item in attributes.get('content', []):
+                if item.get('hash', {}).get('BYTES_VALUE') \
+                        not in self.contents:
+                    raise OperationFailed('No deployment content with hash '
+                                          '{}'.format(item['hash']))
+        child = parent.child(child_type, name, attributes)
+        if self._is_group_deployment(address):
+            for server in self._group_servers(
+                    address[0]['server-group']):
+                self._deploy_on_server(server, name, child)
+
+    def _op_remove(self, request, resource):
+        address = request['address']
+        parent = self._resource(address[:-1])
+        (child_type, name), = address[-1].items()
+        if self._is_group_deployment(address):
+            self._undeploy_from_servers(address[0]['server-group'], name)
+        del parent.children[child_type][name]
+
+    @staticmethod
+    def _is_group_deployment(address):
+        return len(address) == 2 and 'server-group' in address[0] \
+            and 'deployment' in address[1]
+
+    def _undeploy_from_servers(self, group_name, name):
+        for server in self._group_servers(group_name):
+            server.children.get('deployment', {}).pop(name, None)
+
+    def _op_deploy(self, request, resource):
+        address = request['address']
+        if not self._is_group_deployment(address):
+            raise OperationFailed('deploy is only supported on server-group '
+                                  'deployments')
+        resource.attributes['enabled'] = True
+        for server in self._group_servers(address[0]['server-group']):
+            self._deploy_on_server(server, address[1]['deployment'],
+                                   resource)
+
+    def _op_undeploy(self, request, resource):
+        address = request['address']
+        if not self._is_group_deployment(address):
+            raise OperationFailed('undeploy is only supported on '
+                                  'server-group deployments')
+        resource.attributes['enabled'] = False
+        self._undeploy_from_servers(address[0]['server-group'],
+                                    address[1]['deployment'])
+
+    def _op_replace_deployment(self, request, resource):
+        address = request['address']
+        if len(address) != 1 or 'server-group' not in address[0]:
+            raise OperationFailed('replace-deployment is only supported on '
+                                  'server groups')
+        deployments = resource.children.get('deployment', {})
+        for name in (request.get('name'), request.get('to-replace')):
+            if name not in deployments:
+                raise OperationFailed('No deployment {} in server group '
+                                      '{}'.format(name, address[0][
+                                          'server-group']))
+        group_name = address[0]['server-group']
+        self._undeploy_from_servers(group_name, request['to-replace'])
+        deployments[request['to-replace']].attributes['enabled'] = False
+        deployment = deployments[request['name']]
+        deployment.attributes['enabled'] = True
+        for server in self._group_servers(group_name):
+            self._deploy_on_server(server, request['name'], deployment)
+
+    def _op_upload_deployment_url(self, request, resource):
+        # the content is not fetched, its hash is derived from the url
+        digest = hashlib.sha1(request['url'].encode('utf-8')).digest()
+        self.contents.add(bytes_value(digest))
+        return {'BYTES_VALUE': bytes_value(digest)}
+
+    def add_content(self, digest):
+        """ Registers uploaded content and returns its BYTES_VALUE. """
+        with self._lock:
+            self.contents.add(bytes_value(digest))
+        return {'BYTES_VALUE': bytes_value(digest)}
+
+    def _servers_of(self, request):
+        address = request['address']
+        server_group = address[0]['server-group'] if address else None
+        return list(self._server_configs(server_group))
+
+    def _op_start_servers(self, request, resource):
+        for host_name, server_name, config in self._servers_of(request):
+            if config.attributes['status'] == 'STOPPED':
+                self._start_server(host_name, server_name)
+
+    def _op_stop_servers(self, request, resource):
+        for host_name, server_name, config in self._servers_of(request):
+            self._stop_server(host_name, server_name)
+
+    def _op_restart_servers(self, request, resource):
+        for host_name, server_name, config in self._servers_of(request):
+            self._stop_server(host_name, server_name)
+            self._start_server(host_name, server_name)
+
+    _op_reload_servers = _op_restart_servers
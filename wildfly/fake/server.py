@@ -0,0 +1,323 @@
+"""
+In-process stand-in for the WildFly HTTP management endpoint, answering
+/management requests from a DomainModel.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+from ..client import Client
+from .model import DomainModel
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+REALM = 'ManagementRealm'
+BLOCKSIZE = 64 * 1024
+# seconds a nonce is accepted, and number of nonces kept
+DEFAULT_NONCE_TTL = 300
+DEFAULT_MAX_NONCES = 1024
+
+
+def _md5(value):
+    return hashlib.md5(value.encode('utf-8')).hexdigest()
+
+
+class Stats(object):
+    """ Request counters of a FakeManagementServer. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.challenges = 0
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            self.operations = defaultdict(int)
+
+    def record(self, operation, received, sent):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+            if operation is not None:
+                self.operations[operation] += 1
+
+    def challenge(self):
+        with self._lock:
+            self.requests += 1
+            self.challenges += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {'requests': self.requests,
+                    'challenges': self.challenges,
+                    'bytes_received': self.bytes_received,
+                    'bytes_sent': self.bytes_sent,
+                    'operations': dict(self.operations)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, which would otherwise stall
+    # on delayed acknowledgements
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    # body
+
+    def _body_blocks(self):
+        """ Yields the request body in blocks, honouring chunked transfer
+        encoding. """
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return
+                remaining = size
+                while remaining:
+                    block = self.rfile.read(min(remaining, BLOCKSIZE))
+                    remaining -= len(block)
+                    yield block
+                self.rfile.readline()
+        else:
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining > 0:
+                block = self.rfile.read(min(remaining, BLOCKSIZE))
+                if not block:
+                    return
+                remaining -= len(block)
+                yield block
+
+    def _discard_body(self):
+        return sum(len(block) for block in self._body_blocks())
+
+    # authentication
+
+    def _authorization(self):
+        """ Returns 'valid' for a valid Authorization header, 'stale' for
+        a valid digest of an expired nonce, else None. """
+        server = self.server.fake
+        header = self.headers.get('Authorization', '')
+        if not header.startswith('Digest '):
+            return None
+        fields = dict(re.findall(r'(\w+)="?([^",]+)"?', header[7:]))
+        try:
+            if fields['username'] != server.username:
+                return None
+            ha1 = _md5('{}:{}:{}'.format(server.username, REALM,
+                                         server.password))
+            ha2 = _md5('{}:{}'.format(self.command, fields['uri']))
+            expected = _md5(':'.join([ha1, fields['nonce'], fields['nc'],
+                                      fields['cnonce'], fields['qop'], ha2]))
+        except KeyError:
+            return None
+        if expected != fields['response']:
+            return None
+        return 'valid' if server.valid_nonce(fields['nonce']) else 'stale'
+
+    def _challenge(self, stale=False):
+        self._discard_body()
+        self.server.fake.stats.challenge()
+        nonce = self.server.fake.new_nonce()
+        self.send_response(401)
+        self.send_header('WWW-Authenticate',
+                         'Digest realm="{}", nonce="{}", qop="auth", '
+                         'algorithm=MD5{}'.format(
+                             REALM, nonce, ', stale=true' if stale else ''))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    # requests
+
+    def _respond(self, body, operation, received):
+        data = json.dumps(body).encode('utf-8')
+        self.server.fake.delay(operation)
+        # recorded before replying, so the client sees up to date stats
+        self.server.fake.stats.record(operation, received, len(data))
+        self.send_response(200 if body.get('outcome') == 'success' else 500)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        authorization = self._authorization()
+        if authorization != 'valid':
+            return self._challenge(authorization == 'stale')
+        if self.path.rstrip('/') == '/management/add-content':
+            return self._add_content()
+        if self.path.rstrip('/') != '/management':
+            self._discard_body()
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            return self.end_headers()
+        data = b''.join(self._body_blocks())
+        try:
+            request = json.loads(data.decode('utf-8'))
+        except ValueError as e:
+            return self._respond({'outcome': 'failed',
+                                  'failure-description': str(e)},
+                                 None, len(data))
+        self._respond(self.server.fake.model.execute(request),
+                      request.get('operation'), len(data))
+
+    def _add_content(self):
+        """ Hashes the file part of a multipart upload as it arrives,
+        without holding the upload in memory. """
+        match = re.search(r'boundary=([^;]+)',
+                          self.headers.get('Content-Type', ''))
+        if match is None:
+            self._discard_body()
+            return self._respond({'outcome': 'failed',
+                                  'failure-description': 'Not multipart'},
+                                 'add-content', 0)
+        tail = '\r\n--{}--'.format(match.group(1).strip('"')).encode('ascii')
+        digest = hashlib.sha1()
+        pending = b''
+        in_file = False
+        received = 0
+        for block in self._body_blocks():
+            received += len(block)
+            pending += block
+            if not in_file:
+                start = pending.find(b'\r\n\r\n')
+                if start < 0:
+                    continue
+                pending = pending[start + 4:]
+                in_file = True
+            # keep enough bytes back to recognise the closing boundary
+            keep = len(tail) + 4
+            if len(pending) > keep:
+                digest.update(pending[:-keep])
+                pending = pending[-keep:]
+        end = pending.rfind(tail)
+        digest.update(pending[:end] if end >= 0 else pending)
+        self._respond({'outcome': 'success',
+                       'result': self.server.fake.model.add_content(
+                           digest.digest())},
+                      'add-content', received)
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeManagementServer(object):
+    """
+    In-process HTTP server speaking the WildFly /management JSON protocol
+    with digest authentication, backed by a DomainModel. Meant for offline
+    tests and reproducible client-side benchmarks:
+
+        with FakeManagementServer(DomainModel(hosts=10, servers=4)) as server:
+            client = server.client()
+            client.servers()
+            server.stats.requests
+
+    latency is the time, in seconds, added to every response; it may also
+    be a callable taking the operation name.
+
+    Nonces expire nonce_ttl seconds after they were issued, and only the
+    last max_nonces are kept, so memory does not grow with the number of
+    challenges. A request authenticated with an expired nonce is answered
+    with a stale=true challenge, as the real endpoint does.
+    """
+
+    def __init__(self, model=None, host='127.0.0.1', port=0,
+                 username='admin', password='admin', latency=0,
+                 nonce_ttl=DEFAULT_NONCE_TTL, max_nonces=DEFAULT_MAX_NONCES):
+        self.model = model if model is not None else DomainModel()
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.stats = Stats()
+        self.nonce_ttl = nonce_ttl
+        self.max_nonces = max_nonces
+        # nonces by expiry, oldest first
+        self.nonces = OrderedDict()
+        self._nonces_lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._httpd.server_address[0]
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        logger.debug('Fake management endpoint listening on {}:{}'.format(
+            self.host, self.port))
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def new_nonce(self):
+        nonce = hashlib.md5(os.urandom(16)).hexdigest()
+        now = time.time()
+        with self._nonces_lock:
+            self.nonces[nonce] = now + self.nonce_ttl
+            while self.nonces and (
+                    len(self.nonces) > self.max_nonces or
+                    self.nonces[next(iter(self.nonces))] < now):
+                self.nonces.popitem(last=False)
+        return nonce
+
+    def valid_nonce(self, nonce):
+        with self._nonces_lock:
+            expires = self.nonces.get(nonce)
+        return expires is not None and expires >= time.time()
+
+    def expire_nonces(self):
+        """ Makes every nonce issued so far stale. """
+        with self._nonces_lock:
+            self.nonces.clear()
+
+    def delay(self, operation):
+        latency = self.latency(operation) if callable(self.latency) \
+            else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def client(self, **kwargs):
+        """ Returns a Client connected to this endpoint. """
+        kwargs.setdefault('username', self.username)
+        kwargs.setdefault('password', self.password)
+        return Client(self.host, self.port, **kwargs)
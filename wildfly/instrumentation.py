@@ -0,0 +1,240 @@
+import bisect
+import logging
+import threading
+from collections import namedtuple
+
+from .address import Address
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# upper bounds, in seconds, of the latency buckets: 0.5ms to about 16s
+DEFAULT_BUCKETS = tuple(0.0005 * 2 ** i for i in range(16))
+
+
+Event = namedtuple('Event', [
+    'operation',       # operation name, 'composite' for batches
+    'address',         # address pattern, e.g. /host=*/server=*
+    'steps',           # number of steps of a composite operation, else 1
+    'latency',         # seconds spent on the request
+    'status_code',     # HTTP status code
+    'outcome',         # outcome of the operation, None if unknown
+    'bytes_sent',      # size of the request body
+    'bytes_received',  # size of the response body
+    'round_trips',     # HTTP round-trips, including digest challenges
+    'cached',          # True if the response came from the read cache
+    'breakdown',       # StepEvents of the steps of the request
+])
+
+# a step of a request: every step of a composite operation, else the
+# request itself
+StepEvent = namedtuple('StepEvent', ['operation', 'address', 'outcome'])
+
+
+def address_pattern(address):
+    """ Returns the address pattern of an address, with every resource name
+    replaced by a wildcard: [{'host': 'a'}, {'server': 'b'}] gives
+    /host=*/server=*. """
+
+    if isinstance(address, list):
+        return '/' + '/'.join('{}=*'.format(key)
+                              for element in address
+                              for key in element)
+    return Address.of(address).pattern.path
+
+
+def breakdown(request, body):
+    """ Returns the StepEvents of a request, with the outcomes found in
+    the decoded response body (None if it could not be decoded). """
+
+    body = body if isinstance(body, dict) else {}
+    if request.get('operation') != 'composite':
+        return (StepEvent(request.get('operation'),
+                          address_pattern(request.get('address', [])),
+                          body.get('outcome')),)
+    results = body.get('result')
+    if not isinstance(results, dict):
+        results = {}
+    return tuple(
+        StepEvent(step.get('operation'),
+                  address_pattern(step.get('address', [])),
+                  (results.get('step-{}'.format(number)) or {}).get(
+                      'outcome'))
+        for number, step in enumerate(request.get('steps', []), 1))
+
+
+class Scope(object):
+    """
+    Collects the events of the management requests issued by the thread
+    that entered it, including the requests fanned out to the client's
+    worker threads, and forwards them to its observers:
+
+        with client.instrument() as scope:
+            client.deployments()
+        scope.requests, scope.latency
+    """
+
+    def __init__(self, client, observers=()):
+        self.client = client
+        self.observers = list(observers)
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.client._enter_scope(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.client._exit_scope(self)
+
+    def __call__(self, event):
+        with self._lock:
+            self.events.append(event)
+        for observer in self.observers:
+            observer(event)
+
+    @property
+    def requests(self):
+        """ Number of HTTP round-trips, cached reads excluded. """
+        return sum(event.round_trips for event in self.events)
+
+    @property
+    def latency(self):
+        """ Total time spent on management requests, in seconds. """
+        return sum(event.latency for event in self.events)
+
+    @property
+    def bytes_sent(self):
+        return sum(event.bytes_sent for event in self.events)
+
+    @property
+    def bytes_received(self):
+        return sum(event.bytes_received for event in self.events)
+
+    def breakdown(self):
+        """ Returns the number of steps, and of failed steps, of the
+        collected requests by 'operation address', which tells what the
+        composite operations of a call were made of. """
+
+        with self._lock:
+            events = list(self.events)
+        steps = {}
+        for event in events:
+            for step in event.breakdown:
+                counts = steps.setdefault(
+                    '{} {}'.format(step.operation, step.address),
+                    {'count': 0, 'failed': 0})
+                counts['count'] += 1
+                if step.outcome != 'success':
+                    counts['failed'] += 1
+        return steps
+
+    def summary(self):
+        return {'operations': len(self.events),
+                'requests': self.requests,
+                'cached': sum(1 for event in self.events if event.cached),
+                'latency': self.latency,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received}
+
+
+class LatencyHistogram(object):
+    """
+    In-memory observer aggregating events per operation and address
+    pattern: counts, failures, bytes and a latency histogram from which
+    percentiles are estimated. Thread safe.
+
+        histogram = LatencyHistogram()
+        client.add_observer(histogram)
+        ...
+        histogram.percentile(99, 'composite')
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def __call__(self, event):
+        key = (event.operation, event.address)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'count': 0,
+                    'failed': 0,
+                    'cached': 0,
+                    'requests': 0,
+                    'bytes_sent': 0,
+                    'bytes_received': 0,
+                    'latency_total': 0.0,
+                    'latency_max': 0.0,
+                    'counts': [0] * (len(self.buckets) + 1)}
+            series['count'] += 1
+            if event.outcome != 'success':
+                series['failed'] += 1
+            if event.cached:
+                series['cached'] += 1
+            series['requests'] += event.round_trips
+            series['bytes_sent'] += event.bytes_sent
+            series['bytes_received'] += event.bytes_received
+            series['latency_total'] += event.latency
+            series['latency_max'] = max(series['latency_max'], event.latency)
+            series['counts'][bisect.bisect_left(self.buckets,
+                                                event.latency)] += 1
+
+    def _merged(self, operation=None, address=None):
+        counts = [0] * (len(self.buckets) + 1)
+        latency_max = 0.0
+        for (op, pattern), series in self._series.items():
+            if operation in (None, op) and address in (None, pattern):
+                counts = [a + b for a, b in zip(counts, series['counts'])]
+                latency_max = max(latency_max, series['latency_max'])
+        return counts, latency_max
+
+    def percentile(self, p, operation=None, address=None):
+        """ Returns the upper bound of the bucket holding the p-th
+        percentile latency of the matching events, or None if there are
+        none. """
+
+        with self._lock:
+            counts, latency_max = self._merged(operation, address)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = p / 100.0 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], latency_max)
+                return latency_max
+        return latency_max
+
+    def stats(self):
+        """ Returns the aggregates keyed by 'operation address'. """
+
+        with self._lock:
+            series = dict(self._series)
+        stats = {}
+        for (operation, address), values in series.items():
+            stats['{} {}'.format(operation, address)] = {
+                'count': values['count'],
+                'failed': values['failed'],
+                'cached': values['cached'],
+                'requests': values['requests'],
+                'bytes_sent': values['bytes_sent'],
+                'bytes_received': values['bytes_received'],
+                'latency': {
+                    'mean': values['latency_total'] / values['count'],
+                    'max': values['latency_max'],
+                    'p50': self.percentile(50, operation, address),
+                    'p90': self.percentile(90, operation, address),
+                    'p99': self.percentile(99, operation, address)}}
+        return stats
@@ -0,0 +1,324 @@
+import heapq
+import logging
+import re
+import time
+from collections import namedtuple
+
+from .address import address_list
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_LOG_FILE = 'server.log'
+DEFAULT_FOLLOW_INTERVAL = 1.0
+DEFAULT_CHUNK_LINES = 1000
+# probes sent in one composite while counting the lines of a file, and
+# the factor by which their offsets grow until one is past its end
+DEFAULT_PROBES = 4
+PROBE_GROWTH = 8
+
+# severity of the JBoss Logging and java.util.logging levels
+LEVELS = {'TRACE': 0, 'FINEST': 0, 'FINER': 0,
+          'DEBUG': 1, 'FINE': 1, 'CONFIG': 1,
+          'INFO': 2,
+          'WARN': 3, 'WARNING': 3,
+          'ERROR': 4, 'SEVERE': 4,
+          'FATAL': 5}
+
+# start of a record in the default pattern of the WildFly file handlers,
+# %d{yyyy-MM-dd HH:mm:ss,SSS} %-5p [%c] (%t) %s%e%n; timestamps in that
+# form are ordered as strings
+RECORD = re.compile(r'(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) +([A-Z]+) ')
+
+# a line of a server log; sequence orders the lines of a server sharing a
+# timestamp. The lines following the first one of a record (e.g. a stack
+# trace) have its timestamp and level.
+LogLine = namedtuple('LogLine', ['timestamp', 'host', 'server', 'sequence',
+                                 'level', 'line'])
+
+
+class LogFollower(object):
+    """
+    Reads the lines appended to a log file of a server since the previous
+    poll. read-log-file is used from the head of the file (tail=false) with
+    skip set to the number of lines already read, so every line is
+    transferred once. The first poll counts the lines of the file (see
+    line_count) and returns only its last `lines` lines.
+
+    A rotated log file is detected by reading again the last line returned:
+    when it is missing or different, the file is read from its start. The
+    lines written to the old file between the last poll and the rotation
+    are not returned.
+    """
+
+    def __init__(self, client, address, name=DEFAULT_LOG_FILE, lines=0,
+                 chunk_lines=DEFAULT_CHUNK_LINES, probes=DEFAULT_PROBES):
+        self.client = client
+        self.address = list(address_list(address))
+        self.name = name
+        self.lines = lines
+        self.chunk_lines = chunk_lines
+        self.probes = probes
+        # number of lines of the file read so far, and the last of them
+        self.position = None
+        self.last = None
+        self.rotations = 0
+
+    def _parameters(self, skip, lines):
+        return {'name': self.name, 'tail': False, 'skip': skip,
+                'lines': lines}
+
+    def _read(self, skip, lines):
+        response = self.client.execute('read-log-file',
+                                       self._parameters(skip, lines),
+                                       self.address)
+        if not response.is_success():
+            raise RuntimeError('Failed to read {} of {}: {}'.format(
+                self.name, self.address, response.failure))
+        return response.result or []
+
+    def line_count(self):
+        """ Returns the number of lines of the file and its last line.
+
+        The last line is read from the tail of the file. The lines are
+        counted with one-line reads from the head of the file, `probes` to
+        a composite: at offsets growing from chunk_lines by PROBE_GROWTH
+        until one is past the end, then splitting the interval left until
+        it holds at most chunk_lines lines, which a last read returns.
+
+        The controller reads a file from its head up to the offset of a
+        probe, so every probe near the end of a file of N lines costs
+        about a full read of it. Counting N lines takes about
+        probes * log(N / chunk_lines, probes + 1) such reads, in
+        log(N / chunk_lines, probes + 1) composites plus those needed to
+        pass the end: with the defaults, the controller reads a file of a
+        million lines about 18 times over, in 7 requests. """
+
+        last = -1  # greatest offset known to hold a line
+        end = None  # smallest offset known to be past the end
+        tail = None
+        while end is None or end - last - 1 > self.chunk_lines:
+            if end is None:
+                skips = [last + self.chunk_lines * PROBE_GROWTH ** i
+                         for i in range(self.probes)]
+            else:
+                gap = end - last
+                skips = sorted(set(last + gap * i // (self.probes + 1)
+                                   for i in range(1, self.probes + 1)))
+            with self.client.batch() as batch:
+                if tail is None:
+                    tail = batch.execute('read-log-file',
+                                         {'name': self.name, 'tail': True,
+                                          'lines': 1},
+                                         self.address)
+                steps = [batch.execute('read-log-file',
+                                       self._parameters(skip, 1),
+                                       self.address)
+                         for skip in skips]
+            for step in [tail] + steps:
+                if not step.is_success():
+                    raise RuntimeError('Failed to read {} of {}: {}'.format(
+                        self.name, self.address, step.failure_description))
+            for skip, step in zip(skips, steps):
+                if step.result() and skip > last:
+                    last = skip
+                elif not step.result() and (end is None or skip < end):
+                    end = skip
+        count = last + 1
+        if end - last > 1:
+            count += len(self._read(last + 1, end - last - 1))
+        line = tail.result()
+        return count, line[0] if line else None
+
+    def _start(self):
+        count, self.last = self.line_count()
+        self.position = count
+        if not self.lines or not count:
+            return []
+        skip = max(count - self.lines, 0)
+        return self._read(skip, count - skip)
+
+    def poll(self):
+        """ Returns the lines appended since the last poll. """
+
+        if self.position is None:
+            return self._start()
+        new = []
+        if self.position:
+            # the last line read is read again to check that the file was
+            # not rotated
+            result = self._read(self.position - 1, self.chunk_lines + 1)
+            if result and result[0] == self.last:
+                new, result = result[1:], result[1:]
+            else:
+                logger.info('{} of {} was rotated'.format(self.name,
+                                                          self.address))
+                self.rotations += 1
+                self.position = 0
+                self.last = None
+        if not self.position:
+            result = self._read(0, self.chunk_lines)
+            new = list(result)
+        while len(result) == self.chunk_lines:
+            result = self._read(self.position + len(new), self.chunk_lines)
+            new.extend(result)
+        if new:
+            self.position += len(new)
+            self.last = new[-1]
+        return new
+
+    def follow(self, interval=DEFAULT_FOLLOW_INTERVAL, timeout=None):
+        """ Yields the lines of the file as they are appended, polling
+        every interval seconds, for at most timeout seconds. """
+
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            for line in self.poll():
+                yield line
+            if deadline is not None and time.time() + interval > deadline:
+                return
+            time.sleep(interval)
+
+
+class LogStream(object):
+    """
+    Lines of a log file of several servers, merged in timestamp order. The
+    first page of every server is read in one composite operation, the
+    following pages of a server only once the merge has consumed the
+    previous one, so at most one page per server is held in memory
+    whatever the number of lines read.
+
+    Records are filtered by level and pattern before they are merged: a
+    record is kept if its level is at least `level` and `pattern` matches
+    one of its lines.
+
+        for line in LogStream(client, [('master', 'server-one'),
+                                       ('slave', 'server-two')],
+                              level='WARN'):
+            print(line.host, line.server, line.line)
+    """
+
+    def __init__(self, client, servers, name=DEFAULT_LOG_FILE, lines=100,
+                 level=None, pattern=None, page_lines=DEFAULT_CHUNK_LINES):
+        self.client = client
+        self.servers = list(servers)
+        self.name = name
+        self.lines = lines
+        self.page_lines = page_lines
+        if level is not None and level.upper() not in LEVELS:
+            raise ValueError('Unknown log level {}, expected one of '
+                             '{}'.format(level, ', '.join(sorted(LEVELS))))
+        self.level = None if level is None else LEVELS[level.upper()]
+        self.pattern = pattern \
+            if pattern is None or hasattr(pattern, 'search') \
+            else re.compile(pattern)
+
+    @staticmethod
+    def _address(host, server):
+        return [{'host': host}, {'server': server}, {'subsystem': 'logging'}]
+
+    def _starts(self):
+        """ Returns the offset of the first line read of every server, None
+        for a single tail read. """
+
+        if 0 <= self.lines <= self.page_lines:
+            return [None] * len(self.servers)
+        if self.lines < 0:
+            return [0] * len(self.servers)
+
+        def start(server):
+            count, last = LogFollower(self.client, self._address(*server),
+                                      self.name).line_count()
+            return max(count - self.lines, 0)
+        return self.client._map(start, self.servers)
+
+    def _parameters(self, skip, lines):
+        if skip is None:
+            return {'name': self.name, 'tail': True, 'lines': lines}
+        return {'name': self.name, 'tail': False, 'skip': skip,
+                'lines': lines}
+
+    def _page_size(self, skip, remaining):
+        if skip is None:
+            return remaining
+        if remaining < 0:
+            return self.page_lines
+        return min(self.page_lines, remaining)
+
+    def _pages(self, server, skip, first):
+        """ Yields the pages of a server, reading them as needed. """
+
+        remaining = self.lines
+        size = self._page_size(skip, remaining)
+        page = first
+        while True:
+            yield page
+            if skip is None or len(page) < size:
+                return
+            skip += len(page)
+            if remaining >= 0:
+                remaining -= len(page)
+                if not remaining:
+                    return
+            size = self._page_size(skip, remaining)
+            response = self.client.execute(
+                'read-log-file', self._parameters(skip, size),
+                self._address(*server))
+            if not response.is_success():
+                logger.warning('Failed to read {} of {}: {}'.format(
+                    self.name, server, response.failure))
+                return
+            page = response.result or []
+
+    def _keep(self, level, record):
+        if self.level is not None and LEVELS.get(level, -1) < self.level:
+            return False
+        return self.pattern is None or any(
+            self.pattern.search(line) for line in record)
+
+    def _records(self, server, pages):
+        """ Yields the LogLines of the records kept from pages. """
+
+        host, name = server
+        sequence = 0
+        record = []
+        for page in pages:
+            for line in page:
+                if record and RECORD.match(line):
+                    for log_line in self._flush(host, name, sequence,
+                                                record):
+                        yield log_line
+                    sequence += len(record)
+                    record = []
+                record.append(line)
+        for log_line in self._flush(host, name, sequence, record):
+            yield log_line
+
+    def _flush(self, host, server, sequence, record):
+        match = RECORD.match(record[0]) if record else None
+        # lines preceding the first record read have no timestamp
+        timestamp, level = match.groups() if match else ('', None)
+        if not record or not self._keep(level, record):
+            return []
+        return [LogLine(timestamp, host, server, sequence + index, level,
+                        line)
+                for index, line in enumerate(record)]
+
+    def __iter__(self):
+        starts = self._starts()
+        with self.client.batch() as batch:
+            steps = [batch.execute(
+                'read-log-file',
+                self._parameters(skip, self._page_size(skip, self.lines)),
+                self._address(*server))
+                for server, skip in zip(self.servers, starts)]
+        sources = []
+        for server, skip, step in zip(self.servers, starts, steps):
+            if not step.is_success():
+                logger.warning('Failed to read {} of {}: {}'.format(
+                    self.name, server, step.failure_description))
+                continue
+            sources.append(self._records(
+                server, self._pages(server, skip, step.result() or [])))
+        return heapq.merge(*sources)
@@ -0,0 +1,250 @@
+import logging
+
+from . import util
+from .address import Address, address_list
+from .snapshot import Node, Snapshot, add_resource
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Resources of a domain re-read by an incremental refresh: the hosts, their
+# server configs and servers (status, server-state and the names of their
+# children), the server groups and their deployments, the content
+# repository, and the status of the deployments on the servers. A watch is
+# either an address, whose resources are read without recursion, or an
+# (address, attribute) pair, of which only that attribute is read.
+DOMAIN_WATCHES = [
+    [],
+    [{'host': '*'}],
+    [{'host': '*'}, {'server-config': '*'}],
+    [{'host': '*'}, {'server': '*'}],
+    ([{'host': '*'}, {'server': '*'}, {'deployment': '*'}], 'status'),
+    [{'server-group': '*'}],
+    [{'server-group': '*'}, {'deployment': '*'}],
+    [{'deployment': '*'}],
+]
+
+
+def _watch(watch):
+    """ Returns the (address, attribute) of a watch, attribute being None
+    for a resource watch. """
+    if isinstance(watch, tuple):
+        return list(watch[0]), watch[1]
+    return list(watch), None
+
+
+def default_watches(address):
+    """ Returns the DOMAIN_WATCHES at or below address, narrowed to it. """
+    address = address_list(address)
+    key = util.address_tuple(address)
+    watches = []
+    for watch in DOMAIN_WATCHES:
+        pattern, attribute = _watch(watch)
+        if len(pattern) >= len(key) and util.address_startswith(
+                util.address_tuple(pattern), key):
+            pattern = list(address) + pattern[len(key):]
+            watches.append(pattern if attribute is None
+                           else (pattern, attribute))
+    return watches or [list(address)]
+
+
+def _is_wildcard(key):
+    return any(name == '*' for child_type, name in key)
+
+
+def _under(key, roots):
+    """ Returns True if key lies at or below one of roots. """
+    return any(key[:length] in roots for length in range(len(key) + 1))
+
+
+class Refresher(object):
+    """
+    Keeps a Snapshot of a management subtree up to date. The first refresh
+    reads the whole subtree; later ones re-read, in one composite operation
+    and without recursion, only the watched resources (address patterns
+    with '*' wildcards, see DOMAIN_WATCHES), then read recursively the
+    subtrees that appeared or were marked as changed. Resources that
+    are not watched keep their values until they are marked or a full
+    refresh is made. Every refresh returns the Diff from the previous
+    snapshot, and unchanged resources are shared between snapshots.
+
+        refresher = client.refresher()
+        refresher.refresh()                  # everything added
+        ...
+        for change, path in refresher.refresh().paths():
+            ...
+    """
+
+    def __init__(self, client, address=[], watches=None, runtime=True):
+        self.client = client
+        self.address = list(address_list(address))
+        self.watches = default_watches(address) if watches is None \
+            else list(watches)
+        self.runtime = runtime
+        self.snapshot = None
+        self._marked = set()
+
+    def mark(self, address):
+        """ Flags the subtree at address to be read again by the next
+        refresh. """
+        self._marked.add(Address.of(address))
+
+    def refresh(self, full=False):
+        """ Updates the snapshot and returns the Diff from the previous
+        one. """
+
+        previous = self.snapshot
+        snapshot = None
+        if previous is not None and not full:
+            snapshot = self._incremental(previous)
+        if snapshot is None:
+            snapshot = Snapshot.load(self.client, self.address,
+                                     runtime=self.runtime)
+            if previous is None:
+                previous = Snapshot.from_nodes([], self.address)
+        self._marked.clear()
+        self.snapshot = snapshot
+        diff = previous.diff(snapshot)
+        logger.debug('Refreshed {}: {}'.format(self.address, diff))
+        return diff
+
+    def _incremental(self, previous):
+        """ Returns the refreshed snapshot, or None if the watched
+        resources could not be read and a full refresh is needed. """
+
+        with self.client.batch() as batch:
+            steps = []
+            for watch in self.watches:
+                address, attribute = _watch(watch)
+                if attribute is None:
+                    steps.append(batch.execute(
+                        'read-resource', {'include-runtime': self.runtime},
+                        address))
+                else:
+                    steps.append(batch.read_attribute(attribute, address))
+        if not all(step.is_success() for step in steps):
+            logger.info('Incremental refresh of {} failed, reading it '
+                        'again'.format(self.address))
+            return None
+
+        index = dict(previous._index)
+        stale = set(self._marked)
+        removed = set()
+        for watch, step in zip(self.watches, steps):
+            address, attribute = _watch(watch)
+            key = util.address_tuple(address)
+            if _is_wildcard(key):
+                result = step.result() or []
+                # resources failing the read (e.g. lacking the attribute)
+                # still exist
+                matched = set(util.address_tuple(item['address'])
+                              for item in result)
+                removed.update(node.address for node in previous.find(key)
+                               if node.address not in matched)
+                items = [(util.address_tuple(item['address']),
+                          item.get('result'))
+                         for item in result
+                         if item.get('outcome') == 'success']
+            else:
+                items = [(key, step.result())]
+            for item_key, result in items:
+                if attribute is None:
+                    self._update(index, item_key, result or {}, stale,
+                                 removed)
+                else:
+                    self._update_attribute(index, item_key, attribute,
+                                           result, stale)
+
+        self._remove(index, removed)
+        self._read(index, [key for key in stale if not _under(key, removed)])
+        return Snapshot.from_nodes(index.values(), self.address)
+
+    @staticmethod
+    def _update(index, key, result, stale, removed):
+        """ Replaces the node at key with a non recursive read of it,
+        flagging new resources and children as stale and the children that
+        disappeared as removed. """
+
+        old = index.get(key)
+        if old is None:
+            stale.add(key)
+            return
+        node = add_resource({}, key, result, old._children)
+        for child_type in set(node._children) | set(old._children):
+            names = set(node._children.get(child_type, ()))
+            old_names = set(old._children.get(child_type, ()))
+            stale.update(key + ((child_type, name),)
+                         for name in names - old_names)
+            removed.update(key + ((child_type, name),)
+                           for name in old_names - names)
+        if node._attributes != old._attributes or \
+                node._children != old._children:
+            index[key] = node
+
+    @staticmethod
+    def _update_attribute(index, key, attribute, value, stale):
+        old = index.get(key)
+        if old is None:
+            stale.add(key)
+        elif old._attributes.get(attribute) != value:
+            attributes = dict(old._attributes)
+            attributes[attribute] = value
+            index[key] = Node(key, attributes, old._children)
+
+    @staticmethod
+    def _set_child(index, key, present):
+        """ Adds or removes key from the children of its parent node. """
+        parent = index.get(key[:-1])
+        if parent is None:
+            return
+        child_type, name = key[-1]
+        names = set(parent._children.get(child_type, ()))
+        if (name in names) == present:
+            return
+        children = dict(parent._children)
+        if present:
+            names.add(name)
+        else:
+            names.discard(name)
+        if names:
+            children[child_type] = tuple(sorted(names))
+        else:
+            del children[child_type]
+        index[parent.address] = Node(parent.address, parent._attributes,
+                                     children)
+
+    def _remove(self, index, removed):
+        for key in [key for key in index if _under(key, removed)]:
+            del index[key]
+        for key in removed:
+            if key:
+                self._set_child(index, key, False)
+
+    def _read(self, index, stale):
+        """ Reads the stale subtrees recursively into index. """
+
+        # subtrees under another stale subtree are read with it
+        roots = set(stale)
+        stale = sorted(key for key in roots
+                       if not any(key[:length] in roots
+                                  for length in range(len(key))))
+        if not stale:
+            return
+        with self.client.batch() as batch:
+            steps = [batch.execute('read-resource',
+                                   {'recursive': True,
+                                    'include-runtime': self.runtime},
+                                   [{child_type: name}
+                                    for child_type, name in key])
+                     for key in stale]
+        for key, step in zip(stale, steps):
+            for address in [address for address in index
+                            if _under(address, set([key]))]:
+                del index[address]
+            if step.is_success():
+                add_resource(index, key, step.result() or {})
+                self._set_child(index, key, True)
+            elif key:
+                # the resource went away in the meantime
+                self._set_child(index, key, False)
@@ -0,0 +1,73 @@
+from .codec import DEFAULT_CODEC
+
+KEY_OUTCOME = 'outcome'
+KEY_RESULT = 'result'
+KEY_FAILURE = 'failure-description'
+
+_UNPARSED = object()
+
+
+class ManagementResponse(object):
+    """
+    Response of a management operation. The JSON body is decoded once, on
+    first access, straight from the raw content with the client's codec,
+    and shared by json(), outcome, result and failure; every other
+    attribute (status_code, reason, headers, content, ...) is that of the
+    underlying requests.Response.
+
+    The decoded body is owned by the caller of execute(): responses served
+    from the read cache are wrapped afresh, so changes made to a result do
+    not leak into later reads.
+    """
+
+    __slots__ = ('http_response', 'codec', '_body')
+
+    def __init__(self, http_response, codec=DEFAULT_CODEC):
+        self.http_response = http_response
+        self.codec = codec
+        self._body = _UNPARSED
+
+    def __getattr__(self, name):
+        if name in ManagementResponse.__slots__:
+            # not yet set, e.g. while unpickling
+            raise AttributeError(name)
+        return getattr(self.http_response, name)
+
+    def __getstate__(self):
+        return self.http_response, self.codec, self._body
+
+    def __setstate__(self, state):
+        self.http_response, self.codec, self._body = state
+
+    def __bool__(self):
+        return self.http_response.ok
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return '<ManagementResponse [{}]>'.format(
+            self.http_response.status_code)
+
+    def json(self):
+        """ Returns the decoded body. """
+        if self._body is _UNPARSED:
+            self._body = self.codec.loads(self.http_response.content)
+        return self._body
+
+    @property
+    def outcome(self):
+        return self.json().get(KEY_OUTCOME)
+
+    @property
+    def result(self):
+        """ The result of the operation, None if it has none. """
+        return self.json().get(KEY_RESULT)
+
+    @property
+    def failure(self):
+        """ The failure description of the operation, None if it
+        succeeded. """
+        return self.json().get(KEY_FAILURE)
+
+    def is_success(self):
+        return self.outcome == 'success'
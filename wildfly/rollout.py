@@ -0,0 +1,227 @@
+import logging
+import time
+
+from . import util
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_WAVE_SIZE = 1
+DEFAULT_MAX_FAILED_SERVERS = 0
+DEFAULT_HEALTH_TIMEOUT = 300
+DEFAULT_HEALTH_INTERVAL = 2.0
+
+
+def rollout_plan(server_groups, max_failed_servers=DEFAULT_MAX_FAILED_SERVERS):
+    """ Returns the operation headers of a rollout to server_groups at
+    once, rolled back across all of them as soon as more than
+    max_failed_servers servers of a group fail. """
+
+    policies = dict((group, {'max-failed-servers': max_failed_servers})
+                    for group in server_groups)
+    if len(policies) == 1:
+        step = {'server-group': policies}
+    else:
+        step = {'concurrent-groups': policies}
+    return {'rollout-plan': {'in-series': [step],
+                             'rollback-across-groups': True}}
+
+
+def deployment_health(client, name, server_groups,
+                      max_failed_servers=DEFAULT_MAX_FAILED_SERVERS):
+    """ Returns True once the deployment runs (status OK) on every running
+    server of server_groups, False as soon as it failed on more than
+    max_failed_servers servers of a group, and None while it is still
+    starting. The servers are read in a single composite operation. """
+
+    with client.batch() as batch:
+        groups = batch.read_attribute(
+            'group', [{'host': '*'}, {'server-config': '*'}])
+        states = batch.read_attribute(
+            'server-state', [{'host': '*'}, {'server': '*'}])
+        statuses = batch.read_attribute(
+            'status', [{'host': '*'}, {'server': '*'}, {'deployment': name}])
+
+    group_of = dict(((address['host'], address['server-config']), group)
+                    for address, group in util.wildcard_results(
+                        groups.result()))
+    status_of = dict(((address['host'], address['server']), status)
+                     for address, status in util.wildcard_results(
+                         statuses.result()))
+    failed = dict((group, 0) for group in server_groups)
+    healthy = True
+    for address, state in util.wildcard_results(states.result()):
+        key = (address['host'], address['server'])
+        if group_of.get(key) not in failed or \
+                str(state).lower() != 'running':
+            continue
+        status = status_of.get(key)
+        if status == 'FAILED':
+            failed[group_of[key]] += 1
+        if status != 'OK':
+            healthy = False
+    if any(count > max_failed_servers for count in failed.values()):
+        return False
+    return True if healthy else None
+
+
+class Rollout(object):
+    """
+    Rolls a deployment of the content repository out to server groups in
+    waves of wave_size groups. Each wave is a single composite operation
+    with a rollout plan deploying to its groups concurrently, which the
+    domain controller rolls back across the groups of the wave when more
+    than max_failed_servers servers of a group fail. A wave is then
+    health-gated: health_check(client, name, server_groups) is polled
+    every interval seconds until it returns True, and the wave fails if it
+    returns False or timeout seconds pass. The default health check is
+    deployment_health.
+
+    A group is moved to the deployment from the one of replaces it has
+    enabled (e.g. the previous version of the artifact) with
+    replace-deployment; otherwise the deployment is added to it, or
+    enabled if it is already assigned to it. When a wave fails, all the
+    groups changed by the rollout are restored in one composite operation,
+    and the deployment is removed from the content repository if
+    remove_content is set.
+
+        rollout = Rollout(client, 'app-1.1.war', groups, wave_size=5,
+                          replaces=['app-1.0.war']).run()
+        if rollout.failed:
+            ...
+    """
+
+    def __init__(self, client, name, server_groups,
+                 wave_size=DEFAULT_WAVE_SIZE,
+                 max_failed_servers=DEFAULT_MAX_FAILED_SERVERS,
+                 health_check=None, timeout=DEFAULT_HEALTH_TIMEOUT,
+                 interval=DEFAULT_HEALTH_INTERVAL, replaces=(),
+                 remove_content=False):
+        if wave_size < 1:
+            raise ValueError('wave_size must be a positive integer')
+        self.client = client
+        self.name = name
+        server_groups = list(server_groups)
+        self.waves = [server_groups[i:i + wave_size]
+                      for i in range(0, len(server_groups), wave_size)]
+        self.max_failed_servers = max_failed_servers
+        self.health_check = health_check
+        self.timeout = timeout
+        self.interval = interval
+        self.replaces = list(replaces)
+        self.remove_content = remove_content
+        # groups deployed so far, and the requests undoing their changes
+        self.deployed = []
+        self._undo = []
+        self.failed = None
+        self.rolled_back = False
+
+    def _assignments(self):
+        """ Returns the deployments assigned to every server group, with
+        whether they are enabled. """
+
+        response = self.client.execute(
+            'read-attribute', {'name': 'enabled'},
+            [{'server-group': '*'}, {'deployment': '*'}])
+        assignments = {}
+        if util.is_success(response):
+            for address, enabled in util.wildcard_results(
+                    response.json()['result']):
+                assignments.setdefault(address['server-group'], {})[
+                    address['deployment']] = enabled
+        return assignments
+
+    @staticmethod
+    def _request(operation, address, **parameters):
+        request = {'operation': operation, 'address': address}
+        request.update(parameters)
+        return request
+
+    def _steps(self, group, assigned):
+        """ Returns the requests deploying to group, and those undoing
+        them. """
+
+        address = [{'server-group': group}, {'deployment': self.name}]
+        if assigned.get(self.name):
+            return [], []
+        if self.name in assigned:
+            return ([self._request('deploy', address)],
+                    [self._request('undeploy', address)])
+        previous = [name for name in self.replaces if assigned.get(name)]
+        if previous:
+            group_address = [{'server-group': group}]
+            return ([self._request('add', address, enabled=False),
+                     self._request('replace-deployment', group_address,
+                                   name=self.name,
+                                   **{'to-replace': previous[0]})],
+                    [self._request('replace-deployment', group_address,
+                                   name=previous[0],
+                                   **{'to-replace': self.name}),
+                     self._request('remove', address)])
+        return ([self._request('add', address, enabled=True)],
+                [self._request('remove', address)])
+
+    def run(self):
+        """ Runs the waves in order and returns the rollout. """
+
+        assignments = self._assignments()
+        for number, wave in enumerate(self.waves, 1):
+            steps, undo = [], []
+            for group in wave:
+                group_steps, group_undo = self._steps(
+                    group, assignments.get(group, {}))
+                steps.extend(group_steps)
+                undo = group_undo + undo
+            if steps:
+                response = self.client.execute(
+                    'composite',
+                    {'steps': steps,
+                     'operation-headers': rollout_plan(
+                         wave, self.max_failed_servers)})
+                self.client._invalidate_deployment(self.name)
+                if not util.is_success(response):
+                    # the domain controller rolled the wave back
+                    return self._fail(number, response.json().get(
+                        'failure-description'))
+            self.deployed.extend(wave)
+            self._undo = undo + self._undo
+            if not self._healthy(wave):
+                return self._fail(number, 'health check failed')
+            logger.info('Rolled {} out to {}'.format(self.name,
+                                                     ', '.join(wave)))
+        return self
+
+    def _healthy(self, wave):
+        deadline = time.time() + self.timeout
+        while True:
+            if self.health_check is not None:
+                healthy = self.health_check(self.client, self.name, wave)
+            else:
+                healthy = deployment_health(self.client, self.name, wave,
+                                            self.max_failed_servers)
+            if healthy is not None:
+                return healthy
+            if time.time() + self.interval > deadline:
+                return False
+            time.sleep(self.interval)
+
+    def _fail(self, number, description):
+        self.failed = 'Wave {} ({}) failed: {}'.format(
+            number, ', '.join(self.waves[number - 1]), description)
+        logger.warning('Rollout of {}: {}, rolling back'.format(
+            self.name, self.failed))
+        steps = list(self._undo)
+        if self.remove_content:
+            steps.append(self._request('remove',
+                                       [{'deployment': self.name}]))
+        if steps:
+            response = self.client.execute('composite', {'steps': steps})
+            self.client._invalidate_deployment(self.name)
+            self.rolled_back = util.is_success(response)
+            if not self.rolled_back:
+                logger.error('Rollback of {} failed: {}'.format(
+                    self.name, response.json().get('failure-description')))
+        else:
+            self.rolled_back = True
+        return self
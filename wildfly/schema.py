@@ -0,0 +1,141 @@
+import errno
+import json
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    from urllib import quote
+except ImportError:
+    from urllib.parse import quote
+
+from . import util
+from .address import Address
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# child types registered for any name: their resources share one
+# description, so their names are left out of the cache keys. The names of
+# other child types (subsystem, core-service, type, ...) select different
+# descriptions and are kept.
+WILDCARD_TYPES = frozenset([
+    'host', 'server', 'server-config', 'server-group', 'deployment',
+    'subdeployment', 'profile', 'socket-binding-group', 'socket-binding',
+    'interface', 'path', 'system-property', 'jvm', 'extension'])
+
+
+class SchemaCache(object):
+    """
+    On-disk cache of read-resource-description results (operations
+    included), keyed by the release-version of the domain controller and
+    the address pattern of the resource. The management model only changes
+    with the server version, so descriptions are never revalidated; a new
+    release reads them afresh. Descriptions are loaded from disk on first
+    use and kept in memory, so a client with a schema cache answers
+    read_operation_names, read_operation_description and
+    read_children_types without contacting the controller once the
+    resources were described.
+
+    Files are laid out as <directory>/<release-version>/<pattern>.json and
+    written atomically, so the cache can be shared between processes.
+    """
+
+    def __init__(self, directory, wildcard_types=WILDCARD_TYPES):
+        self.directory = directory
+        self.wildcard_types = frozenset(wildcard_types)
+        self._descriptions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, address):
+        """ Returns the pattern of address, e.g.
+        /host=*/server=*/subsystem=logging. """
+        return '/' + '/'.join(
+            '{}={}'.format(child_type,
+                           '*' if child_type in self.wildcard_types else name)
+            for child_type, name in Address.of(address))
+
+    def path(self, version, key):
+        return os.path.join(self.directory, quote(version, safe=''),
+                            quote(key, safe='') + '.json')
+
+    def get(self, version, address):
+        """ Returns the cached description of address, or None. """
+
+        cache_key = (version, self.key(address))
+        with self._lock:
+            description = self._descriptions.get(cache_key)
+            if description is not None:
+                self.hits += 1
+                return description
+        try:
+            with open(self.path(*cache_key)) as cached:
+                description = json.load(cached)
+        except (IOError, OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._descriptions[cache_key] = description
+            self.hits += 1
+        return description
+
+    def put(self, version, address, description):
+        """ Stores the description of address. """
+
+        cache_key = (version, self.key(address))
+        with self._lock:
+            self._descriptions[cache_key] = description
+        path = self.path(*cache_key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        fd, partial = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w') as cached:
+                json.dump(description, cached)
+            os.rename(partial, path)
+        except Exception:
+            os.remove(partial)
+            raise
+
+    def describe(self, client, address=[]):
+        """ Returns the description of the resource at address, read with
+        client and cached unless it is already, or None if it cannot be
+        read. The cache is bypassed while the release-version of the
+        controller cannot be read. """
+
+        version = client.release_version()
+        if version is not None:
+            description = self.get(version, address)
+            if description is not None:
+                return description
+        response = client.execute('read-resource-description',
+                                  {'operations': True}, address)
+        if not util.is_success(response):
+            return None
+        description = response.json()['result']
+        if isinstance(description, list):
+            # result of a wildcard address
+            description = next((item['result'] for item in description
+                                if item.get('outcome') == 'success'), None)
+            if description is None:
+                return None
+        if version is None:
+            return description
+        self.put(version, address, description)
+        logger.debug('Cached the description of {}'.format(
+            self.key(address)))
+        return description
+
+    def clear(self):
+        """ Forgets the descriptions held in memory. """
+        with self._lock:
+            self._descriptions.clear()
@@ -0,0 +1,297 @@
+import copy
+import logging
+import time
+
+from . import util
+from .address import Address
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _key(address):
+    """ Returns an address, given as a list of {type: name} dicts, a tuple
+    of (type, name) pairs or a CLI path, as an Address. """
+    return Address.of(address)
+
+
+def _address(key):
+    return [{child_type: name} for child_type, name in key]
+
+
+def _path(key):
+    return Address.of(key).path
+
+
+def _is_children(value):
+    """ Returns True if a read-resource value lists child resources rather
+    than holding an attribute: a non empty object whose values are all
+    resources (objects), or undefined in a non recursive read. """
+    return isinstance(value, dict) and bool(value) and all(
+        child is None or isinstance(child, dict) for child in value.values())
+
+
+def add_resource(index, key, result, child_types=()):
+    """ Adds the Nodes of a read-resource result at address key to index,
+    a dict of Nodes by address. Keys named in child_types are known child
+    types: when they hold no children they are left out rather than taken
+    for undefined attributes. Returns the Node at key.
+    """
+    attributes = {}
+    children = {}
+    for name, value in result.items():
+        if _is_children(value):
+            children[name] = tuple(sorted(value))
+            for child_name, child in value.items():
+                # children listed without content (non recursive read) are
+                # known by name only
+                if child is not None:
+                    add_resource(index, key + ((name, child_name),), child)
+        elif name in child_types and not value:
+            continue
+        else:
+            attributes[name] = value
+    node = index[key] = Node(key, attributes, children)
+    return node
+
+
+class Node(object):
+    """ A resource of a Snapshot: its address, attributes and the names of
+    its children by child type. """
+
+    __slots__ = ('address', '_attributes', '_children')
+
+    def __init__(self, address, attributes, children):
+        self.address = address
+        self._attributes = attributes
+        self._children = children
+
+    def __repr__(self):
+        return '<Node {}>'.format(self.path)
+
+    @property
+    def path(self):
+        return _path(self.address)
+
+    def attribute_names(self):
+        return sorted(self._attributes)
+
+    def attribute(self, name, default=None):
+        """ Returns a copy of the value of an attribute. """
+        return copy.deepcopy(self._attributes.get(name, default))
+
+    def attributes(self):
+        """ Returns a copy of all attribute values. """
+        return copy.deepcopy(self._attributes)
+
+    def child_types(self):
+        return sorted(self._children)
+
+    def child_names(self, child_type):
+        return list(self._children.get(child_type, ()))
+
+    def child_addresses(self, child_type):
+        return [self.address + ((child_type, name),)
+                for name in self._children.get(child_type, ())]
+
+
+class Diff(object):
+    """ Structural difference between two snapshots: the addresses of the
+    resources added and removed, and the attributes changed, as
+    {address: {name: (old value, new value)}}. """
+
+    def __init__(self, added=(), removed=(), changed=None):
+        self.added = sorted(added)
+        self.removed = sorted(removed)
+        self.changed = changed or {}
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return '<Diff +{} -{} ~{}>'.format(
+            len(self.added), len(self.removed), len(self.changed))
+
+    def paths(self):
+        """ Returns the (change, path) pairs of the diff in path order,
+        where change is 'added', 'removed' or 'changed'. """
+        return sorted([('added', _path(key)) for key in self.added] +
+                      [('removed', _path(key)) for key in self.removed] +
+                      [('changed', _path(key)) for key in self.changed],
+                      key=lambda change: change[1])
+
+    def to_dict(self):
+        return {'added': [_path(key) for key in self.added],
+                'removed': [_path(key) for key in self.removed],
+                'changed': dict(
+                    (_path(key), dict((name, list(values))
+                                      for name, values in changes.items()))
+                    for key, changes in self.changed.items())}
+
+
+class Snapshot(object):
+    """
+    Immutable, indexed copy of a management subtree, read with a single
+    recursive read-resource. Resources are looked up by address in constant
+    time, addresses with '*' wildcards are matched against the index, and
+    the read_* operations of the client are answered locally, with the
+    results the domain controller would return:
+
+        snapshot = client.snapshot([{'host': 'master'}])
+        for node in snapshot.find([{'host': '*'}, {'server': '*'}]):
+            node.attribute('server-state')
+        snapshot.read_attribute('server-state',
+                                [{'host': 'master'}, {'server': 'one'}])
+
+    A read-resource result does not say which keys are attributes and which
+    are child types; an object whose values are all objects is taken for a
+    child type. Child types without children read as undefined attributes.
+    """
+
+    def __init__(self, result, address=(), timestamp=None):
+        self.address = _key(address)
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._index = {}
+        if isinstance(result, list):
+            # result of a wildcard read-resource
+            for item in result:
+                if item.get('outcome') == 'success':
+                    add_resource(self._index, _key(item['address']),
+                                 item['result'] or {})
+        else:
+            add_resource(self._index, self.address, result or {})
+        self._index_types()
+        logger.debug('Snapshot of {} resources under {}'.format(
+            len(self._index), _address(self.address)))
+
+    @classmethod
+    def from_nodes(cls, nodes, address=(), timestamp=None):
+        """ Returns a Snapshot of existing nodes, which are shared rather
+        than copied. """
+        snapshot = cls.__new__(cls)
+        snapshot.address = _key(address)
+        snapshot.timestamp = time.time() if timestamp is None else timestamp
+        snapshot._index = dict((node.address, node) for node in nodes)
+        snapshot._index_types()
+        return snapshot
+
+    def _index_types(self):
+        self._by_types = {}
+        for key, node in self._index.items():
+            self._by_types.setdefault(
+                tuple(child_type for child_type, name in key),
+                []).append(node)
+
+    @classmethod
+    def load(cls, client, address=[], recursive=True, runtime=True):
+        """ Reads the subtree at address and returns its Snapshot. """
+        response = client.execute('read-resource',
+                                  {'recursive': recursive,
+                                   'include-runtime': runtime},
+                                  address)
+        if not util.is_success(response):
+            raise RuntimeError('Failed to read {}: {}'.format(
+                address, response.json().get('failure-description')))
+        return cls(response.json()['result'], address)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index.values())
+
+    def __contains__(self, address):
+        return _key(address) in self._index
+
+    def node(self, address):
+        """ Returns the Node at address, or None. """
+        return self._index.get(_key(address))
+
+    def find(self, address):
+        """ Returns the Nodes matching an address with '*' wildcards, in
+        address order. """
+        key = _key(address)
+        if not any(name == '*' for child_type, name in key):
+            node = self._index.get(key)
+            return [node] if node is not None else []
+        candidates = self._by_types.get(
+            tuple(child_type for child_type, name in key), [])
+        return sorted((node for node in candidates
+                       if util.address_startswith(node.address, key)),
+                      key=lambda node: node.address)
+
+    def diff(self, other):
+        """ Returns the Diff from this snapshot to other. Nodes shared by
+        both snapshots are skipped without comparing their values. """
+
+        added = [key for key in other._index if key not in self._index]
+        removed = [key for key in self._index if key not in other._index]
+        changed = {}
+        for key, node in self._index.items():
+            new = other._index.get(key)
+            if new is None or new is node:
+                continue
+            changes = dict(
+                (name, (node._attributes.get(name),
+                        new._attributes.get(name)))
+                for name in set(node._attributes) | set(new._attributes)
+                if node._attributes.get(name) != new._attributes.get(name))
+            if changes:
+                changed[key] = changes
+        return Diff(added, removed, changed)
+
+    # local read_* operations
+
+    def _read(self, address, read):
+        """ Applies read to the node at address. Wildcard addresses give
+        the list of {address, outcome, result} items of a wildcard
+        operation. Returns None if no resource matches. """
+        key = _key(address)
+        if any(name == '*' for child_type, name in key):
+            return [{'address': _address(node.address),
+                     'outcome': 'success',
+                     'result': read(node)}
+                    for node in self.find(key)]
+        node = self._index.get(key)
+        return read(node) if node is not None else None
+
+    def _resource(self, node, recursive):
+        result = node.attributes()
+        for child_type in node.child_types():
+            children = result[child_type] = {}
+            for child in node.child_addresses(child_type):
+                child_node = self._index.get(child)
+                children[child[-1][1]] = self._resource(child_node, True) \
+                    if recursive and child_node is not None else None
+        return result
+
+    def read_resource(self, address=[], recursive=False):
+        """ Returns the result of read-resource at address. """
+        return self._read(address,
+                          lambda node: self._resource(node, recursive))
+
+    def read_attribute(self, name, address=[]):
+        return self._read(address, lambda node: node.attribute(name))
+
+    def read_children_names(self, child_type, address=[]):
+        return self._read(address,
+                          lambda node: node.child_names(child_type))
+
+    def read_children_types(self, address=[]):
+        return self._read(address, lambda node: node.child_types())
+
+    def read_children_resources(self, child_type, address=[]):
+        def read(node):
+            result = {}
+            for child in node.child_addresses(child_type):
+                child_node = self._index.get(child)
+                result[child[-1][1]] = self._resource(child_node, False) \
+                    if child_node is not None else None
+            return result
+        return self._read(address, read)
@@ -0,0 +1,91 @@
+import logging
+from collections import namedtuple
+
+from . import util
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+Server = namedtuple('Server', ['host', 'name', 'group', 'hostname'])
+
+
+class Topology(object):
+    """
+    Indexed view of the domain: every WF host, the WF servers it runs, the
+    server group of each server and the qualified host name of the machine
+    the server runs on. Servers that are not running have no server
+    environment and therefore a hostname of None.
+    """
+
+    def __init__(self, servers, hosts=()):
+        self.servers = tuple(servers)
+        self.hosts = tuple(sorted(
+            set(hosts) | set(server.host for server in self.servers)))
+        self._by_name = {}
+        self._by_host = dict((host, []) for host in self.hosts)
+        self._by_group = {}
+        for server in self.servers:
+            self._by_name[(server.host, server.name)] = server
+            self._by_host[server.host].append(server)
+            self._by_group.setdefault(server.group, []).append(server)
+
+    @classmethod
+    def load(cls, client):
+        """ Reads the topology of the domain in a single composite
+        operation. """
+
+        with client.batch() as batch:
+            hosts = batch.read_children_names('host')
+            groups = batch.read_attribute(
+                'group', [{'host': '*'}, {'server-config': '*'}])
+            hostnames = batch.read_attribute(
+                'qualified-host-name',
+                [{'host': '*'}, {'server': '*'},
+                 {'core-service': 'server-environment'}])
+
+        qualified_hostnames = dict(
+            ((address['host'], address['server']), hostname)
+            for address, hostname in util.wildcard_results(
+                hostnames.result()))
+        servers = [Server(address['host'],
+                          address['server-config'],
+                          group,
+                          qualified_hostnames.get(
+                              (address['host'], address['server-config'])))
+                   for address, group in util.wildcard_results(
+                       groups.result())]
+        topology = cls(servers, hosts.result() or [])
+        logger.debug('Loaded topology of {} hosts and {} servers'.format(
+            len(topology.hosts), len(topology.servers)))
+        return topology
+
+    def groups(self):
+        return sorted(group for group in self._by_group if group)
+
+    def server(self, host, name):
+        """ Returns the server of the given WF host, or None. """
+        return self._by_name.get((host, name))
+
+    def servers_on_host(self, host):
+        return list(self._by_host.get(host, []))
+
+    def servers_in_group(self, server_group):
+        return list(self._by_group.get(server_group, []))
+
+    def group_hostnames(self, server_group):
+        """ Returns the qualified host names the servers of a server group
+        are running on. """
+        return [server.hostname
+                for server in self._by_group.get(server_group, [])
+                if server.hostname is not None]
+
+    def hostname_map(self):
+        """ Returns the {host: {server: {server-group: qualified-host-name}}}
+        mapping of the domain. """
+        host_map = dict((host, {}) for host in self.hosts)
+        for server in self.servers:
+            host_map[server.host][server.name] = {
+                server.group: server.hostname}
+        return host_map
@@ -0,0 +1,110 @@
+import io
+import os
+import uuid
+import logging
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_BLOCKSIZE = 64 * 1024
+
+
+class MultipartFile(object):
+    """
+    A multipart/form-data body holding a single file, read from disk as it
+    is sent so that no more than `blocksize` bytes of the file are held in
+    memory, whatever its size. The body can be rewound (e.g. to answer an
+    authentication challenge) and reports progress through
+    `callback(bytes_sent, total_bytes)`.
+    """
+
+    def __init__(self, fileobj, filename, field='file',
+                 blocksize=DEFAULT_BLOCKSIZE, callback=None):
+        boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(
+            boundary)
+        self._head = (
+            '--{}\r\n'
+            'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n'.format(
+                boundary, field, os.path.basename(filename))).encode('utf-8')
+        self._tail = '\r\n--{}--\r\n'.format(boundary).encode('utf-8')
+        self._file = fileobj
+        self._file_start = fileobj.tell()
+        self._file_size = os.fstat(fileobj.fileno()).st_size - \
+            self._file_start
+        self.blocksize = blocksize
+        self.callback = callback
+        self.len = len(self._head) + self._file_size + len(self._tail)
+        self._position = 0
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            block = self.read(self.blocksize)
+            if not block:
+                break
+            yield block
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.len
+        self._position = max(0, min(offset, self.len))
+        file_offset = min(max(0, self._position - len(self._head)),
+                          self._file_size)
+        self._file.seek(self._file_start + file_offset)
+        return self._position
+
+    def read(self, size=-1):
+        """ Returns the rest of the body when size is negative or None,
+        otherwise at most min(size, blocksize) bytes. """
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(self.blocksize), b''))
+        size = min(size, self.blocksize)
+        head_end = len(self._head)
+        file_end = head_end + self._file_size
+        block = b''
+        if self._position < head_end:
+            block = self._head[self._position:self._position + size]
+        elif self._position < file_end:
+            block = self._file.read(min(size, file_end - self._position))
+        elif self._position < self.len:
+            start = self._position - file_end
+            block = self._tail[start:start + size]
+        self._position += len(block)
+        if block and self.callback is not None:
+            self.callback(self._position, self.len)
+        return block
+
+
+class ChunkedBody(object):
+    """
+    A MultipartFile sent with chunked transfer encoding. Unlike a generator
+    over the body, it can be rewound, so a request answering a digest
+    challenge (e.g. for a stale nonce) sends the whole body again. Its
+    length is not exposed, and it cannot seek from its end, so that
+    requests sends it in chunks.
+    """
+
+    def __init__(self, body):
+        self.body = body
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def tell(self):
+        return self.body.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_END:
+            raise io.UnsupportedOperation(
+                'A chunked body cannot seek from its end')
+        return self.body.seek(offset, whence)
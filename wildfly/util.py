@@ -1,3 +1,13 @@
+import base64
+import binascii
+import hashlib
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+
 def is_success(response=None):
     if response is not None:
         return response.json()['outcome'] == 'success'
@@ -6,3 +16,54 @@ def is_success(response=None):
 
 def get_list(result):
     pass
+
+
+def wildcard_results(result):
+    """ Yields (address, result) pairs for the successful items of a
+    wildcard operation result. The address is flattened into a
+    {type: name} dictionary. """
+    for item in result or []:
+        if item.get('outcome') != 'success':
+            continue
+        address = {}
+        for element in item.get('address', []):
+            address.update(element)
+        yield address, item.get('result')
+
+
+def address_tuple(address):
+    """ Returns an address list as a hashable tuple of (type, name) pairs.
+    Tuples of pairs, such as Addresses, are returned as they are. """
+    if isinstance(address, tuple):
+        return address
+    return tuple(item for element in address for item in element.items())
+
+
+def address_startswith(address, prefix):
+    """ Returns True if the address tuple lies at or below prefix. A '*' in
+    either address matches any name. """
+    if len(address) < len(prefix):
+        return False
+    for (child_type, name), (prefix_type, prefix_name) in zip(address, prefix):
+        if child_type != prefix_type:
+            return False
+        if name != prefix_name and '*' not in (name, prefix_name):
+            return False
+    return True
+
+
+def content_hash(path, blocksize=64 * 1024):
+    """ Returns the SHA-1 of a file in the form the content repository
+    reports it (the base64 BYTES_VALUE), reading the file in blocks. """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as content:
+        for block in iter(lambda: content.read(blocksize), b''):
+            digest.update(block)
+    return base64.b64encode(digest.digest()).decode('ascii')
+
+
+def hex_to_bytes_value(hexdigest):
+    """ Converts a hex digest into a base64 BYTES_VALUE. """
+    if len(hexdigest) != 40:
+        raise ValueError('Not a SHA-1 digest: {}'.format(hexdigest))
+    return base64.b64encode(binascii.unhexlify(hexdigest)).decode('ascii')
@@ -0,0 +1,300 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from . import util
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 10.0
+DEFAULT_BACKOFF = 2.0
+
+
+# old is None for a resource that appeared, new is None for one that went
+# away (e.g. the runtime resources of a stopped server)
+ServerStateChanged = namedtuple(
+    'ServerStateChanged', ['host', 'server', 'old', 'new'])
+DeploymentEnabledChanged = namedtuple(
+    'DeploymentEnabledChanged', ['server_group', 'deployment', 'old', 'new'])
+DeploymentStatusChanged = namedtuple(
+    'DeploymentStatusChanged', ['host', 'server', 'deployment', 'old', 'new'])
+
+
+# kind: (attribute read, event type, address types)
+KINDS = {
+    'server-state': ('server-state', ServerStateChanged,
+                     ('host', 'server')),
+    'enabled': ('enabled', DeploymentEnabledChanged,
+                ('server-group', 'deployment')),
+    'status': ('status', DeploymentStatusChanged,
+               ('host', 'server', 'deployment')),
+    'group': ('group', None, ('host', 'server-config')),
+}
+
+
+def _pattern(kind, *names):
+    """ Returns the address tuple of kind, '*' standing for unset names. """
+    return tuple(zip(KINDS[kind][2], [name or '*' for name in names]))
+
+
+def _event(kind, key, old, new):
+    return KINDS[kind][1](*([name for child_type, name in key] + [old, new]))
+
+
+class Watch(object):
+    """
+    Subscription to the changes observed by a Poller. Iterating blocks
+    until the next event; the iteration ends once timeout seconds have
+    passed, or when the watch is closed. Changes of the same resource that
+    are not consumed yet are coalesced into a single event. On Python 3 a
+    Watch is also an asynchronous iterator, waiting on the event loop's
+    default executor.
+    """
+
+    def __init__(self, poller, specs, server_group=None, timeout=None):
+        self.poller = poller
+        self.specs = frozenset(specs)
+        self.server_group = server_group
+        self.deadline = None if timeout is None else time.time() + timeout
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self.poller.unsubscribe(self)
+
+    def _push(self, kind, key, old, new):
+        identity = (kind, key)
+        with self._condition:
+            pending = self._pending.pop(identity, None)
+            if pending is not None:
+                old = pending.old
+            if old != new:
+                self._pending[identity] = _event(kind, key, old, new)
+            self._condition.notify_all()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._condition:
+            while not self._pending:
+                remaining = None if self.deadline is None \
+                    else self.deadline - time.time()
+                if self.closed or (remaining is not None and remaining <= 0):
+                    self.close()
+                    raise StopIteration
+                self._condition.wait(remaining)
+            return self._pending.popitem(last=False)[1]
+
+    next = __next__
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        import asyncio
+        return asyncio.get_event_loop().run_in_executor(None, self._anext)
+
+    def _anext(self):
+        try:
+            return next(self)
+        except StopIteration:
+            raise StopAsyncIteration  # noqa: F821 (Python 3 only)
+
+
+class Poller(object):
+    """
+    Polls the state of the servers and deployments watched by its Watches,
+    reading every watched address in a single composite operation, and
+    hands each change to the watches interested in it. The polling interval
+    starts at min_interval, grows by the backoff factor after every poll
+    without changes up to max_interval, and drops back to min_interval
+    when a change is seen or when poke() is called (e.g. after a write
+    made through the client). A Client shares one Poller between all its
+    watches; it runs on a daemon thread while there are watches.
+    """
+
+    def __init__(self, client, min_interval=DEFAULT_MIN_INTERVAL,
+                 max_interval=DEFAULT_MAX_INTERVAL, backoff=DEFAULT_BACKOFF):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.polls = 0
+        self._watches = []
+        self._state = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._poked = False
+
+    def subscribe(self, specs, server_group=None, timeout=None):
+        """ Returns a Watch of the (kind, address) specs. """
+        watch = Watch(self, specs, server_group, timeout)
+        with self._lock:
+            self._watches.append(watch)
+            self.interval = self.min_interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='wildfly-poller')
+                self._thread.daemon = True
+                self._thread.start()
+            else:
+                self._wakeup.notify_all()
+        return watch
+
+    def unsubscribe(self, watch):
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+            self._wakeup.notify_all()
+
+    def poke(self):
+        """ Polls again right away, e.g. because a change is expected. """
+        with self._lock:
+            self.interval = self.min_interval
+            self._poked = True
+            self._wakeup.notify_all()
+
+    def stop(self):
+        with self._lock:
+            watches = list(self._watches)
+        for watch in watches:
+            watch.close()
+
+    def _specs(self):
+        specs = set()
+        for watch in self._watches:
+            specs.update(watch.specs)
+            if watch.server_group is not None:
+                # the server group of a server is read from its config
+                specs.update(('group', _pattern('group', host, '*'))
+                             for kind, pattern in watch.specs
+                             if kind in ('server-state', 'status')
+                             for host in [pattern[0][1]])
+        return sorted(specs)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+                specs = self._specs()
+            try:
+                changed = self.poll(specs)
+            except Exception:
+                logger.warning('Polling the domain failed', exc_info=True)
+                changed = False
+            with self._lock:
+                if changed:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.interval * self.backoff,
+                                        self.max_interval)
+                deadline = time.time() + self.interval
+                # wait for the next poll, unless poked or the watched specs
+                # change
+                while self._watches and not self._poked and \
+                        time.time() < deadline and \
+                        self._specs() == specs:
+                    self._wakeup.wait(deadline - time.time())
+                self._poked = False
+
+    def poll(self, specs):
+        """ Reads the specs once and dispatches the changes since the last
+        poll. Returns True if anything changed. """
+
+        with self.client.batch() as batch:
+            steps = [batch.read_attribute(
+                KINDS[kind][0], [{child_type: name}
+                                 for child_type, name in pattern])
+                for kind, pattern in specs]
+        self.polls += 1
+
+        changes = []
+        state, self._state = self._state, {}
+        for spec, step in zip(specs, steps):
+            previous = state.get(spec)
+            if not step.is_success():
+                logger.debug('Polling {} failed: {}'.format(
+                    spec, step.failure_description))
+                if previous is not None:
+                    self._state[spec] = previous
+                continue
+            kind, pattern = spec
+            if any(name == '*' for child_type, name in pattern):
+                values = dict((util.address_tuple(item['address']),
+                               item.get('result'))
+                              for item in step.result() or []
+                              if item.get('outcome') == 'success')
+            else:
+                values = {pattern: step.result()}
+            self._state[spec] = values
+            if previous is None or kind == 'group':
+                # the first read of a spec is the baseline
+                continue
+            for key in set(previous) | set(values):
+                old, new = previous.get(key), values.get(key)
+                if old != new:
+                    changes.append((spec, key, old, new))
+
+        if changes:
+            groups = self._groups()
+            with self._lock:
+                watches = list(self._watches)
+            for spec, key, old, new in changes:
+                for watch in watches:
+                    if spec in watch.specs and self._in_group(
+                            watch.server_group, spec[0], key, groups):
+                        watch._push(spec[0], key, old, new)
+        return bool(changes)
+
+    def _groups(self):
+        """ Returns the server group of every polled server config, by
+        (host, server). """
+        groups = {}
+        for (kind, pattern), values in self._state.items():
+            if kind == 'group':
+                for key, group in values.items():
+                    groups[(key[0][1], key[1][1])] = group
+        return groups
+
+    @staticmethod
+    def _in_group(server_group, kind, key, groups):
+        if server_group is None:
+            return True
+        if kind == 'enabled':
+            return key[0][1] == server_group
+        return groups.get((key[0][1], key[1][1])) == server_group
+
+
+def watch_specs(servers=True, deployments=True, host=None, server=None,
+                server_group=None, deployment=None):
+    """ Returns the narrowest (kind, address) specs to poll for a watch. """
+    specs = []
+    if servers:
+        specs.append(('server-state',
+                      _pattern('server-state', host, server)))
+    if deployments:
+        if host is None and server is None:
+            specs.append(('enabled',
+                          _pattern('enabled', server_group, deployment)))
+        specs.append(('status',
+                      _pattern('status', host, server, deployment)))
+    return specs